@@ -0,0 +1,282 @@
+"""
+MindConnect+ Activity Summaries
+Incremental maintenance of GroupActivity / CounselorActivity
+(Phase2_DDL_Schema/Summary_Tables.sql) and MoodRollup (migrations/V004) and
+the dashboard queries that read them
+
+Every on_* function takes the cursor of the write it belongs to and must
+run before that transaction commits, so the summaries never drift from the
+base tables.
+
+MoodRollup is filled once from MoodLog by the backfill job (databases
+created before it existed, or to resync):
+    python aggregates.py --engine oracle
+    python aggregates.py --engine sqlite --db mindconnect.db
+"""
+
+import argparse
+import time
+
+# =============================================
+# WRITE-SIDE MAINTENANCE
+# =============================================
+# Oracle MERGEs; the embedded SQLite engine (local_engine.py) has no MERGE,
+# so the same changes are written there as INSERT ... ON CONFLICT upserts.
+STATEMENTS = {
+    "oracle": {
+        "join_group": """
+            MERGE INTO GroupActivity g
+            USING (SELECT :group_id AS groupID FROM DUAL) s
+            ON (g.groupID = s.groupID)
+            WHEN MATCHED THEN UPDATE SET g.memberCount = g.memberCount + 1
+            WHEN NOT MATCHED THEN INSERT (groupID, memberCount, sessionCount)
+                VALUES (s.groupID, 1, 0)
+        """,
+        "register_session": """
+            MERGE INTO CounselorActivity c
+            USING (SELECT counselorID FROM CounselingSession WHERE sessionID = :session_id) s
+            ON (c.counselorID = s.counselorID)
+            WHEN MATCHED THEN UPDATE SET c.attendeeCount = c.attendeeCount + 1
+            WHEN NOT MATCHED THEN INSERT (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+                VALUES (s.counselorID, 0, 1, 0, 0)
+        """,
+        "rate_session": """
+            MERGE INTO CounselorActivity c
+            USING (SELECT counselorID FROM CounselingSession WHERE sessionID = :session_id) s
+            ON (c.counselorID = s.counselorID)
+            WHEN MATCHED THEN UPDATE SET
+                c.ratingSum = c.ratingSum + :sum_delta,
+                c.ratingCount = c.ratingCount + :count_delta
+            WHEN NOT MATCHED THEN INSERT (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+                VALUES (s.counselorID, 0, 0, :sum_delta, :count_delta)
+        """,
+        "log_mood": """
+            MERGE INTO MoodRollup r
+            USING (SELECT :user_id AS userID, :period AS period, :mood AS moodLevel,
+                          TO_DATE(:log_date, 'YYYY-MM-DD') AS logDate FROM DUAL) s
+            ON (r.userID = s.userID AND r.period = s.period AND r.moodLevel = s.moodLevel)
+            WHEN MATCHED THEN UPDATE SET
+                r.logCount = r.logCount + 1,
+                r.streak = CASE WHEN s.logDate = r.lastLog + 1 THEN r.streak + 1 ELSE 1 END,
+                r.lastLog = s.logDate
+            WHEN NOT MATCHED THEN INSERT (userID, period, moodLevel, logCount, firstLog, lastLog, streak)
+                VALUES (s.userID, s.period, s.moodLevel, 1, s.logDate, s.logDate, 1)
+        """,
+        "clear_mood_rollup": "DELETE FROM MoodRollup {where}",
+        # Streak = length of the latest run of consecutive days: logDate minus
+        # its row number is constant within a run and grows from run to run
+        "backfill_mood_rollup": """
+            INSERT INTO MoodRollup (userID, period, moodLevel, logCount, firstLog, lastLog, streak)
+            WITH logs AS (
+                SELECT userID, 'ALL' AS period, moodLevel, logDate FROM MoodLog {where}
+                UNION ALL
+                SELECT userID, 'ALL', '*', logDate FROM MoodLog {where}
+                UNION ALL
+                SELECT userID, TO_CHAR(logDate, 'YYYY-MM'), moodLevel, logDate FROM MoodLog {where}
+                UNION ALL
+                SELECT userID, TO_CHAR(logDate, 'YYYY-MM'), '*', logDate FROM MoodLog {where}
+            ),
+            runs AS (
+                SELECT userID, period, moodLevel, logDate,
+                    logDate - ROW_NUMBER() OVER (PARTITION BY userID, period, moodLevel ORDER BY logDate) AS run
+                FROM logs
+            ),
+            latest AS (
+                SELECT runs.*, MAX(run) OVER (PARTITION BY userID, period, moodLevel) AS lastRun
+                FROM runs
+            )
+            SELECT userID, period, moodLevel, COUNT(*), MIN(logDate), MAX(logDate),
+                COUNT(CASE WHEN run = lastRun THEN 1 END)
+            FROM latest
+            GROUP BY userID, period, moodLevel
+        """,
+    },
+    "sqlite": {
+        "join_group": """
+            INSERT INTO GroupActivity (groupID, memberCount, sessionCount)
+            VALUES (:group_id, 1, 0)
+            ON CONFLICT (groupID) DO UPDATE SET memberCount = memberCount + 1
+        """,
+        "register_session": """
+            INSERT INTO CounselorActivity (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+            SELECT counselorID, 0, 1, 0, 0 FROM CounselingSession WHERE sessionID = :session_id
+            ON CONFLICT (counselorID) DO UPDATE SET attendeeCount = attendeeCount + 1
+        """,
+        "rate_session": """
+            INSERT INTO CounselorActivity (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+            SELECT counselorID, 0, 0, :sum_delta, :count_delta FROM CounselingSession WHERE sessionID = :session_id
+            ON CONFLICT (counselorID) DO UPDATE SET
+                ratingSum = ratingSum + :sum_delta,
+                ratingCount = ratingCount + :count_delta
+        """,
+        "log_mood": """
+            INSERT INTO MoodRollup (userID, period, moodLevel, logCount, firstLog, lastLog, streak)
+            VALUES (:user_id, :period, :mood, 1, :log_date, :log_date, 1)
+            ON CONFLICT (userID, period, moodLevel) DO UPDATE SET
+                logCount = logCount + 1,
+                streak = CASE WHEN excluded.lastLog = date(lastLog, '+1 day') THEN streak + 1 ELSE 1 END,
+                lastLog = excluded.lastLog
+        """,
+        "clear_mood_rollup": "DELETE FROM MoodRollup {where}",
+        "backfill_mood_rollup": """
+            INSERT INTO MoodRollup (userID, period, moodLevel, logCount, firstLog, lastLog, streak)
+            WITH logs AS (
+                SELECT userID, 'ALL' AS period, moodLevel, logDate FROM MoodLog {where}
+                UNION ALL
+                SELECT userID, 'ALL', '*', logDate FROM MoodLog {where}
+                UNION ALL
+                SELECT userID, substr(logDate, 1, 7), moodLevel, logDate FROM MoodLog {where}
+                UNION ALL
+                SELECT userID, substr(logDate, 1, 7), '*', logDate FROM MoodLog {where}
+            ),
+            runs AS (
+                SELECT userID, period, moodLevel, logDate,
+                    julianday(logDate) - ROW_NUMBER() OVER (PARTITION BY userID, period, moodLevel ORDER BY logDate) AS run
+                FROM logs
+            ),
+            latest AS (
+                SELECT runs.*, MAX(run) OVER (PARTITION BY userID, period, moodLevel) AS lastRun
+                FROM runs
+            )
+            SELECT userID, period, moodLevel, COUNT(*), MIN(logDate), MAX(logDate),
+                COUNT(CASE WHEN run = lastRun THEN 1 END)
+            FROM latest
+            GROUP BY userID, period, moodLevel
+        """,
+    },
+}
+
+# MoodRollup keys: period is ALL_TIME or a 'YYYY-MM' month, moodLevel a mood
+# or ALL_MOODS (every log of the user in that period)
+ALL_TIME = "ALL"
+ALL_MOODS = "*"
+
+
+def _statement(cursor, name):
+    return STATEMENTS[getattr(cursor, "dialect", "oracle")][name]
+
+
+def on_join_group(cursor, group_id):
+    """User joined a group: one more member"""
+    cursor.execute(_statement(cursor, "join_group"), group_id=group_id)
+
+
+def on_register_session(cursor, session_id):
+    """User registered for a session: one more attendee for its counselor"""
+    cursor.execute(_statement(cursor, "register_session"), session_id=session_id)
+
+
+def on_rate_session(cursor, user_id, session_id, rating):
+    """User (re)rated a session; call before the UserSession UPDATE
+
+    Locks the UserSession row to read the previous rating, then moves the
+    counselor's rating sum/count by the difference.
+    """
+    cursor.execute("""
+        SELECT rating FROM UserSession
+        WHERE userID = :1 AND sessionID = :2
+        FOR UPDATE
+    """, [user_id, session_id])
+    row = cursor.fetchone()
+    if row is None:
+        return
+    previous = row[0]
+    cursor.execute(_statement(cursor, "rate_session"), session_id=session_id,
+                   sum_delta=rating - (previous or 0),
+                   count_delta=0 if previous is not None else 1)
+
+
+def on_log_mood(cursor, user_id, log_date, mood):
+    """User logged a mood (log_date: date); call after the MoodLog INSERT
+
+    A log after the user's latest one bumps the four rollup rows it belongs
+    to (all time / its month, its mood / all moods) and extends or restarts
+    their streaks. A backdated log can split or join runs, so that user's
+    rows are rebuilt from MoodLog instead.
+    """
+    cursor.execute("""
+        SELECT lastLog FROM MoodRollup
+        WHERE userID = :1 AND period = :2 AND moodLevel = :3
+        FOR UPDATE
+    """, [user_id, ALL_TIME, ALL_MOODS])
+    row = cursor.fetchone()
+    day = log_date.strftime("%Y-%m-%d")
+    if row is not None and str(row[0])[:10] > day:
+        backfill_mood_rollup(cursor, user_id)
+        return
+    cursor.executemany(_statement(cursor, "log_mood"),
+                       [dict(user_id=user_id, period=period, mood=level, log_date=day)
+                        for period in (ALL_TIME, day[:7]) for level in (mood, ALL_MOODS)])
+
+
+def backfill_mood_rollup(cursor, user_id=None):
+    """Rebuild MoodRollup from MoodLog for one user, or for everyone"""
+    where, binds = ("WHERE userID = :user_id", dict(user_id=user_id)) if user_id is not None else ("", {})
+    cursor.execute(_statement(cursor, "clear_mood_rollup").format(where=where), binds)
+    cursor.execute(_statement(cursor, "backfill_mood_rollup").format(where=where), binds)
+
+
+# =============================================
+# DASHBOARD QUERIES
+# =============================================
+TOP_GROUPS_QUERY = """
+    SELECT
+        sg.groupName,
+        sg.focusArea,
+        ga.memberCount as members,
+        ga.sessionCount as sessions
+    FROM GroupActivity ga
+    JOIN SupportGroup sg ON ga.groupID = sg.groupID
+    ORDER BY ga.memberCount DESC
+    FETCH FIRST 5 ROWS ONLY
+"""
+
+TOP_COUNSELORS_QUERY = """
+    SELECT
+        u.userName,
+        c.specialization,
+        ca.sessionCount as sessions,
+        ROUND(ca.ratingSum * 1.0 / NULLIF(ca.ratingCount, 0), 2) as avg_rating
+    FROM CounselorActivity ca
+    JOIN Counselor c ON ca.counselorID = c.userID
+    JOIN AppUser u ON c.userID = u.userID
+    ORDER BY avg_rating DESC NULLS LAST
+    FETCH FIRST 5 ROWS ONLY
+"""
+
+
+# =============================================
+# BACKFILL JOB
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild MoodRollup from MoodLog")
+    parser.add_argument("--engine", choices=["oracle", "sqlite"], default="oracle")
+    parser.add_argument("--db", default="mindconnect.db", help="SQLite database file (--engine sqlite)")
+    args = parser.parse_args()
+
+    if args.engine == "sqlite":
+        import local_engine
+        pool = local_engine.LocalPool(args.db)
+    else:
+        import db
+        pool = db.create_pool()
+
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            backfill_mood_rollup(cursor)
+            conn.commit()
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT userID) FROM MoodRollup")
+            rows, users = cursor.fetchone()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    pool.close()
+    print(f"✅ MoodRollup rebuilt: {rows:,} rows for {users:,} users in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+MindConnect+ JSON API
+The app's operations over HTTP for mobile clients and partner integrations
+
+An ASGI application (Starlette) on the same Repository as app.py, so it
+uses the same query cache, read replica routing and tracing. The query
+cache lives in each process: a write drops the cached results only in the
+process that made it, so with --workers above 1 the others can serve
+results up to QUERY_CACHE_TTL_S old. Set API_QUERY_CACHE = False when
+running several workers and clients must read their own writes. Handlers are
+async; the database work runs on a bounded pool of worker threads, one
+pooled connection each, because the Repository methods, the summary-table
+maintenance in aggregates.py and the SQLite backend all use blocking
+cursors. At most API_DB_WORKERS requests use the database at once; beyond
+API_MAX_PENDING waiting requests new ones get 503 with Retry-After instead
+of piling up.
+
+Read endpoints are paginated with an opaque ?cursor= taken from the "next"
+field of the previous page (keyset paging for mood history), and send an
+ETag: a client that repeats a GET with If-None-Match gets 304 and no body
+when nothing changed. ?fresh=true reads from the primary instead of a
+replica, to see a write the client just made. Writes commit before the
+response; a duplicate (already logged that day, already a member, ...)
+is 409, and a write naming a user, group or session that does not exist,
+or rating a session the user did not register for, is 404. mood and
+privacy must be one of the values the app offers.
+
+    POST /users                                   {user_id, user_name, email, password, privacy}
+    POST /users/{id}/moods                        {date: "YYYY-MM-DD", mood}
+    GET  /users/{id}/moods?order=newest|oldest&mood=&limit=&cursor=
+    GET  /users/{id}/moods/stats?period=ALL|YYYY-MM
+    POST /users/{id}/groups                       {group_id}
+    GET  /users/{id}/groups?limit=&cursor=
+    POST /users/{id}/sessions                     {session_id}
+    PUT  /users/{id}/sessions/{session_id}/rating {rating}
+    GET  /users/{id}/matches?limit=&cursor=
+    GET  /users/{id}/resources?limit=&cursor=
+
+Requires starlette and uvicorn (in requirements.txt).
+
+Settings (config.py):
+    API_DB_WORKERS = 8        # default: ORACLE_POOL_MAX
+    API_QUERY_CACHE = True    # False: no per-process query cache (see above)
+    API_MAX_PENDING = 1000
+    API_PAGE_SIZE = 50
+    API_MAX_PAGE_SIZE = 500
+
+Usage:
+    python api.py --port 8000 --workers 4
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import aggregates
+import config
+import pagination
+import repository
+import tracing
+
+API_DB_WORKERS = getattr(config, "API_DB_WORKERS", getattr(config, "ORACLE_POOL_MAX", 8))
+API_QUERY_CACHE = getattr(config, "API_QUERY_CACHE", True)
+API_MAX_PENDING = getattr(config, "API_MAX_PENDING", 1000)
+API_PAGE_SIZE = getattr(config, "API_PAGE_SIZE", 50)
+API_MAX_PAGE_SIZE = getattr(config, "API_MAX_PAGE_SIZE", 500)
+
+HISTORY_ORDERS = {"newest": "Newest first", "oldest": "Oldest first"}
+
+# Constraint errors by message: the Oracle code, then SQLite's wording
+DUPLICATE_KEY = re.compile(r"ORA-00001\b|UNIQUE constraint failed")
+MISSING_PARENT = re.compile(r"ORA-02291\b|FOREIGN KEY constraint failed")
+
+
+# =============================================
+# DATABASE WORK (bounded worker threads)
+# =============================================
+class Backend:
+    """Repository, match index and the worker threads that use them"""
+
+    def __init__(self, workers=API_DB_WORKERS, max_pending=API_MAX_PENDING, repo=None):
+        self.repo = repo or repository.create_repository()
+        if not API_QUERY_CACHE:
+            self.repo.cache = None
+        self.matches = self.repo.match_index()
+        self.matches.refresh()
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-db")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _call(self, endpoint, work, primary):
+        tracing.start_run("API")
+        tracing.set_tab(endpoint)
+        with self.repo.connection(primary) as conn:
+            return work(conn)
+
+    async def run(self, endpoint, work, primary=False):
+        """await work(conn) on a worker thread; 503 when too many requests are waiting"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(503, "Too many requests in progress", headers={"Retry-After": "1"})
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._call, endpoint, work, primary)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.repo.pool.close()
+
+
+# =============================================
+# JSON, ETAGS AND PAGING
+# =============================================
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d") if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def records(frame):
+    """DataFrame -> [{column: value}] with lower-case keys and None for nulls (NaN/NaT)
+
+    Plain tuples rather than DataFrame.to_dict: pandas' per-call overhead
+    would dominate a request for a handful of rows.
+    """
+    columns = [column.lower() for column in frame.columns]
+    return [{key: (None if value != value else value) for key, value in zip(columns, row)}
+            for row in frame.itertuples(index=False, name=None)]
+
+
+def json_response(request, payload, status=200):
+    """JSON with an ETag; 304 when the client's If-None-Match still matches"""
+    body = json.dumps(payload, default=_encode, separators=(",", ":")).encode()
+    headers = {"Cache-Control": "private, no-cache"}
+    if request.method == "GET":
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        headers["ETag"] = etag
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+
+def encode_cursor(position):
+    text = json.dumps(position, default=lambda v: {"$dt": v.isoformat()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        text = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        return json.loads(text, object_hook=lambda o: datetime.fromisoformat(o["$dt"]) if set(o) == {"$dt"} else o)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def page_size(request):
+    return min(_int(request.query_params.get("limit", API_PAGE_SIZE), "limit", minimum=1), API_MAX_PAGE_SIZE)
+
+
+def page_of(request, frame):
+    """{"items", "next"} for one page of an in-memory result (cursor = offset)"""
+    offset = decode_cursor(request.query_params.get("cursor")) or 0
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(400, "Invalid cursor")
+    limit = page_size(request)
+    end = offset + limit
+    return {"items": records(frame.iloc[offset:end]),
+            "next": encode_cursor(end) if end < len(frame) else None}
+
+
+# =============================================
+# REQUEST PARSING
+# =============================================
+def _int(value, name, minimum=None, maximum=None):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(400, f"{name} must be an integer")
+    if minimum is not None and number < minimum:
+        raise HTTPException(400, f"{name} must be at least {minimum}")
+    if maximum is not None and number > maximum:
+        raise HTTPException(400, f"{name} must be at most {maximum}")
+    return number
+
+
+def _choice(value, name, choices):
+    if value not in choices:
+        raise HTTPException(400, f"{name} must be one of {', '.join(choices)}")
+    return value
+
+
+def _date(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise HTTPException(400, f"{name} must be a YYYY-MM-DD date")
+
+
+async def _body(request, *fields):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Body must be JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(400, "Body must be a JSON object")
+    missing = [field for field in fields if body.get(field) in (None, "")]
+    if missing:
+        raise HTTPException(400, f"Missing {', '.join(missing)}")
+    return body
+
+
+def _user(request):
+    return _int(request.path_params["user_id"], "user_id", minimum=1)
+
+
+def _fresh(request):
+    return request.query_params.get("fresh", "").lower() in ("1", "true", "yes")
+
+
+async def _write(request, endpoint, write, payload):
+    """Commit write(conn); 201 with payload, 409 for a duplicate, 404 for a missing row"""
+    try:
+        await request.app.state.backend.run(endpoint, write, primary=True)
+    except HTTPException:
+        raise
+    except repository.NotFound as e:
+        raise HTTPException(404, str(e))
+    except Exception as e:
+        if type(e).__name__ != "IntegrityError":  # oracledb and sqlite3 both name it so
+            raise
+        if DUPLICATE_KEY.search(str(e)):
+            raise HTTPException(409, str(e))
+        if MISSING_PARENT.search(str(e)):
+            raise HTTPException(404, "No such user, group or session")
+        raise HTTPException(400, str(e))  # NOT NULL, CHECK, ...
+    return json_response(request, payload, status=201)
+
+
+# =============================================
+# ENDPOINTS
+# =============================================
+async def register_user(request):
+    body = await _body(request, "user_id", "user_name", "email", "password")
+    user_id = _int(body["user_id"], "user_id", minimum=1)
+    privacy = _choice(body.get("privacy", "public"), "privacy", repository.PRIVACY_SETTINGS)
+    repo = request.app.state.backend.repo
+    return await _write(request, "register_user", lambda conn: repo.register_user(
+        conn, user_id, body["user_name"], body["email"], body["password"], privacy),
+        {"user_id": user_id, "user_name": body["user_name"], "privacy": privacy})
+
+
+async def log_mood(request):
+    user_id = _user(request)
+    body = await _body(request, "mood")
+    log_date = _date(body["date"], "date") if body.get("date") else date.today()
+    mood = _choice(body["mood"], "mood", repository.MOOD_LEVELS)
+    repo = request.app.state.backend.repo
+    return await _write(request, "log_mood", lambda conn: repo.log_mood(conn, user_id, log_date, mood),
+                        {"user_id": user_id, "date": log_date, "mood": mood})
+
+
+async def mood_history(request):
+    user_id = _user(request)
+    order = request.query_params.get("order", "newest")
+    if order not in HISTORY_ORDERS:
+        raise HTTPException(400, f"order must be one of {', '.join(HISTORY_ORDERS)}")
+    filters = {"User": user_id}
+    if request.query_params.get("mood"):
+        filters["Mood"] = request.query_params["mood"]
+    grid = pagination.MOOD_HISTORY_GRID
+    last_row = decode_cursor(request.query_params.get("cursor"))
+    if last_row is not None and not (isinstance(last_row, dict)
+                                     and set(last_row) == set(grid.cursor_columns(HISTORY_ORDERS[order]))
+                                     and last_row["USERID"] == user_id
+                                     and isinstance(last_row["LOGDATE"], datetime)):
+        raise HTTPException(400, "Invalid cursor")
+    limit = page_size(request)
+    repo = request.app.state.backend.repo
+
+    def work(conn):
+        return grid.fetch_page(conn, HISTORY_ORDERS[order], filters, limit, last_row, read=repo.read_frame)
+
+    df, has_next, last = await request.app.state.backend.run("mood_history", work, _fresh(request))
+    columns = grid.columns
+    return json_response(request, {"items": records(df[columns] if not df.empty else df),
+                                   "next": encode_cursor(last) if has_next else None})
+
+
+async def mood_stats(request):
+    user_id = _user(request)
+    period = request.query_params.get("period", aggregates.ALL_TIME)
+    repo = request.app.state.backend.repo
+    totals, moods = await request.app.state.backend.run(
+        "mood_stats", lambda conn: repo.mood_summary(conn, user_id, period), _fresh(request))
+    if totals is None:
+        raise HTTPException(404, "No mood logs for this user and period")
+    return json_response(request, {"user_id": user_id, "period": period, "totals": totals,
+                                   "moods": records(moods)})
+
+
+async def join_group(request):
+    user_id = _user(request)
+    body = await _body(request, "group_id")
+    group_id = _int(body["group_id"], "group_id", minimum=1)
+    repo = request.app.state.backend.repo
+    return await _write(request, "join_group", lambda conn: repo.join_group(conn, user_id, group_id),
+                        {"user_id": user_id, "group_id": group_id})
+
+
+async def my_groups(request):
+    user_id = _user(request)
+    repo = request.app.state.backend.repo
+    df = await request.app.state.backend.run("my_groups", lambda conn: repo.user_groups(conn, user_id),
+                                             _fresh(request))
+    return json_response(request, page_of(request, df))
+
+
+async def register_session(request):
+    user_id = _user(request)
+    body = await _body(request, "session_id")
+    session_id = _int(body["session_id"], "session_id", minimum=1)
+    repo = request.app.state.backend.repo
+    return await _write(request, "register_session",
+                        lambda conn: repo.register_session(conn, user_id, session_id),
+                        {"user_id": user_id, "session_id": session_id})
+
+
+async def rate_session(request):
+    user_id = _user(request)
+    session_id = _int(request.path_params["session_id"], "session_id", minimum=1)
+    body = await _body(request, "rating")
+    rating = _int(body["rating"], "rating", minimum=1, maximum=5)
+    repo = request.app.state.backend.repo
+    return await _write(request, "rate_session",
+                        lambda conn: repo.rate_session(conn, user_id, session_id, rating),
+                        {"user_id": user_id, "session_id": session_id, "rating": rating})
+
+
+async def find_matches(request):
+    user_id = _user(request)
+    backend = request.app.state.backend
+    df = backend.matches.lookup(user_id)  # in memory once the index has loaded
+    if df is None:
+        df = await backend.run("find_matches", lambda conn: backend.repo.user_matches(conn, user_id))
+    return json_response(request, page_of(request, df))
+
+
+async def my_resources(request):
+    user_id = _user(request)
+    repo = request.app.state.backend.repo
+    df = await request.app.state.backend.run("my_resources", lambda conn: repo.user_resources(conn, user_id),
+                                             _fresh(request))
+    return json_response(request, page_of(request, df))
+
+
+async def health(request):
+    backend = request.app.state.backend
+    stats = {"pool": backend.repo.pool.stats()}
+    if backend.repo.cache is not None:
+        stats["query_cache"] = backend.repo.cache.stats()
+    return json_response(request, stats)
+
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    app.state.backend = Backend()
+    try:
+        yield
+    finally:
+        app.state.backend.close()
+
+
+routes = [
+    Route("/users", register_user, methods=["POST"]),
+    Route("/users/{user_id}/moods", log_mood, methods=["POST"]),
+    Route("/users/{user_id}/moods", mood_history, methods=["GET"]),
+    Route("/users/{user_id}/moods/stats", mood_stats, methods=["GET"]),
+    Route("/users/{user_id}/groups", join_group, methods=["POST"]),
+    Route("/users/{user_id}/groups", my_groups, methods=["GET"]),
+    Route("/users/{user_id}/sessions", register_session, methods=["POST"]),
+    Route("/users/{user_id}/sessions/{session_id}/rating", rate_session, methods=["PUT"]),
+    Route("/users/{user_id}/matches", find_matches, methods=["GET"]),
+    Route("/users/{user_id}/resources", my_resources, methods=["GET"]),
+    Route("/health", health, methods=["GET"]),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, exception_handlers={HTTPException: http_error})
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Serve the MindConnect+ JSON API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes; each has its own pool of ORACLE_POOL_MAX sessions and its own "
+                             "query cache (see API_QUERY_CACHE)")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
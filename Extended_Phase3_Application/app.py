@@ -1,25 +1,125 @@
 import streamlit as st
-import oracledb
 import pandas as pd
 import streamlit_pandas as sp
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as WriteTimeout
+from contextlib import contextmanager
 from datetime import datetime, date
-import config
+import aggregates
+import db
+import kpi
+import pagination
+import refdata
+import repository
+import tracing
+import ui
+import write_queue
 
 # =============================================
 # DATABASE CONNECTION CONFIGURATION
 # =============================================
-def get_connection():
-    """Create and return Oracle DB connection"""
+@st.cache_resource
+def get_repository():
+    """Data access on the configured backend (Oracle pool or local SQLite), shared across sessions"""
+    return repository.create_repository()
+
+@contextmanager
+def get_connection(read_your_writes=False):
+    """Borrow a pooled DB connection (None if the backend is unavailable)
+
+    With read replicas configured, reads are served by a replica. Pages that
+    show what the user just entered pass read_your_writes=True: for
+    READ_YOUR_WRITES_S after this session's last write they read from the
+    primary, which has it even if the replicas are still catching up.
+    """
     try:
-        connection = oracledb.connect(
-            user=config.ORACLE_USER,
-            password=config.ORACLE_PASSWORD,
-            dsn=config.ORACLE_DSN
-        )
-        return connection
+        pool = get_repository().pool
+        conn = pool.acquire(primary=read_your_writes and wrote_recently())
     except Exception as e:
         st.error(f"Database connection failed: {e}")
-        return None
+        yield None
+        return
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+@st.cache_resource
+def get_reference_data():
+    """Shared snapshot of users/groups/sessions/counselors for dropdowns"""
+    return refdata.ReferenceData()
+
+@st.cache_resource
+def get_kpi_cache():
+    """KPI values shared by all sessions for a few seconds (see kpi.py)"""
+    return get_repository().kpi_cache()
+
+def kpi_value(kpis, name, approximate):
+    """Tile text for a count, prefixed with ~ when it came from table statistics"""
+    value = kpis[name]
+    if value is None:
+        return "N/A"
+    if approximate and kpi.METRICS[name][0] in get_kpi_cache().approximate_tables:
+        return f"~{value:,}"
+    return value
+
+@st.cache_resource
+def get_match_index():
+    """Top-k matches per user shared by all sessions (see match_index.py)"""
+    index = get_repository().match_index()
+    index.refresh()  # build in the background from the first page load
+    return index
+
+@st.cache_resource
+def get_metrics_server():
+    """Prometheus /metrics endpoint, started once per process (see tracing.py)"""
+    return tracing.start_metrics_server()
+
+@st.cache_resource
+def get_write_queue():
+    """Group-commit writer shared by all sessions (see write_queue.py); None when disabled"""
+    return get_repository().write_queue() if write_queue.WRITE_QUEUE_ENABLED else None
+
+def submit_write(conn, kind, success_message, **args):
+    """Run a repository write through the write queue (or directly) and report it
+
+    Raises the write's database error like a direct call. If the commit takes
+    longer than WRITE_QUEUE_WAIT_S the outcome is reported on a later rerun.
+    """
+    note_write()
+    queue = get_write_queue()
+    if queue is None:
+        getattr(get_repository(), kind)(conn, **args)
+        st.success(success_message)
+        return
+    future = queue.submit(kind, **args)
+    try:
+        future.result(timeout=write_queue.WRITE_QUEUE_WAIT_S)
+        st.success(success_message)
+    except WriteTimeout:
+        st.session_state.setdefault("pending_writes", []).append((future, success_message))
+        st.info("⏳ Saved - it will be written to the database as soon as it is reachable.")
+
+def note_write():
+    """Start this session's read-your-writes window (see get_connection)"""
+    st.session_state["last_write_at"] = time.monotonic()
+
+def wrote_recently():
+    return time.monotonic() - st.session_state.get("last_write_at", float("-inf")) < db.READ_YOUR_WRITES_S
+
+@st.cache_resource
+def get_section_executor():
+    """Worker threads that run the independent queries of a page in parallel, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=ui.SECTION_WORKERS, thread_name_prefix="section")
+
+def section_loader(read_your_writes=False):
+    """ui.SectionLoader on the app's pool (see get_connection for read_your_writes)"""
+    return ui.SectionLoader(get_section_executor(), get_repository().pool,
+                            primary=read_your_writes and wrote_recently())
+
+def lookup_options(kind, conn):
+    """Dropdown options {"Name (ID: n)": n}; conn is only used when a refresh is due"""
+    return get_reference_data().options(kind, conn)
 
 # =============================================
 # PAGE CONFIGURATION
@@ -41,6 +141,20 @@ menu = st.sidebar.radio(
     ["Home", "User Management", "Mood Tracking", "Support Groups", 
      "Counseling Sessions", "Peer Matching", "Resources", "Analytics"]
 )
+trace_run = tracing.start_run(menu)
+get_metrics_server()
+get_match_index()
+
+# Outcome of writes that were still queued when their page was shown
+pending_writes = []
+for future, message in st.session_state.get("pending_writes", []):
+    if not future.done():
+        pending_writes.append((future, message))
+    elif future.exception() is None:
+        st.toast(message)
+    else:
+        st.toast(f"❌ Queued write failed: {future.exception()}")
+st.session_state["pending_writes"] = pending_writes
 
 # =============================================
 # HOME PAGE
@@ -62,39 +176,39 @@ if menu == "Home":
     
     st.markdown("---")
     
-    # Display platform statistics
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        
+    # Platform statistics (one cached round trip) and the mood summary load in parallel
+    sections = section_loader(read_your_writes=True)
+    kpi_cache, repo = get_kpi_cache(), get_repository()
+    
+    def show_home_kpis(result):
+        kpis, approximate = result
         col1, col2, col3, col4 = st.columns(4)
-        
-        try:
-            # Total Users
-            cursor.execute("SELECT COUNT(*) FROM AppUser")
-            total_users = cursor.fetchone()[0]
-            col1.metric("Total Users", total_users)
-            
-            # Total Groups
-            cursor.execute("SELECT COUNT(*) FROM SupportGroup")
-            total_groups = cursor.fetchone()[0]
-            col2.metric("Support Groups", total_groups)
-            
-            # Total Sessions
-            cursor.execute("SELECT COUNT(*) FROM CounselingSession")
-            total_sessions = cursor.fetchone()[0]
-            col3.metric("Counseling Sessions", total_sessions)
-            
-            # Average Rating
-            cursor.execute("SELECT ROUND(AVG(rating), 2) FROM UserSession WHERE rating IS NOT NULL")
-            avg_rating = cursor.fetchone()[0]
-            col4.metric("Avg Session Rating", f"{avg_rating}/5" if avg_rating else "N/A")
-            
-        except Exception as e:
-            st.error(f"Error fetching statistics: {e}")
-        finally:
-            cursor.close()
-            conn.close()
+        col1.metric("Total Users", kpi_value(kpis, "users", approximate))
+        col2.metric("Support Groups", kpi_value(kpis, "groups", approximate))
+        col3.metric("Counseling Sessions", kpi_value(kpis, "sessions", approximate))
+        avg_rating = kpis["avg_rating"]
+        col4.metric("Avg Session Rating", f"{avg_rating}/5" if avg_rating else "N/A")
+        if approximate:
+            st.caption("~ Approximate counts from optimizer statistics; exact values are loading.")
+    
+    def show_mood_summary(result):
+        totals, _ = result
+        if totals:
+            ui.mood_metrics(totals)
+        else:
+            st.info("No mood logs yet - log one under Mood Tracking.")
+    
+    sections.add(st.empty(), lambda conn: kpi_cache.get(kpi.HOME_METRICS, conn), show_home_kpis)
+    
+    # Per-user mood summary (MoodRollup point lookup)
+    st.markdown("---")
+    st.subheader("🙂 Your Mood Summary")
+    with get_connection(read_your_writes=True) as conn:
+        if conn:
+            user_id = ui.user_picker(conn, "home_user", "Show summary for")
+            if user_id is not None:
+                sections.add(st.empty(), lambda conn: repo.mood_summary(conn, user_id), show_mood_summary)
+    sections.render()
 
 # =============================================
 # USER MANAGEMENT PAGE
@@ -102,10 +216,10 @@ if menu == "Home":
 elif menu == "User Management":
     st.title("👤 User Management")
     
-    tab1, tab2, tab3 = st.tabs(["Register New User", "View Users", "Update Profile"])
+    tab = ui.lazy_tabs("User Management", ["Register New User", "View Users", "Update Profile"])
     
     # TAB 1: Register New User
-    with tab1:
+    if tab == "Register New User":
         st.subheader("Create New Account")
         
         with st.form("register_form"):
@@ -118,74 +232,52 @@ elif menu == "User Management":
             
             with col2:
                 password = st.text_input("Password", type="password")
-                privacy = st.selectbox("Privacy Setting", ["public", "private", "friends"])
+                privacy = st.selectbox("Privacy Setting", repository.PRIVACY_SETTINGS)
             
             submitted = st.form_submit_button("Register User")
             
             if submitted:
-                conn = get_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    try:
-                        cursor.execute(
-                            "INSERT INTO AppUser VALUES (:1, :2, :3, :4, :5)",
-                            (user_id, username, email, password, privacy)
-                        )
-                        conn.commit()
-                        st.success(f"✅ User '{username}' registered successfully!")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-                    finally:
-                        cursor.close()
-                        conn.close()
+                with get_connection() as conn:
+                    if conn:
+                        try:
+                            note_write()
+                            get_repository().register_user(conn, user_id, username, email, password, privacy)
+                            get_reference_data().upsert("users", user_id, username)
+                            st.success(f"✅ User '{username}' registered successfully!")
+                        except Exception as e:
+                            st.error(f"Error: {e}")
     
     # TAB 2: View Users
-    with tab2:
+    if tab == "View Users":
         st.subheader("All Registered Users")
         
-        conn = get_connection()
-        if conn:
-            try:
-                df = pd.read_sql("SELECT userID, userName, email, privacySetting FROM AppUser ORDER BY userID", conn)
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                conn.close()
+        with get_connection() as conn:
+            if conn:
+                try:
+                    ui.paginated_grid(conn, pagination.USERS_GRID, read=get_repository().read_frame)
+                except Exception as e:
+                    st.error(f"Error: {e}")
     
     # TAB 3: Update Profile
-    with tab3:
+    if tab == "Update Profile":
         st.subheader("Update User Privacy Settings")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
+        with get_connection() as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "profile_user")
             
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
-            
-            with st.form("update_form"):
-                selected_user = st.selectbox("Select User", list(user_options.keys()))
-                new_privacy = st.selectbox("New Privacy Setting", ["public", "private", "friends"])
+                with st.form("update_form"):
+                    new_privacy = st.selectbox("New Privacy Setting", repository.PRIVACY_SETTINGS)
                 
-                update_submitted = st.form_submit_button("Update Privacy")
+                    update_submitted = st.form_submit_button("Update Privacy", disabled=user_id is None)
                 
-                if update_submitted:
-                    try:
-                        user_id = user_options[selected_user]
-                        cursor.execute(
-                            "UPDATE AppUser SET privacySetting = :1 WHERE userID = :2",
-                            (new_privacy, user_id)
-                        )
-                        conn.commit()
-                        st.success(f"✅ Privacy setting updated to '{new_privacy}'")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                    if update_submitted:
+                        try:
+                            submit_write(conn, "update_privacy", f"✅ Privacy setting updated to '{new_privacy}'",
+                                         user_id=user_id, privacy=new_privacy)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
 
 # =============================================
 # MOOD TRACKING PAGE
@@ -193,125 +285,97 @@ elif menu == "User Management":
 elif menu == "Mood Tracking":
     st.title("📊 Mood Tracking")
     
-    tab1, tab2, tab3 = st.tabs(["Log Mood", "View History", "Mood Analytics"])
+    tab = ui.lazy_tabs("Mood Tracking", ["Log Mood", "View History", "Mood Analytics"])
     
     # TAB 1: Log Mood
-    with tab1:
+    if tab == "Log Mood":
         st.subheader("Log Your Daily Mood")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
-            
-            with st.form("mood_form"):
-                selected_user = st.selectbox("Select User", list(user_options.keys()))
-                mood_date = st.date_input("Date", date.today())
-                mood_level = st.select_slider(
-                    "How are you feeling?",
-                    options=["Sad", "Anxious", "Stressed", "Neutral", "Calm", "Happy"]
-                )
+        with get_connection() as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "mood_user")
+            
+                with st.form("mood_form"):
+                    mood_date = st.date_input("Date", date.today())
+                    mood_level = st.select_slider(
+                        "How are you feeling?",
+                        options=repository.MOOD_LEVELS
+                    )
                 
-                mood_submitted = st.form_submit_button("Log Mood")
+                    mood_submitted = st.form_submit_button("Log Mood", disabled=user_id is None)
                 
-                if mood_submitted:
-                    try:
-                        user_id = user_options[selected_user]
-                        cursor.execute(
-                            "INSERT INTO MoodLog VALUES (:1, TO_DATE(:2, 'YYYY-MM-DD'), :3)",
-                            (user_id, mood_date.strftime('%Y-%m-%d'), mood_level)
-                        )
-                        conn.commit()
-                        st.success(f"✅ Mood '{mood_level}' logged for {mood_date}")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                    if mood_submitted:
+                        try:
+                            submit_write(conn, "log_mood", f"✅ Mood '{mood_level}' logged for {mood_date}",
+                                         user_id=user_id, log_date=mood_date, mood=mood_level)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
     
     # TAB 2: View History
-    with tab2:
+    if tab == "View History":
         st.subheader("Mood History")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
+        with get_connection(read_your_writes=True) as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "history_user", "Select User to View")
             
-            selected_user = st.selectbox("Select User to View", list(user_options.keys()))
-            
-            if st.button("Load Mood History"):
-                try:
-                    user_id = user_options[selected_user]
-                    query = """
-                        SELECT logDate, moodLevel 
-                        FROM MoodLog 
-                        WHERE userID = :1 
-                        ORDER BY logDate DESC
-                    """
-                    df = pd.read_sql(query, conn, params=[user_id])
+                if user_id is not None:
+                    try:
+                        first, last = get_repository().mood_range(conn, user_id)
                     
-                    if not df.empty:
-                        st.dataframe(df, use_container_width=True)
+                        if first is not None:
+                            # Mood timeline, bucketed in the database
+                            date_range = st.date_input("Date range", (first, last), min_value=first,
+                                                       max_value=last, key=f"history_range_{user_id}")
+                            if len(date_range) == 2:  # only the start is set while picking
+                                bucket, counts = get_repository().mood_timeline(conn, user_id, *date_range)
+                                st.caption(f"Mood logs per {bucket}")
+                                st.bar_chart(counts)
                         
-                        # Mood chart
-                        st.line_chart(df.set_index('LOGDATE')['MOODLEVEL'].value_counts())
-                    else:
-                        st.info("No mood logs found for this user.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                            # Log entries, newest first, one page at a time
+                            ui.paginated_grid(conn, pagination.MOOD_HISTORY_GRID, fixed_filters={"User": user_id},
+                                              read=get_repository().read_frame)
+                        else:
+                            st.info("No mood logs found for this user.")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
     
     # TAB 3: Mood Analytics
-    with tab3:
+    if tab == "Mood Analytics":
         st.subheader("Mood Statistics")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
-            
-            selected_user = st.selectbox("Select User for Analytics", list(user_options.keys()))
+        with get_connection(read_your_writes=True) as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "analytics_user", "Select User for Analytics")
             
-            if st.button("Generate Analytics"):
-                try:
-                    user_id = user_options[selected_user]
-                    query = """
-                        SELECT moodLevel, COUNT(*) as frequency
-                        FROM MoodLog
-                        WHERE userID = :1
-                        GROUP BY moodLevel
-                        ORDER BY frequency DESC
-                    """
-                    df = pd.read_sql(query, conn, params=[user_id])
+                if user_id is not None:
+                    try:
+                        # Statistics come precomputed from MoodRollup, all time or per month
+                        periods = [aggregates.ALL_TIME] + get_repository().mood_periods(conn, user_id)
+                        period = st.selectbox("Period", periods, key=f"analytics_period_{user_id}",
+                                              format_func=lambda p: "All time" if p == aggregates.ALL_TIME else p)
+                        totals, df = get_repository().mood_summary(conn, user_id, period)
                     
-                    if not df.empty:
-                        st.bar_chart(df.set_index('MOODLEVEL'))
+                        if totals:
+                            ui.mood_metrics(totals)
+                            st.bar_chart(df.set_index('MOODLEVEL')[['FREQUENCY']])
+                        else:
+                            st.info("No mood data available.")
                         
-                        # Most common mood
-                        most_common = df.iloc[0]
-                        st.metric("Most Common Mood", most_common['MOODLEVEL'], f"{most_common['FREQUENCY']} times")
-                    else:
-                        st.info("No mood data available.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                        # Users who logged the same moods on the same days (nightly batch)
+                        st.markdown("#### 🫂 People Who Felt Like You")
+                        similar = get_repository().similar_moods(conn, user_id)
+                        if not similar.empty:
+                            window_end = pd.Timestamp(similar['WINDOWEND'].iloc[0]).date()
+                            st.caption(f"Days with the same mood in the recent logs up to {window_end}")
+                            st.dataframe(similar.drop(columns=['WINDOWEND']), use_container_width=True)
+                        else:
+                            st.info("No similar users found yet (run similar_moods.py).")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
 # =============================================
 # SUPPORT GROUPS PAGE
@@ -319,107 +383,63 @@ elif menu == "Mood Tracking":
 elif menu == "Support Groups":
     st.title("👥 Support Groups")
     
-    tab1, tab2, tab3 = st.tabs(["View Groups", "Join Group", "My Groups"])
+    tab = ui.lazy_tabs("Support Groups", ["View Groups", "Join Group", "My Groups"])
     
     # TAB 1: View All Groups
-    with tab1:
+    if tab == "View Groups":
         st.subheader("Available Support Groups")
         
-        conn = get_connection()
-        if conn:
-            try:
-                query = """
-                    SELECT 
-                        sg.groupID,
-                        sg.groupName,
-                        sg.focusArea,
-                        COUNT(ug.userID) as member_count
-                    FROM SupportGroup sg
-                    LEFT JOIN UserGroup ug ON sg.groupID = ug.groupID
-                    GROUP BY sg.groupID, sg.groupName, sg.focusArea
-                    ORDER BY member_count DESC
-                """
-                df = pd.read_sql(query, conn)
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                conn.close()
+        with get_connection() as conn:
+            if conn:
+                try:
+                    df = get_repository().groups(conn)
+                    st.dataframe(df, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error: {e}")
     
     # TAB 2: Join Group
-    with tab2:
+    if tab == "Join Group":
         st.subheader("Join a Support Group")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get users and groups
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
+        with get_connection() as conn:
+            if conn:
+                # Pick a user (type-ahead search) and load the group list
+                user_id = ui.user_picker(conn, "join_user")
             
-            cursor.execute("SELECT groupID, groupName FROM SupportGroup ORDER BY groupID")
-            groups = cursor.fetchall()
-            group_options = {f"{g[1]} (ID: {g[0]})": g[0] for g in groups}
+                group_options = lookup_options("groups", conn)
             
-            with st.form("join_group_form"):
-                selected_user = st.selectbox("Select User", list(user_options.keys()))
-                selected_group = st.selectbox("Select Group", list(group_options.keys()))
+                with st.form("join_group_form"):
+                    selected_group = st.selectbox("Select Group", list(group_options.keys()))
                 
-                join_submitted = st.form_submit_button("Join Group")
+                    join_submitted = st.form_submit_button("Join Group", disabled=user_id is None)
                 
-                if join_submitted:
-                    try:
-                        user_id = user_options[selected_user]
-                        group_id = group_options[selected_group]
-                        cursor.execute(
-                            "INSERT INTO UserGroup VALUES (:1, :2)",
-                            (user_id, group_id)
-                        )
-                        conn.commit()
-                        st.success(f"✅ Successfully joined group!")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                    if join_submitted:
+                        try:
+                            group_id = group_options[selected_group]
+                            submit_write(conn, "join_group", "✅ Successfully joined group!",
+                                         user_id=user_id, group_id=group_id)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
     
     # TAB 3: My Groups
-    with tab3:
+    if tab == "My Groups":
         st.subheader("My Support Groups")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
-            
-            selected_user = st.selectbox("Select User", list(user_options.keys()))
+        with get_connection(read_your_writes=True) as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "mygroups_user")
             
-            if st.button("View My Groups"):
-                try:
-                    user_id = user_options[selected_user]
-                    query = """
-                        SELECT sg.groupID, sg.groupName, sg.focusArea
-                        FROM SupportGroup sg
-                        JOIN UserGroup ug ON sg.groupID = ug.groupID
-                        WHERE ug.userID = :1
-                    """
-                    df = pd.read_sql(query, conn, params=[user_id])
+                if st.button("View My Groups", disabled=user_id is None):
+                    try:
+                        df = get_repository().user_groups(conn, user_id)
                     
-                    if not df.empty:
-                        st.dataframe(df, use_container_width=True)
-                    else:
-                        st.info("You haven't joined any groups yet.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                        if not df.empty:
+                            st.dataframe(df, use_container_width=True)
+                        else:
+                            st.info("You haven't joined any groups yet.")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
 # =============================================
 # COUNSELING SESSIONS PAGE
@@ -427,126 +447,74 @@ elif menu == "Support Groups":
 elif menu == "Counseling Sessions":
     st.title("💬 Counseling Sessions")
     
-    tab1, tab2, tab3 = st.tabs(["View Sessions", "Attend Session", "Rate Session"])
+    tab = ui.lazy_tabs("Counseling Sessions", ["View Sessions", "Attend Session", "Rate Session"])
     
     # TAB 1: View Sessions
-    with tab1:
+    if tab == "View Sessions":
         st.subheader("All Counseling Sessions")
         
-        conn = get_connection()
-        if conn:
-            try:
-                query = """
-                    SELECT 
-                        cs.sessionID,
-                        cs.sessionDate,
-                        cs.topic,
-                        cs.sessionMode,
-                        u.userName as counselor,
-                        sg.groupName
-                    FROM CounselingSession cs
-                    JOIN Counselor c ON cs.counselorID = c.userID
-                    JOIN AppUser u ON c.userID = u.userID
-                    JOIN SupportGroup sg ON cs.groupID = sg.groupID
-                    ORDER BY cs.sessionDate DESC
-                """
-                df = pd.read_sql(query, conn)
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                conn.close()
+        with get_connection() as conn:
+            if conn:
+                try:
+                    ui.paginated_grid(conn, pagination.SESSIONS_GRID, read=get_repository().read_frame)
+                except Exception as e:
+                    st.error(f"Error: {e}")
     
     # TAB 2: Attend Session
-    with tab2:
+    if tab == "Attend Session":
         st.subheader("Register for a Session")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get users and sessions
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
+        with get_connection() as conn:
+            if conn:
+                # Pick a user (type-ahead search) and load the session list
+                user_id = ui.user_picker(conn, "attend_user")
             
-            cursor.execute("SELECT sessionID, topic FROM CounselingSession ORDER BY sessionID")
-            sessions = cursor.fetchall()
-            session_options = {f"{s[1]} (ID: {s[0]})": s[0] for s in sessions}
+                session_options = lookup_options("sessions", conn)
             
-            with st.form("attend_session_form"):
-                selected_user = st.selectbox("Select User", list(user_options.keys()))
-                selected_session = st.selectbox("Select Session", list(session_options.keys()))
+                with st.form("attend_session_form"):
+                    selected_session = st.selectbox("Select Session", list(session_options.keys()))
                 
-                attend_submitted = st.form_submit_button("Register for Session")
+                    attend_submitted = st.form_submit_button("Register for Session", disabled=user_id is None)
                 
-                if attend_submitted:
-                    try:
-                        user_id = user_options[selected_user]
-                        session_id = session_options[selected_session]
-                        cursor.execute(
-                            "INSERT INTO UserSession (userID, sessionID, rating) VALUES (:1, :2, NULL)",
-                            (user_id, session_id)
-                        )
-                        conn.commit()
-                        st.success(f"✅ Registered for session!")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                    if attend_submitted:
+                        try:
+                            session_id = session_options[selected_session]
+                            submit_write(conn, "register_session", "✅ Registered for session!",
+                                         user_id=user_id, session_id=session_id)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
     
     # TAB 3: Rate Session
-    with tab3:
+    if tab == "Rate Session":
         st.subheader("Rate Your Session")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get users
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
+        with get_connection(read_your_writes=True) as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "rate_user")
             
-            selected_user = st.selectbox("Select User", list(user_options.keys()))
-            user_id = user_options[selected_user]
+                if user_id is not None:
+                    # Get sessions attended by this user
+                    sessions = get_repository().user_sessions(conn, user_id)
             
-            # Get sessions attended by this user
-            cursor.execute("""
-                SELECT cs.sessionID, cs.topic, us.rating
-                FROM CounselingSession cs
-                JOIN UserSession us ON cs.sessionID = us.sessionID
-                WHERE us.userID = :1
-            """, [user_id])
-            
-            sessions = cursor.fetchall()
-            
-            if sessions:
-                session_options = {f"{s[1]} (ID: {s[0]}) - Current: {s[2] if s[2] else 'Not Rated'}": s[0] for s in sessions}
+                    if sessions:
+                        session_options = {f"{s[1]} (ID: {s[0]}) - Current: {s[2] if s[2] else 'Not Rated'}": s[0] for s in sessions}
                 
-                with st.form("rate_session_form"):
-                    selected_session = st.selectbox("Select Session to Rate", list(session_options.keys()))
-                    rating = st.slider("Rating", 1, 5, 5)
+                        with st.form("rate_session_form"):
+                            selected_session = st.selectbox("Select Session to Rate", list(session_options.keys()))
+                            rating = st.slider("Rating", 1, 5, 5)
                     
-                    rate_submitted = st.form_submit_button("Submit Rating")
+                            rate_submitted = st.form_submit_button("Submit Rating")
                     
-                    if rate_submitted:
-                        try:
-                            session_id = session_options[selected_session]
-                            cursor.execute(
-                                "UPDATE UserSession SET rating = :1 WHERE userID = :2 AND sessionID = :3",
-                                (rating, user_id, session_id)
-                            )
-                            conn.commit()
-                            st.success(f"✅ Session rated {rating}/5!")
-                        except Exception as e:
-                            st.error(f"Error: {e}")
-            else:
-                st.info("You haven't attended any sessions yet.")
-            
-            cursor.close()
-            conn.close()
+                            if rate_submitted:
+                                try:
+                                    session_id = session_options[selected_session]
+                                    submit_write(conn, "rate_session", f"✅ Session rated {rating}/5!",
+                                                 user_id=user_id, session_id=session_id, rating=rating)
+                                except Exception as e:
+                                    st.error(f"Error: {e}")
+                    else:
+                        st.info("You haven't attended any sessions yet.")
 
 # =============================================
 # PEER MATCHING PAGE
@@ -554,83 +522,45 @@ elif menu == "Counseling Sessions":
 elif menu == "Peer Matching":
     st.title("🤝 Peer Matching")
     
-    tab1, tab2 = st.tabs(["Find Matches", "View My Matches"])
+    tab = ui.lazy_tabs("Peer Matching", ["Find Matches", "View My Matches"])
     
     # TAB 1: Find Matches
-    with tab1:
+    if tab == "Find Matches":
         st.subheader("Find Compatible Peers")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
+        with get_connection() as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "match_user")
             
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
-            
-            selected_user = st.selectbox("Select User", list(user_options.keys()))
-            
-            if st.button("Find My Matches"):
-                try:
-                    user_id = user_options[selected_user]
-                    query = """
-                        SELECT 
-                            CASE 
-                                WHEN um.user1ID = :1 THEN um.user2ID
-                                ELSE um.user1ID
-                            END as matched_userID,
-                            u.userName,
-                            um.compatibilityScore
-                        FROM UserMatch um
-                        JOIN AppUser u ON (
-                            CASE 
-                                WHEN um.user1ID = :1 THEN um.user2ID
-                                ELSE um.user1ID
-                            END = u.userID
-                        )
-                        WHERE :1 IN (um.user1ID, um.user2ID)
-                        ORDER BY um.compatibilityScore DESC
-                    """
-                    df = pd.read_sql(query, conn, params=[user_id, user_id, user_id])
+                if st.button("Find My Matches", disabled=user_id is None):
+                    try:
+                        df = get_match_index().lookup(user_id)
+                        if df is None:
+                            # Index still loading: ask the database directly
+                            df = get_repository().user_matches(conn, user_id)
                     
-                    if not df.empty:
-                        st.dataframe(df, use_container_width=True)
+                        if not df.empty:
+                            st.dataframe(df, use_container_width=True)
                         
-                        # Best match
-                        best_match = df.iloc[0]
-                        st.success(f"🌟 Best Match: {best_match['USERNAME']} ({best_match['COMPATIBILITYSCORE']}% compatible)")
-                    else:
-                        st.info("No matches found yet.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                            # Best match
+                            best_match = df.iloc[0]
+                            st.success(f"🌟 Best Match: {best_match['USERNAME']} ({best_match['COMPATIBILITYSCORE']}% compatible)")
+                        else:
+                            st.info("No matches found yet.")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
     
     # TAB 2: View Matches
-    with tab2:
+    if tab == "View My Matches":
         st.subheader("All Peer Matches")
         
-        conn = get_connection()
-        if conn:
-            try:
-                query = """
-                    SELECT 
-                        u1.userName as user1,
-                        u2.userName as user2,
-                        um.compatibilityScore
-                    FROM UserMatch um
-                    JOIN AppUser u1 ON um.user1ID = u1.userID
-                    JOIN AppUser u2 ON um.user2ID = u2.userID
-                    ORDER BY um.compatibilityScore DESC
-                """
-                df = pd.read_sql(query, conn)
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                conn.close()
+        with get_connection() as conn:
+            if conn:
+                try:
+                    ui.paginated_grid(conn, pagination.MATCHES_GRID, read=get_repository().read_frame)
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
 # =============================================
 # RESOURCES PAGE
@@ -638,75 +568,39 @@ elif menu == "Peer Matching":
 elif menu == "Resources":
     st.title("📚 Learning Resources")
     
-    tab1, tab2 = st.tabs(["View Resources", "My Resources"])
+    tab = ui.lazy_tabs("Resources", ["View Resources", "My Resources"])
     
     # TAB 1: View All Resources
-    with tab1:
+    if tab == "View Resources":
         st.subheader("Available Learning Resources")
         
-        conn = get_connection()
-        if conn:
-            try:
-                query = """
-                    SELECT 
-                        lr.resourceID,
-                        lr.title,
-                        lr.resourceType,
-                        COUNT(gr.groupID) as used_by_groups
-                    FROM LearningResource lr
-                    LEFT JOIN GroupResource gr ON lr.resourceID = gr.resourceID
-                    GROUP BY lr.resourceID, lr.title, lr.resourceType
-                    ORDER BY used_by_groups DESC
-                """
-                df = pd.read_sql(query, conn)
-                st.dataframe(df, use_container_width=True)
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                conn.close()
+        with get_connection() as conn:
+            if conn:
+                try:
+                    df = get_repository().resources(conn)
+                    st.dataframe(df, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error: {e}")
     
     # TAB 2: My Resources
-    with tab2:
+    if tab == "My Resources":
         st.subheader("Resources from My Groups")
         
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            
-            # Get user list
-            cursor.execute("SELECT userID, userName FROM AppUser ORDER BY userID")
-            users = cursor.fetchall()
-            user_options = {f"{u[1]} (ID: {u[0]})": u[0] for u in users}
-            
-            selected_user = st.selectbox("Select User", list(user_options.keys()))
+        with get_connection() as conn:
+            if conn:
+                # Pick a user (type-ahead search)
+                user_id = ui.user_picker(conn, "resources_user")
             
-            if st.button("Load My Resources"):
-                try:
-                    user_id = user_options[selected_user]
-                    query = """
-                        SELECT DISTINCT
-                            lr.resourceID,
-                            lr.title,
-                            lr.resourceType,
-                            sg.groupName
-                        FROM LearningResource lr
-                        JOIN GroupResource gr ON lr.resourceID = gr.resourceID
-                        JOIN SupportGroup sg ON gr.groupID = sg.groupID
-                        JOIN UserGroup ug ON sg.groupID = ug.groupID
-                        WHERE ug.userID = :1
-                        ORDER BY sg.groupName, lr.title
-                    """
-                    df = pd.read_sql(query, conn, params=[user_id])
+                if st.button("Load My Resources", disabled=user_id is None):
+                    try:
+                        df = get_repository().user_resources(conn, user_id)
                     
-                    if not df.empty:
-                        st.dataframe(df, use_container_width=True)
-                    else:
-                        st.info("Join a support group to access resources.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
-            
-            cursor.close()
-            conn.close()
+                        if not df.empty:
+                            st.dataframe(df, use_container_width=True)
+                        else:
+                            st.info("Join a support group to access resources.")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
 # =============================================
 # ANALYTICS PAGE
@@ -714,84 +608,99 @@ elif menu == "Resources":
 elif menu == "Analytics":
     st.title("📈 Platform Analytics")
     
-    conn = get_connection()
-    if conn:
-        cursor = conn.cursor()
-        
-        # Platform Statistics
-        st.subheader("Platform Overview")
+    # The three sections are independent: query them in parallel, show each as it lands
+    sections = section_loader()
+    kpi_cache, repo = get_kpi_cache(), get_repository()
+    
+    def show_analytics_kpis(result):
+        kpis, approximate = result
         col1, col2, col3, col4 = st.columns(4)
-        
-        try:
-            # Total Users
-            cursor.execute("SELECT COUNT(*) FROM AppUser")
-            col1.metric("Total Users", cursor.fetchone()[0])
-            
-            # Total Counselors
-            cursor.execute("SELECT COUNT(*) FROM Counselor")
-            col2.metric("Counselors", cursor.fetchone()[0])
-            
-            # Total Mood Logs
-            cursor.execute("SELECT COUNT(*) FROM MoodLog")
-            col3.metric("Mood Logs", cursor.fetchone()[0])
-            
-            # Avg Rating
-            cursor.execute("SELECT ROUND(AVG(rating), 2) FROM UserSession WHERE rating IS NOT NULL")
-            avg = cursor.fetchone()[0]
-            col4.metric("Avg Rating", f"{avg}/5" if avg else "N/A")
-            
-        except Exception as e:
-            st.error(f"Error: {e}")
-        
-        st.markdown("---")
-        
-        # Most Active Groups
-        st.subheader("Most Active Support Groups")
-        try:
-            query = """
-                SELECT 
-                    sg.groupName,
-                    sg.focusArea,
-                    COUNT(DISTINCT ug.userID) as members,
-                    COUNT(DISTINCT cs.sessionID) as sessions
-                FROM SupportGroup sg
-                LEFT JOIN UserGroup ug ON sg.groupID = ug.groupID
-                LEFT JOIN CounselingSession cs ON sg.groupID = cs.groupID
-                GROUP BY sg.groupName, sg.focusArea
-                ORDER BY members DESC
-                FETCH FIRST 5 ROWS ONLY
-            """
-            df = pd.read_sql(query, conn)
-            st.dataframe(df, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error: {e}")
-        
-        st.markdown("---")
-        
-        # Top Counselors
-        st.subheader("Top Rated Counselors")
-        try:
-            query = """
-                SELECT 
-                    u.userName,
-                    c.specialization,
-                    COUNT(cs.sessionID) as sessions,
-                    ROUND(AVG(us.rating), 2) as avg_rating
-                FROM Counselor c
-                JOIN AppUser u ON c.userID = u.userID
-                LEFT JOIN CounselingSession cs ON c.userID = cs.counselorID
-                LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
-                GROUP BY u.userName, c.specialization
-                ORDER BY avg_rating DESC
-                FETCH FIRST 5 ROWS ONLY
-            """
-            df = pd.read_sql(query, conn)
-            st.dataframe(df, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error: {e}")
-        
-        cursor.close()
-        conn.close()
+        col1.metric("Total Users", kpi_value(kpis, "users", approximate))
+        col2.metric("Counselors", kpi_value(kpis, "counselors", approximate))
+        col3.metric("Mood Logs", kpi_value(kpis, "mood_logs", approximate))
+        avg = kpis["avg_rating"]
+        col4.metric("Avg Rating", f"{avg}/5" if avg else "N/A")
+        if approximate:
+            st.caption("~ Approximate counts from optimizer statistics; exact values are loading.")
+    
+    def show_table(df):
+        st.dataframe(df, use_container_width=True)
+    
+    # Platform Statistics
+    st.subheader("Platform Overview")
+    sections.add(st.empty(), lambda conn: kpi_cache.get(kpi.ANALYTICS_METRICS, conn), show_analytics_kpis)
+    
+    st.markdown("---")
+    
+    # Most Active Groups (precomputed in GroupActivity)
+    st.subheader("Most Active Support Groups")
+    sections.add(st.empty(), repo.top_groups, show_table)
+    
+    st.markdown("---")
+    
+    # Top Counselors (precomputed in CounselorActivity)
+    st.subheader("Top Rated Counselors")
+    sections.add(st.empty(), repo.top_counselors, show_table)
+    sections.render()
+    
+    st.markdown("---")
+    
+    # Extracts for the data team (full tables: python export.py)
+    st.subheader("📦 Export Data")
+    with get_connection() as conn:
+        if conn:
+            try:
+                ui.export_panel(conn)
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+# =============================================
+# CONNECTION POOL STATISTICS
+# =============================================
+with st.sidebar.expander("Connection Pool"):
+    try:
+        stats = get_repository().pool.stats()
+        st.caption(f"Busy {stats['busy']} / Open {stats['open']} (max {stats['max']})")
+        st.caption(f"Avg wait {stats['avg_wait_ms']} ms · Max wait {stats['max_wait_ms']} ms")
+        st.caption(f"Acquires {stats['acquires']} · Timeouts/failures {stats['acquire_failures']}")
+        for replica in stats.get("replicas", []):
+            if replica["up"]:
+                st.caption(f"Replica {replica['dsn']}: {replica['reads']} reads · "
+                           f"Busy {replica.get('busy', 0)} / Open {replica.get('open', 0)}")
+            else:
+                st.caption(f"Replica {replica['dsn']} down, reads on the primary: {replica['error']}")
+        if stats.get("replicas"):
+            st.caption(f"Reads on the primary (failover) {stats['primary_reads']}")
+    except Exception as e:
+        st.caption(f"Pool unavailable: {e}")
+
+# =============================================
+# QUERY CACHE STATISTICS
+# =============================================
+if get_repository().cache is not None:
+    with st.sidebar.expander("Query Cache"):
+        stats = get_repository().cache.stats()
+        hit_ratio = f"{stats['hit_ratio']:.0%}" if stats["hit_ratio"] is not None else "-"
+        st.caption(f"Hits {stats['hits']} · Misses {stats['misses']} · Hit ratio {hit_ratio}")
+        st.caption(f"Entries {stats['entries']} / {stats['max_entries']} · {stats['mb']} / {stats['max_mb']} MB")
+        st.caption(f"Evicted {stats['evictions']} · Expired {stats['expirations']} · "
+                   f"Invalidated {stats['invalidations']} · Not stored {stats['uncached']}")
+
+# =============================================
+# WRITE QUEUE STATISTICS
+# =============================================
+if get_write_queue() is not None:
+    with st.sidebar.expander("Write Queue"):
+        stats = get_write_queue().stats()
+        st.caption(f"Pending {stats['pending']} · Batches {stats['batches']} · Replayed {stats['replayed']}")
+        st.caption(f"Committed {stats['committed']} · Rejected {stats['failed']} · Retries {stats['retries']}")
+        if stats["last_error"]:
+            st.caption(f"Last database error: {stats['last_error']}")
+
+# =============================================
+# DB TRACE
+# =============================================
+ui.trace_panel(trace_run)
 
 # =============================================
 # FOOTER
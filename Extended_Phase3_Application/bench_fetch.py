@@ -0,0 +1,139 @@
+"""
+MindConnect+ Fetch Path Benchmark
+Compares pd.read_sql, the tuned cursor path and the Arrow path (fetch.py)
+on the app's biggest grids: rows/sec and peak RSS per mode
+
+Each (query, mode) pair runs in its own Python process so peak RSS is not
+polluted by earlier runs.
+
+Usage:
+    python bench_fetch.py                  # all queries, all modes, 3 runs each
+    python bench_fetch.py --runs 5 --query view_users
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+# Same statements as the View Users / View Sessions / All Peer Matches tabs
+QUERIES = {
+    "view_users": "SELECT userID, userName, email, privacySetting FROM AppUser ORDER BY userID",
+    "view_sessions": """
+        SELECT
+            cs.sessionID,
+            cs.sessionDate,
+            cs.topic,
+            cs.sessionMode,
+            u.userName as counselor,
+            sg.groupName
+        FROM CounselingSession cs
+        JOIN Counselor c ON cs.counselorID = c.userID
+        JOIN AppUser u ON c.userID = u.userID
+        JOIN SupportGroup sg ON cs.groupID = sg.groupID
+        ORDER BY cs.sessionDate DESC
+    """,
+    "all_peer_matches": """
+        SELECT
+            u1.userName as user1,
+            u2.userName as user2,
+            um.compatibilityScore
+        FROM UserMatch um
+        JOIN AppUser u1 ON um.user1ID = u1.userID
+        JOIN AppUser u2 ON um.user2ID = u2.userID
+        ORDER BY um.compatibilityScore DESC
+    """,
+}
+
+MODES = ["read_sql", "cursor", "arrow"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(query_name, mode, runs):
+    """Executed inside the child process; prints one JSON line"""
+    import warnings
+    import oracledb
+    import pandas as pd
+    import config
+    import fetch
+
+    warnings.simplefilter("ignore")  # pandas' "only SQLAlchemy" warning
+    conn = oracledb.connect(user=config.ORACLE_USER, password=config.ORACLE_PASSWORD,
+                            dsn=config.ORACLE_DSN)
+    sql = QUERIES[query_name]
+    if mode == "arrow" and not fetch.arrow_available(conn):
+        print(json.dumps({"query": query_name, "mode": mode, "skipped": "needs oracledb>=3 and pyarrow"}))
+        return
+
+    baseline = peak_rss_mb()
+    timings = []
+    rows = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        if mode == "read_sql":
+            df = pd.read_sql(sql, conn)
+        elif mode == "cursor":
+            df = fetch.read_frame_cursor(conn, sql)
+        else:
+            df = fetch.read_frame_arrow(conn, sql)
+        timings.append(time.perf_counter() - start)
+        rows = len(df)
+        del df
+    conn.close()
+
+    best = min(timings)
+    print(json.dumps({
+        "query": query_name,
+        "mode": mode,
+        "rows": rows,
+        "best_s": round(best, 4),
+        "rows_per_s": round(rows / best) if best else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_growth_mb": round(peak_rss_mb() - baseline, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataFrame fetch paths")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--query", choices=list(QUERIES), action="append")
+    parser.add_argument("--mode", choices=MODES, action="append")
+    parser.add_argument("--child", nargs=2, metavar=("QUERY", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.runs)
+        return
+
+    print("=" * 78)
+    print("MindConnect+ Fetch Path Benchmark")
+    print("=" * 78)
+    print(f"{'query':18} {'mode':9} {'rows':>9} {'best s':>8} {'rows/s':>11} {'peak MB':>8} {'growth MB':>10}")
+
+    for query_name in args.query or list(QUERIES):
+        for mode in args.mode or MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--runs", str(args.runs), "--child", query_name, mode],
+                capture_output=True, text=True
+            )
+            if out.returncode != 0:
+                print(f"{query_name:18} {mode:9} ❌ {out.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            if "skipped" in r:
+                print(f"{query_name:18} {mode:9} (skipped: {r['skipped']})")
+                continue
+            print(f"{query_name:18} {mode:9} {r['rows']:>9} {r['best_s']:>8} {r['rows_per_s']:>11} "
+                  f"{r['peak_rss_mb']:>8} {r['rss_growth_mb']:>10}")
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,829 @@
+"""
+MindConnect+ Query Benchmark
+Latency, rows, logical reads and round trips for every app.py query and
+every Phase III scenario (Phase3_Operations/Phase-3.sql)
+
+Each named query runs with bind values probed from the loaded dataset
+(a heavy user, a popular group, ...). Cold runs open a fresh connection per
+execution; warm runs repeat on one connection after a warm-up. Writes run
+inside a transaction that is rolled back after every execution.
+
+Results are written as JSON so two runs can be diffed:
+
+Usage:
+    python bench_queries.py --engine sqlite --db bench.db --scale small     # no server needed
+    python bench_queries.py --engine oracle --warm-runs 50
+    python bench_queries.py --engine sqlite --db bench.db --match mood --source app
+    python bench_queries.py --engine sqlite --db bench.db --compare bench_results/before.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import aggregates
+import generate_data
+import kpi
+import pagination
+import refdata
+import repository
+
+
+# =============================================
+# QUERY CATALOG
+# =============================================
+# params: bind names in order for positional (:1, :2, ...) statements;
+# statements with named binds pick their values by name, optionally
+# through aliases (e.g. an INSERT needs a fresh ID, not an existing one).
+def q(source, sql, params=None, write=False, sqlite=None, binds=None, aliases=None):
+    return {"source": source, "sql": sql, "params": params, "write": write,
+            "sqlite": sqlite, "binds": binds or {}, "aliases": aliases or {}}
+
+
+def _grid(grid, sort):
+    sql, binds = grid.page_query(sort, {}, 50)
+    return q("app", sql, binds=binds)
+
+
+def _user_grid(grid, sort):
+    """Grid pinned to one user through its "User" filter (bound as :f0)"""
+    sql, binds = grid.page_query(sort, {"User": 0}, 50)
+    del binds["f0"]
+    return q("app", sql, binds=binds, aliases={"f0": "user_id"})
+
+
+QUERIES = {
+    # ---------- app.py: Home / Analytics ----------
+    "app_home_kpis": q("app", kpi.build_query(kpi.HOME_METRICS)),
+    "app_analytics_kpis": q("app", kpi.build_query(kpi.ANALYTICS_METRICS)),
+    "app_top_groups": q("app", aggregates.TOP_GROUPS_QUERY),
+    "app_top_counselors": q("app", aggregates.TOP_COUNSELORS_QUERY),
+
+    # ---------- app.py: dropdowns and user picker ----------
+    "app_refdata_users": q("app", refdata.SOURCES["users"], ("zero",)),
+    "app_refdata_groups": q("app", refdata.SOURCES["groups"], ("zero",)),
+    "app_refdata_sessions": q("app", refdata.SOURCES["sessions"], ("zero",)),
+    "app_refdata_counselors": q("app", refdata.SOURCES["counselors"], ("zero",)),
+    "app_user_search": q("app", refdata.USER_SEARCH_SQL),
+    "app_user_by_id": q("app", refdata.USER_BY_ID_SQL),
+
+    # ---------- app.py: paginated grids (first page of 50) ----------
+    "app_users_page": _grid(pagination.USERS_GRID, "User ID"),
+    "app_users_count": q("app", pagination.USERS_GRID.count_query({})[0]),
+    "app_sessions_page": _grid(pagination.SESSIONS_GRID, "Newest first"),
+    "app_sessions_count": q("app", pagination.SESSIONS_GRID.count_query({})[0]),
+    "app_matches_page": _grid(pagination.MATCHES_GRID, "Best matches first"),
+    "app_matches_count": q("app", pagination.MATCHES_GRID.count_query({})[0]),
+
+    # ---------- repository.py: page queries ----------
+    "app_mood_history": _user_grid(pagination.MOOD_HISTORY_GRID, "Newest first"),
+    "app_mood_range": q("app", repository.MOOD_RANGE_SQL),
+    "app_mood_timeline_week": q("app", repository.MOOD_TIMELINE_SQL.format(fmt="IW"),
+                                aliases={"start_date": "since_date", "end_date": "new_mood_date"}),
+    "app_mood_timeline_month": q("app", repository.MOOD_TIMELINE_SQL.format(fmt="MM"),
+                                 aliases={"start_date": "year_ago_date", "end_date": "new_mood_date"}),
+    "app_mood_analytics": q("app", repository.MOOD_ROLLUP_SQL, binds={"period": aggregates.ALL_TIME}),
+    "app_mood_periods": q("app", repository.MOOD_PERIODS_SQL),
+    "app_similar_moods": q("app", repository.SIMILAR_MOODS_SQL),
+    "app_view_groups": q("app", repository.GROUPS_SQL),
+    "app_my_groups": q("app", repository.USER_GROUPS_SQL),
+    "app_rate_session_list": q("app", repository.USER_SESSIONS_SQL),
+    "app_find_matches": q("app", repository.USER_MATCHES_SQL),
+    "app_view_resources": q("app", repository.RESOURCES_SQL),
+    "app_my_resources": q("app", repository.USER_RESOURCES_SQL),
+
+    # ---------- repository.py: writes (rolled back) ----------
+    "app_register_user": q("app", repository.INSERT_USER_SQL, write=True,
+                           aliases={"user_id": "new_user_id", "user_name": "new_user_name", "email": "new_email"}),
+    "app_update_privacy": q("app", repository.UPDATE_PRIVACY_SQL, write=True),
+    "app_log_mood": q("app", repository.INSERT_MOOD_SQL, write=True, aliases={"log_date": "new_mood_date"}),
+    "app_log_mood_rollup": q("app", aggregates.STATEMENTS["oracle"]["log_mood"], write=True,
+                             sqlite=aggregates.STATEMENTS["sqlite"]["log_mood"],
+                             binds={"period": aggregates.ALL_TIME}, aliases={"log_date": "new_mood_date"}),
+    "app_join_group": q("app", repository.JOIN_GROUP_SQL, write=True, aliases={"group_id": "open_group_id"}),
+    "app_register_session": q("app", repository.REGISTER_SESSION_SQL, write=True,
+                              aliases={"session_id": "open_session_id"}),
+    "app_rate_session": q("app", repository.RATE_SESSION_SQL, write=True),
+
+    # ---------- Phase-3.sql scenarios ----------
+    "s01_register_user": q("phase3", """
+        INSERT INTO AppUser VALUES (:new_user_id, :new_user_name, :new_email, :password, :privacy)
+    """, write=True),
+    "s02_login": q("phase3", """
+        SELECT userID, userName, email, privacySetting
+        FROM AppUser
+        WHERE email = :email AND userPassword = :password
+    """),
+    "s03_update_privacy": q("phase3", """
+        UPDATE AppUser SET privacySetting = :privacy WHERE userID = :user_id
+    """, write=True),
+    "s04_log_mood": q("phase3", """
+        INSERT INTO MoodLog VALUES (:user_id, TO_DATE(:new_mood_date, 'YYYY-MM-DD'), :mood)
+    """, write=True),
+    "s05_mood_last_week": q("phase3", """
+        SELECT logDate, moodLevel
+        FROM MoodLog
+        WHERE userID = :user_id
+          AND logDate >= TO_DATE(:since_date, 'YYYY-MM-DD')
+        ORDER BY logDate DESC
+    """),
+    "s06_mood_statistics": q("phase3", """
+        SELECT moodLevel, COUNT(*) as frequency
+        FROM MoodLog
+        WHERE userID = :user_id
+        GROUP BY moodLevel
+        ORDER BY frequency DESC
+    """),
+    "s07_similar_moods": q("phase3", """
+        SELECT DISTINCT m2.userID, u.userName
+        FROM MoodLog m1
+        JOIN MoodLog m2 ON m1.logDate = m2.logDate AND m1.moodLevel = m2.moodLevel
+        JOIN AppUser u ON m2.userID = u.userID
+        WHERE m1.userID = :user_id AND m2.userID != :user_id
+    """),
+    "s08_join_group": q("phase3", """
+        INSERT INTO UserGroup VALUES (:user_id, :open_group_id)
+    """, write=True),
+    "s09_my_groups": q("phase3", """
+        SELECT sg.groupID, sg.groupName, sg.focusArea
+        FROM SupportGroup sg
+        JOIN UserGroup ug ON sg.groupID = ug.groupID
+        WHERE ug.userID = :user_id
+    """),
+    "s10_group_members": q("phase3", """
+        SELECT u.userID, u.userName, u.email
+        FROM AppUser u
+        JOIN UserGroup ug ON u.userID = ug.userID
+        WHERE ug.groupID = :group_id
+    """),
+    "s11_groups_by_focus": q("phase3", """
+        SELECT groupID, groupName, focusArea
+        FROM SupportGroup
+        WHERE UPPER(focusArea) LIKE UPPER(:focus_pattern)
+    """),
+    "s12_group_statistics": q("phase3", """
+        SELECT
+            sg.groupID,
+            sg.groupName,
+            COUNT(DISTINCT ug.userID) as member_count,
+            COUNT(DISTINCT cs.sessionID) as total_sessions,
+            ROUND(AVG(us.rating), 2) as avg_session_rating
+        FROM SupportGroup sg
+        LEFT JOIN UserGroup ug ON sg.groupID = ug.groupID
+        LEFT JOIN CounselingSession cs ON sg.groupID = cs.groupID
+        LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+        WHERE sg.groupID = :group_id
+        GROUP BY sg.groupID, sg.groupName
+    """),
+    "s13_create_session": q("phase3", """
+        INSERT INTO CounselingSession VALUES (
+            :new_session_id, TO_DATE(:new_mood_date, 'YYYY-MM-DD'), 'Managing Social Anxiety',
+            'Online', NULL, :counselor_id, :group_id
+        )
+    """, write=True),
+    "s14_register_session": q("phase3", """
+        INSERT INTO UserSession VALUES (:user_id, :open_session_id, NULL)
+    """, write=True),
+    "s15_group_sessions": q("phase3", """
+        SELECT
+            cs.sessionID,
+            cs.sessionDate,
+            cs.topic,
+            cs.sessionMode,
+            u.userName as counselor_name,
+            c.specialization
+        FROM CounselingSession cs
+        JOIN Counselor c ON cs.counselorID = c.userID
+        JOIN AppUser u ON c.userID = u.userID
+        WHERE cs.groupID = :group_id
+        ORDER BY cs.sessionDate
+    """),
+    "s16_rate_session": q("phase3", """
+        UPDATE UserSession SET rating = :rating WHERE userID = :user_id AND sessionID = :session_id
+    """, write=True),
+    "s17_progress_note": q("phase3", """
+        UPDATE CounselingSession
+        SET progressNote = 'Participants showed great engagement and openness'
+        WHERE sessionID = :session_id
+    """, write=True),
+    "s18_session_history": q("phase3", """
+        SELECT
+            cs.sessionID,
+            cs.sessionDate,
+            cs.topic,
+            cs.sessionMode,
+            sg.groupName,
+            u.userName as counselor_name,
+            us.rating
+        FROM UserSession us
+        JOIN CounselingSession cs ON us.sessionID = cs.sessionID
+        JOIN SupportGroup sg ON cs.groupID = sg.groupID
+        JOIN Counselor c ON cs.counselorID = c.userID
+        JOIN AppUser u ON c.userID = u.userID
+        WHERE us.userID = :user_id
+        ORDER BY cs.sessionDate DESC
+    """),
+    "s19_register_counselor": q("phase3", """
+        INSERT INTO Counselor VALUES (:user_id, 'Grief Counseling', 2021)
+    """, write=True),
+    "s20_counselor_summary": q("phase3", """
+        SELECT
+            c.userID,
+            u.userName,
+            c.specialization,
+            COUNT(cs.sessionID) as total_sessions,
+            ROUND(AVG(us.rating), 2) as avg_rating,
+            COUNT(DISTINCT cs.groupID) as groups_served
+        FROM Counselor c
+        JOIN AppUser u ON c.userID = u.userID
+        LEFT JOIN CounselingSession cs ON c.userID = cs.counselorID
+        LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+        WHERE c.userID = :counselor_id
+        GROUP BY c.userID, u.userName, c.specialization
+    """),
+    "s21_best_counselor": q("phase3", """
+        SELECT
+            c.userID,
+            u.userName,
+            c.specialization,
+            ROUND(AVG(us.rating), 2) as avg_rating
+        FROM Counselor c
+        JOIN AppUser u ON c.userID = u.userID
+        JOIN CounselingSession cs ON c.userID = cs.counselorID
+        JOIN UserSession us ON cs.sessionID = us.sessionID
+        WHERE c.specialization = :specialization
+        GROUP BY c.userID, u.userName, c.specialization
+        HAVING AVG(us.rating) >= ALL (
+            SELECT AVG(us2.rating)
+            FROM Counselor c2
+            JOIN CounselingSession cs2 ON c2.userID = cs2.counselorID
+            JOIN UserSession us2 ON cs2.sessionID = us2.sessionID
+            WHERE c2.specialization = :specialization
+            GROUP BY c2.userID
+        )
+    """, sqlite="""
+        SELECT
+            c.userID,
+            u.userName,
+            c.specialization,
+            ROUND(AVG(us.rating), 2) as avg_rating
+        FROM Counselor c
+        JOIN AppUser u ON c.userID = u.userID
+        JOIN CounselingSession cs ON c.userID = cs.counselorID
+        JOIN UserSession us ON cs.sessionID = us.sessionID
+        WHERE c.specialization = :specialization
+        GROUP BY c.userID, u.userName, c.specialization
+        HAVING AVG(us.rating) >= (
+            SELECT MAX(avg_rating) FROM (
+                SELECT AVG(us2.rating) as avg_rating
+                FROM Counselor c2
+                JOIN CounselingSession cs2 ON c2.userID = cs2.counselorID
+                JOIN UserSession us2 ON cs2.sessionID = us2.sessionID
+                WHERE c2.specialization = :specialization
+                GROUP BY c2.userID
+            )
+        )
+    """),
+    "s22_create_match": q("phase3", """
+        INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (:user_id, :match_user_id, 87.5)
+    """, write=True),
+    "s23_best_matches": q("phase3", """
+        SELECT
+            CASE
+                WHEN um.user1ID = :user_id THEN um.user2ID
+                ELSE um.user1ID
+            END as matched_userID,
+            u.userName,
+            u.email,
+            um.compatibilityScore
+        FROM UserMatch um
+        JOIN AppUser u ON (
+            CASE
+                WHEN um.user1ID = :user_id THEN um.user2ID
+                ELSE um.user1ID
+            END = u.userID
+        )
+        WHERE :user_id IN (um.user1ID, um.user2ID)
+        ORDER BY um.compatibilityScore DESC
+    """),
+    "s24_shared_groups": q("phase3", """
+        SELECT DISTINCT
+            u.userID,
+            u.userName,
+            COUNT(ug2.groupID) as shared_groups
+        FROM AppUser u
+        JOIN UserGroup ug2 ON u.userID = ug2.userID
+        WHERE ug2.groupID IN (
+            SELECT groupID
+            FROM UserGroup
+            WHERE userID = :user_id
+        )
+        AND u.userID != :user_id
+        GROUP BY u.userID, u.userName
+        ORDER BY shared_groups DESC
+    """),
+    "s25_add_resource": q("phase3", """
+        INSERT INTO LearningResource VALUES (:new_resource_id, 'Mindful Eating Guide', 'PDF')
+    """, write=True),
+    "s26_link_resource": q("phase3", """
+        INSERT INTO GroupResource VALUES (:group_id, :open_resource_id)
+    """, write=True),
+    "s27_my_resources": q("phase3", """
+        SELECT DISTINCT
+            lr.resourceID,
+            lr.title,
+            lr.resourceType,
+            sg.groupName
+        FROM LearningResource lr
+        JOIN GroupResource gr ON lr.resourceID = gr.resourceID
+        JOIN SupportGroup sg ON gr.groupID = sg.groupID
+        JOIN UserGroup ug ON sg.groupID = ug.groupID
+        WHERE ug.userID = :user_id
+        ORDER BY sg.groupName, lr.title
+    """),
+    "s28_resource_usage": q("phase3", """
+        SELECT
+            lr.resourceID,
+            lr.title,
+            lr.resourceType,
+            COUNT(gr.groupID) as group_count
+        FROM LearningResource lr
+        LEFT JOIN GroupResource gr ON lr.resourceID = gr.resourceID
+        GROUP BY lr.resourceID, lr.title, lr.resourceType
+        ORDER BY group_count DESC
+    """),
+    "s29_user_dashboard": q("phase3", """
+        SELECT
+            u.userName,
+            u.email,
+            (SELECT COUNT(*) FROM MoodLog WHERE userID = :user_id) as total_mood_logs,
+            (SELECT moodLevel FROM MoodLog WHERE userID = :user_id ORDER BY logDate DESC FETCH FIRST 1 ROW ONLY) as latest_mood,
+            (SELECT COUNT(*) FROM UserGroup WHERE userID = :user_id) as groups_joined,
+            (SELECT COUNT(*) FROM UserSession WHERE userID = :user_id) as sessions_attended,
+            (SELECT ROUND(AVG(rating), 2) FROM UserSession WHERE userID = :user_id AND rating IS NOT NULL) as avg_session_rating,
+            (SELECT COUNT(*) FROM UserMatch WHERE :user_id IN (user1ID, user2ID)) as total_matches
+        FROM AppUser u
+        WHERE u.userID = :user_id
+    """),
+    "s30_platform_statistics": q("phase3", """
+        SELECT
+            (SELECT COUNT(*) FROM AppUser) as total_users,
+            (SELECT COUNT(*) FROM Counselor) as total_counselors,
+            (SELECT COUNT(*) FROM SupportGroup) as total_groups,
+            (SELECT COUNT(*) FROM CounselingSession) as total_sessions,
+            (SELECT ROUND(AVG(rating), 2) FROM UserSession WHERE rating IS NOT NULL) as platform_avg_rating,
+            (SELECT COUNT(*) FROM MoodLog) as total_mood_logs,
+            (SELECT COUNT(*) FROM UserMatch) as total_matches,
+            (SELECT COUNT(*) FROM LearningResource) as total_resources
+        FROM DUAL
+    """),
+    "s31_needs_intervention": q("phase3", """
+        SELECT
+            u.userID,
+            u.userName,
+            u.email,
+            COUNT(CASE WHEN ml.moodLevel IN ('Anxious', 'Stressed', 'Sad') THEN 1 END) as negative_mood_count,
+            COUNT(*) as total_logs,
+            ROUND(COUNT(CASE WHEN ml.moodLevel IN ('Anxious', 'Stressed', 'Sad') THEN 1 END) * 100.0 / COUNT(*), 2) as negative_percentage
+        FROM AppUser u
+        JOIN MoodLog ml ON u.userID = ml.userID
+        WHERE ml.logDate >= TO_DATE(:since_date, 'YYYY-MM-DD')
+        GROUP BY u.userID, u.userName, u.email
+        HAVING COUNT(CASE WHEN ml.moodLevel IN ('Anxious', 'Stressed', 'Sad') THEN 1 END) > 2
+        ORDER BY negative_percentage DESC
+    """),
+    "s33_leave_group": q("phase3", """
+        DELETE FROM UserGroup WHERE userID = :user_id AND groupID = :group_id
+    """, write=True),
+    "s35_group_activity": q("phase3", """
+        SELECT
+            sg.groupID,
+            sg.groupName,
+            sg.focusArea,
+            COUNT(DISTINCT ug.userID) as member_count,
+            COUNT(DISTINCT cs.sessionID) as session_count,
+            COUNT(DISTINCT gr.resourceID) as resource_count,
+            ROUND(AVG(us.rating), 2) as avg_rating,
+            (COUNT(DISTINCT ug.userID) + COUNT(DISTINCT cs.sessionID) * 2 + COUNT(DISTINCT gr.resourceID)) as activity_score
+        FROM SupportGroup sg
+        LEFT JOIN UserGroup ug ON sg.groupID = ug.groupID
+        LEFT JOIN CounselingSession cs ON sg.groupID = cs.groupID
+        LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+        LEFT JOIN GroupResource gr ON sg.groupID = gr.groupID
+        GROUP BY sg.groupID, sg.groupName, sg.focusArea
+        ORDER BY activity_score DESC
+    """),
+    "s36_counselor_workload": q("phase3", """
+        SELECT
+            c.userID,
+            u.userName,
+            c.specialization,
+            c.startYear,
+            COUNT(cs.sessionID) as sessions_conducted,
+            COUNT(DISTINCT cs.groupID) as groups_served,
+            ROUND(AVG(us.rating), 2) as avg_rating
+        FROM Counselor c
+        JOIN AppUser u ON c.userID = u.userID
+        LEFT JOIN CounselingSession cs ON c.userID = cs.counselorID
+        LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+        GROUP BY c.userID, u.userName, c.specialization, c.startYear
+        ORDER BY sessions_conducted DESC
+    """),
+    "s37_engagement_score": q("phase3", """
+        SELECT
+            u.userID,
+            u.userName,
+            (SELECT COUNT(*) FROM MoodLog WHERE userID = u.userID) * 10 as mood_points,
+            (SELECT COUNT(*) FROM UserSession WHERE userID = u.userID) * 20 as session_points,
+            (SELECT COUNT(*) FROM UserGroup WHERE userID = u.userID) * 15 as group_points,
+            (SELECT COALESCE(SUM(rating), 0) FROM UserSession WHERE userID = u.userID) * 5 as rating_points,
+            (
+                (SELECT COUNT(*) FROM MoodLog WHERE userID = u.userID) * 10 +
+                (SELECT COUNT(*) FROM UserSession WHERE userID = u.userID) * 20 +
+                (SELECT COUNT(*) FROM UserGroup WHERE userID = u.userID) * 15 +
+                (SELECT COALESCE(SUM(rating), 0) FROM UserSession WHERE userID = u.userID) * 5
+            ) as total_engagement_score
+        FROM AppUser u
+        WHERE u.userID = :user_id
+    """),
+}
+
+
+# =============================================
+# REPRESENTATIVE BIND VALUES
+# =============================================
+# Resolved in order against the loaded data; later probes may use earlier binds
+BIND_PROBES = [
+    ("user_id", "SELECT MIN(userID) FROM UserSession"),
+    ("email", "SELECT email FROM AppUser WHERE userID = :user_id"),
+    ("password", "SELECT userPassword FROM AppUser WHERE userID = :user_id"),
+    ("group_id", "SELECT MIN(groupID) FROM UserGroup WHERE userID = :user_id"),
+    ("session_id", "SELECT MIN(sessionID) FROM UserSession WHERE userID = :user_id"),
+    ("counselor_id", "SELECT MIN(counselorID) FROM CounselingSession"),
+    ("specialization", "SELECT specialization FROM Counselor WHERE userID = :counselor_id"),
+    ("last_log_date", "SELECT MAX(logDate) FROM MoodLog"),
+    ("new_user_id", "SELECT MAX(userID) + 1 FROM AppUser"),
+    ("new_session_id", "SELECT MAX(sessionID) + 1 FROM CounselingSession"),
+    ("new_resource_id", "SELECT MAX(resourceID) + 1 FROM LearningResource"),
+    ("open_group_id", """SELECT MIN(groupID) FROM SupportGroup WHERE groupID NOT IN
+                         (SELECT groupID FROM UserGroup WHERE userID = :user_id)"""),
+    ("open_session_id", """SELECT MIN(sessionID) FROM CounselingSession WHERE sessionID NOT IN
+                           (SELECT sessionID FROM UserSession WHERE userID = :user_id)"""),
+    ("open_resource_id", """SELECT MIN(resourceID) FROM LearningResource WHERE resourceID NOT IN
+                            (SELECT resourceID FROM GroupResource WHERE groupID = :group_id)"""),
+    ("match_user_id", """SELECT MAX(userID) FROM AppUser WHERE userID > :user_id AND userID NOT IN
+                         (SELECT user2ID FROM UserMatch WHERE user1ID = :user_id)"""),
+]
+
+CONSTANT_BINDS = {
+    "zero": 0,
+    "privacy": "friends",
+    "mood": "Happy",
+    "rating": 5,
+    "focus_pattern": "%Anxiety%",
+    "name_prefix": "AL%",
+    "email_prefix": "user1%",
+    "n": 20,
+}
+
+_NAMED_BIND = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+def _date_text(value):
+    return value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else str(value)[:10]
+
+
+def resolve_binds(target, conn, overrides=None):
+    binds = dict(CONSTANT_BINDS)
+    binds.update(overrides or {})
+    for name, sql in BIND_PROBES:
+        if name in binds:
+            continue
+        cursor = conn.cursor()
+        try:
+            cursor.execute(target.prepare(sql), _named(sql, binds))
+            row = cursor.fetchone()
+            binds[name] = row[0] if row else None
+        finally:
+            cursor.close()
+    last = datetime.strptime(_date_text(binds["last_log_date"]), "%Y-%m-%d")
+    binds["last_log_date"] = last.strftime("%Y-%m-%d")
+    binds.setdefault("since_date", (last - timedelta(days=7)).strftime("%Y-%m-%d"))
+    binds.setdefault("year_ago_date", (last - timedelta(days=365)).strftime("%Y-%m-%d"))
+    binds.setdefault("new_mood_date", (last + timedelta(days=1)).strftime("%Y-%m-%d"))
+    binds.setdefault("new_user_name", "Benchmark User")
+    binds.setdefault("new_email", f"bench{binds['new_user_id']}@example.com")
+    binds.setdefault("id", binds["user_id"])
+    return binds
+
+
+def _named(sql, binds):
+    return {name: binds[name] for name in set(_NAMED_BIND.findall(sql))}
+
+
+def bind_values(entry, binds):
+    if entry["params"] is not None:
+        return [binds[name] for name in entry["params"]]
+    names = set(_NAMED_BIND.findall(entry["sql"]))
+    values = {name: binds.get(entry["aliases"].get(name, name)) for name in names}
+    values.update(entry["binds"])
+    return values
+
+
+# =============================================
+# ENGINES
+# =============================================
+class OracleTarget:
+    name = "oracle"
+    STATS_SQL = """
+        SELECT n.name, s.value
+        FROM v$mystat s
+        JOIN v$statname n ON s.statistic# = n.statistic#
+        WHERE n.name IN ('session logical reads', 'SQL*Net roundtrips to/from client')
+    """
+
+    def __init__(self):
+        import oracledb
+        import config
+        import fetch
+        self._connect = lambda: oracledb.connect(user=config.ORACLE_USER, password=config.ORACLE_PASSWORD,
+                                                 dsn=config.ORACLE_DSN)
+        self.arraysize = fetch.ARRAYSIZE
+        self.prefetchrows = fetch.PREFETCHROWS
+
+    def connect(self):
+        return self._connect()
+
+    def cursor(self, conn):
+        cursor = conn.cursor()
+        cursor.arraysize = self.arraysize
+        cursor.prefetchrows = self.prefetchrows
+        return cursor
+
+    def prepare(self, sql, entry=None):
+        return sql
+
+    def _session_stats(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.STATS_SQL)
+            return dict(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def measure(self, conn, run):
+        """Logical reads and round trips of one execution (needs SELECT on v$mystat)"""
+        try:
+            a = self._session_stats(conn)
+            b = self._session_stats(conn)  # cost of the stats query itself
+            run()
+            c = self._session_stats(conn)
+        except Exception:
+            return {"logical_reads": None, "round_trips": None}
+
+        def delta(stat):
+            return (c[stat] - b[stat]) - (b[stat] - a[stat])
+        return {"logical_reads": delta("session logical reads"),
+                "round_trips": delta("SQL*Net roundtrips to/from client")}
+
+    def describe(self, conn):
+        return {"version": conn.version}
+
+
+class SqliteTarget:
+    name = "sqlite"
+
+    def __init__(self, path):
+        import local_engine
+        self.local_engine = local_engine
+        self.path = path
+
+    def connect(self):
+        return self.local_engine.connect(self.path)
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def prepare(self, sql, entry=None):
+        if entry is not None and entry["sqlite"]:
+            sql = entry["sqlite"]
+        return self.local_engine.translate(sql)
+
+    def measure(self, conn, run):
+        """SQLite has no logical-read counter; count VM steps instead"""
+        steps = [0]
+
+        def tick():
+            steps[0] += 1
+            return 0
+        conn.set_progress_handler(tick, 100)
+        try:
+            run()
+        finally:
+            conn.set_progress_handler(None, 0)
+        return {"vm_steps": steps[0] * 100}
+
+    def describe(self, conn):
+        import sqlite3
+        return {"version": sqlite3.sqlite_version, "path": os.path.abspath(self.path)}
+
+
+# =============================================
+# RUNNER
+# =============================================
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(timings):
+    if not timings:
+        return None
+    ms = [t * 1000 for t in timings]
+    return {"runs": len(ms), "p50_ms": round(percentile(ms, 50), 3), "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3), "mean_ms": round(sum(ms) / len(ms), 3)}
+
+
+def execute(target, conn, sql, params, write):
+    """Run once and fetch everything; returns (seconds, rows)"""
+    cursor = target.cursor(conn)
+    try:
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = len(cursor.fetchall()) if cursor.description else cursor.rowcount
+        elapsed = time.perf_counter() - start
+    finally:
+        cursor.close()
+        if write:
+            conn.rollback()
+    return elapsed, rows
+
+
+def bench_query(target, entry, binds, cold_runs, warm_runs):
+    sql = target.prepare(entry["sql"], entry)
+    params = bind_values(entry, binds)
+    write = entry["write"]
+
+    cold = []
+    for _ in range(cold_runs):
+        conn = target.connect()
+        try:
+            cold.append(execute(target, conn, sql, params, write)[0])
+        finally:
+            conn.close()
+
+    conn = target.connect()
+    try:
+        _, rows = execute(target, conn, sql, params, write)  # warm-up
+        warm = [execute(target, conn, sql, params, write)[0] for _ in range(warm_runs)]
+        stats = target.measure(conn, lambda: execute(target, conn, sql, params, write))
+    finally:
+        conn.close()
+
+    result = {"source": entry["source"], "write": write, "rows": rows,
+              "cold": summarize(cold), "warm": summarize(warm)}
+    result.update(stats)
+    return result
+
+
+def dataset_counts(target, conn):
+    counts = {}
+    cursor = conn.cursor()
+    try:
+        for table in generate_data.bulk_load.LOAD_ORDER:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return counts
+
+
+# =============================================
+# REGRESSION DIFF
+# =============================================
+def compare(old, new, threshold, min_delta_ms):
+    """Print warm p50/p95 changes; returns the names that got slower"""
+    regressions = []
+    print(f"\n{'query':28} {'old p50':>9} {'new p50':>9} {'ratio':>7} {'old p95':>9} {'new p95':>9}")
+    for name, result in new["results"].items():
+        before = old["results"].get(name)
+        if not before or not before.get("warm") or not result.get("warm"):
+            continue
+        o, n = before["warm"], result["warm"]
+        ratio = n["p50_ms"] / o["p50_ms"] if o["p50_ms"] else float("inf")
+        slower = ratio > 1 + threshold and n["p50_ms"] - o["p50_ms"] > min_delta_ms
+        flag = " ⚠️" if slower else ""
+        print(f"{name:28} {o['p50_ms']:>9.3f} {n['p50_ms']:>9.3f} {ratio:>7.2f} "
+              f"{o['p95_ms']:>9.3f} {n['p95_ms']:>9.3f}{flag}")
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MindConnect+ queries")
+    parser.add_argument("--engine", choices=["sqlite", "oracle"], default="sqlite")
+    parser.add_argument("--db", default="bench.db", help="SQLite file (built if missing)")
+    parser.add_argument("--scale", choices=list(generate_data.SCALES), default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the SQLite database")
+    parser.add_argument("--load", action="store_true",
+                        help="(oracle) insert the generated dataset before benchmarking")
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--warm-runs", type=int, default=20)
+    parser.add_argument("--match", help="only queries whose name contains this text")
+    parser.add_argument("--source", choices=["app", "phase3"])
+    parser.add_argument("--skip-writes", action="store_true")
+    parser.add_argument("--bind", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a bind value, e.g. --bind user_id=42")
+    parser.add_argument("--output", help="JSON results file (default bench_results/<engine>_<time>.json)")
+    parser.add_argument("--compare", help="earlier JSON results to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio flagged as regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    scale = generate_data.Scale(**generate_data.SCALES[args.scale])
+    if args.engine == "sqlite":
+        target = SqliteTarget(args.db)
+        if args.rebuild or not os.path.exists(args.db):
+            print(f"Building {args.db} at scale '{args.scale}'...")
+            target.local_engine.create_database(
+                args.db, scale, args.seed,
+                progress=lambda t, n, s: print(f"   ✅ {t:18} {n:>12,} rows  {s:6.1f}s"))
+    else:
+        target = OracleTarget()
+        if args.load:
+            conn = target.connect()
+            for table in generate_data.bulk_load.LOAD_ORDER:
+                stats = generate_data.bulk_load.load_rows(conn, table, generate_data.generate(table, scale, args.seed))
+                print(f"   ✅ {table:18} {stats.inserted:>12,} rows")
+            conn.close()
+            print("   ⚠️  Re-run the BACKFILL section of Summary_Tables.sql to resync GroupActivity/CounselorActivity")
+
+    overrides = {}
+    for item in args.bind:
+        name, _, value = item.partition("=")
+        overrides[name] = int(value) if value.lstrip("-").isdigit() else value
+
+    conn = target.connect()
+    binds = resolve_binds(target, conn, overrides)
+    meta = {"engine": target.name, "started": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "cold_runs": args.cold_runs, "warm_runs": args.warm_runs,
+            "dataset": dataset_counts(target, conn), **target.describe(conn)}
+    conn.close()
+
+    selected = {name: entry for name, entry in QUERIES.items()
+                if (not args.match or args.match in name)
+                and (not args.source or entry["source"] == args.source)
+                and not (args.skip_writes and entry["write"])}
+
+    print("=" * 96)
+    print(f"MindConnect+ Query Benchmark ({target.name})")
+    print("=" * 96)
+    print(f"{'query':28} {'rows':>8} {'cold p50':>9} {'warm p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'reads/steps':>12} {'trips':>6}")
+
+    results = {}
+    for name, entry in selected.items():
+        try:
+            r = bench_query(target, entry, binds, args.cold_runs, args.warm_runs)
+        except Exception as e:
+            results[name] = {"source": entry["source"], "error": str(e)}
+            print(f"{name:28} ❌ {str(e).splitlines()[0][:60]}")
+            continue
+        results[name] = r
+        cold_p50 = r["cold"]["p50_ms"] if r["cold"] else float("nan")
+        reads = r.get("logical_reads", r.get("vm_steps"))
+        print(f"{name:28} {r['rows']:>8} {cold_p50:>9.3f} {r['warm']['p50_ms']:>9.3f} "
+              f"{r['warm']['p95_ms']:>9.3f} {r['warm']['p99_ms']:>9.3f} "
+              f"{'-' if reads is None else reads:>12} {'-' if r.get('round_trips') is None else r['round_trips']:>6}")
+
+    report = {"meta": meta, "binds": binds, "results": results}
+    output = args.output or os.path.join(
+        "bench_results", f"{target.name}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print("=" * 96)
+    print(f"✅ Results written to {output} (times in ms)")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} slower than {args.compare}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+MindConnect+ Bulk Loader
+Loads CSV / JSONL / Parquet files into the MindConnect+ tables with array DML
+
+One file per table, named after the table (AppUser.csv, MoodLog.jsonl.gz,
+UserSession.parquet, ...). Rows are inserted with executemany in batches,
+bad rows (duplicates, FK violations) are collected with batcherrors instead
+of aborting the load, and tables are loaded parents-first so foreign keys
+always resolve.
+
+Usage:
+    python bulk_load.py data/
+    python bulk_load.py data/ --batch-size 20000 --commit-every 5 --append
+    python bulk_load.py data/ --tables MoodLog UserSession
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from datetime import date, datetime
+
+import oracledb
+import config
+
+# =============================================
+# TABLE DEFINITIONS (FK-safe load order)
+# =============================================
+# column -> type used to convert text input before binding
+TABLES = {
+    "AppUser": {"userID": int, "userName": str, "email": str,
+                "userPassword": str, "privacySetting": str},
+    "Counselor": {"userID": int, "specialization": str, "startYear": int},
+    "SupportGroup": {"groupID": int, "groupName": str, "focusArea": str},
+    "LearningResource": {"resourceID": int, "title": str, "resourceType": str},
+    "MoodLog": {"userID": int, "logDate": date, "moodLevel": str},
+    "CounselingSession": {"sessionID": int, "sessionDate": date, "topic": str,
+                          "sessionMode": str, "progressNote": str,
+                          "counselorID": int, "groupID": int},
+    "UserMatch": {"user1ID": int, "user2ID": int, "compatibilityScore": float},
+    "UserGroup": {"userID": int, "groupID": int},
+    "UserSession": {"userID": int, "sessionID": int, "rating": int},
+    "GroupResource": {"groupID": int, "resourceID": int},
+}
+
+LOAD_ORDER = list(TABLES)
+
+FORMATS = (".csv", ".csv.gz", ".jsonl", ".jsonl.gz", ".parquet")
+
+
+# =============================================
+# INPUT READERS (all streaming)
+# =============================================
+def _open_text(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _convert(value, kind):
+    if value is None or value == "":
+        return None
+    if kind is date:
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+    if kind is str:
+        return str(value)
+    return kind(value)
+
+
+def read_rows(path, columns):
+    """Yield tuples in table column order from a CSV/JSONL/Parquet file"""
+    names = list(columns)
+    lower = {n.lower(): n for n in names}
+
+    def record_to_row(record):
+        record = {lower.get(k.lower(), k): v for k, v in record.items()}
+        return tuple(_convert(record.get(n), columns[n]) for n in names)
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # only needed for Parquet input
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=10000):
+            for record in batch.to_pylist():
+                yield record_to_row(record)
+    elif ".jsonl" in path:
+        with _open_text(path) as f:
+            for line in f:
+                if line.strip():
+                    yield record_to_row(json.loads(line))
+    else:
+        with _open_text(path) as f:
+            for record in csv.DictReader(f):
+                yield record_to_row(record)
+
+
+def find_input(data_dir, table):
+    for name in os.listdir(data_dir):
+        for ext in FORMATS:
+            if name.lower() == (table + ext).lower():
+                return os.path.join(data_dir, name)
+    return None
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =============================================
+# LOADER
+# =============================================
+class LoadStats:
+    def __init__(self, table):
+        self.table = table
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_s(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+
+def insert_sql(table, append=False):
+    columns = list(TABLES[table])
+    hint = "/*+ APPEND_VALUES */ " if append else ""
+    binds = ", ".join(f":{i + 1}" for i in range(len(columns)))
+    return f"INSERT {hint}INTO {table} ({', '.join(columns)}) VALUES ({binds})"
+
+
+def load_rows(conn, table, rows, batch_size=5000, commit_every=10, append=False,
+              progress=None, max_errors_kept=20):
+    """Insert an iterable of tuples into table; returns LoadStats
+
+    Direct-path (append) inserts lock the table and cannot be followed by
+    another DML on it in the same transaction, so append mode commits after
+    every batch.
+    """
+    stats = LoadStats(table)
+    sql = insert_sql(table, append)
+    commit_every = 1 if append else max(1, commit_every)
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    try:
+        for n, batch in enumerate(batched(rows, batch_size), 1):
+            cursor.executemany(sql, batch, batcherrors=True)
+            errors = cursor.getbatcherrors()
+            stats.read += len(batch)
+            stats.inserted += len(batch) - len(errors)
+            for error in errors:
+                if "ORA-00001" in error.message:
+                    stats.duplicates += 1
+                else:
+                    stats.rejected += 1
+                    if len(stats.errors) < max_errors_kept:
+                        stats.errors.append((stats.read - len(batch) + error.offset, error.message))
+            if n % commit_every == 0:
+                conn.commit()
+            stats.elapsed = time.perf_counter() - start
+            if progress:
+                progress(stats)
+        conn.commit()
+    finally:
+        cursor.close()
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def load_directory(conn, data_dir, tables=None, batch_size=5000, commit_every=10,
+                   append=False, progress=None):
+    """Load every table that has an input file in data_dir, parents first"""
+    results = []
+    for table in LOAD_ORDER:
+        if tables and table.lower() not in {t.lower() for t in tables}:
+            continue
+        path = find_input(data_dir, table)
+        if path is None:
+            continue
+        rows = read_rows(path, TABLES[table])
+        results.append(load_rows(conn, table, rows, batch_size, commit_every, append, progress))
+    return results
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load MindConnect+ tables")
+    parser.add_argument("data_dir", help="directory with <Table>.csv/.jsonl/.parquet files")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per executemany")
+    parser.add_argument("--commit-every", type=int, default=10, help="batches per commit")
+    parser.add_argument("--append", action="store_true",
+                        help="direct-path inserts (APPEND_VALUES hint), commits every batch")
+    parser.add_argument("--tables", nargs="+", help="only load these tables")
+    parser.add_argument("--progress-every", type=int, default=10, help="batches between progress lines")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MindConnect+ Bulk Loader")
+    print("=" * 70)
+
+    try:
+        conn = oracledb.connect(user=config.ORACLE_USER, password=config.ORACLE_PASSWORD,
+                                dsn=config.ORACLE_DSN)
+    except Exception as e:
+        print(f"❌ Could not connect: {e}")
+        raise SystemExit(1)
+
+    batches_seen = {}
+
+    def progress(stats):
+        batches_seen[stats.table] = batches_seen.get(stats.table, 0) + 1
+        if batches_seen[stats.table] % args.progress_every == 0:
+            print(f"   {stats.table:18} {stats.read:>12,} rows  {stats.rows_per_s:>10,.0f} rows/s")
+
+    total_start = time.perf_counter()
+    results = load_directory(conn, args.data_dir, args.tables, args.batch_size,
+                             args.commit_every, args.append, progress)
+    conn.close()
+
+    print("\n" + "=" * 70)
+    print(f"{'table':18} {'read':>12} {'inserted':>12} {'dupes':>8} {'rejected':>9} {'rows/s':>10}")
+    for s in results:
+        print(f"{s.table:18} {s.read:>12,} {s.inserted:>12,} {s.duplicates:>8,} "
+              f"{s.rejected:>9,} {s.rows_per_s:>10,.0f}")
+        for offset, message in s.errors:
+            print(f"   ⚠️  row {offset}: {message[:80]}")
+    print("=" * 70)
+    print(f"✅ Loaded {sum(s.inserted for s in results):,} rows in {time.perf_counter() - total_start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
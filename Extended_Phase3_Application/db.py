@@ -0,0 +1,249 @@
+"""
+MindConnect+ Database Connection Layer
+Process-wide Oracle session pool shared by every page of the app
+
+With ORACLE_REPLICA_DSNS set (read-only standbys such as Active Data Guard)
+the app gets a RoutedPool instead: reads go to the replicas, writes and
+reads that must see them go to the primary.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import oracledb
+import config
+
+# =============================================
+# POOL SETTINGS (override any of these in config.py)
+# =============================================
+POOL_MIN = getattr(config, "ORACLE_POOL_MIN", 1)
+POOL_MAX = getattr(config, "ORACLE_POOL_MAX", 8)
+POOL_INCREMENT = getattr(config, "ORACLE_POOL_INCREMENT", 1)
+POOL_WAIT_TIMEOUT_MS = getattr(config, "ORACLE_POOL_WAIT_TIMEOUT_MS", 5000)
+POOL_PING_INTERVAL_S = getattr(config, "ORACLE_POOL_PING_INTERVAL_S", 60)
+
+# Read replicas: DSNs of read-only standbys of ORACLE_DSN (same user/password)
+REPLICA_DSNS = getattr(config, "ORACLE_REPLICA_DSNS", [])
+# How long a replica that failed to hand out a connection is left alone
+REPLICA_RETRY_S = getattr(config, "ORACLE_REPLICA_RETRY_S", 30)
+# How long after a write a session's read-your-writes reads stay on the
+# primary; should exceed the replicas' apply lag
+READ_YOUR_WRITES_S = getattr(config, "READ_YOUR_WRITES_S", 10)
+
+
+# =============================================
+# CONNECTION POOL
+# =============================================
+class ConnectionPool:
+    """Session pool plus the acquire statistics used to size it"""
+
+    def __init__(self, user, password, dsn, min=POOL_MIN, max=POOL_MAX,
+                 increment=POOL_INCREMENT, wait_timeout=POOL_WAIT_TIMEOUT_MS,
+                 ping_interval=POOL_PING_INTERVAL_S):
+        self.dsn = dsn
+        self.pool = oracledb.create_pool(
+            user=user,
+            password=password,
+            dsn=dsn,
+            min=min,
+            max=max,
+            increment=increment,
+            getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+            wait_timeout=wait_timeout,
+            ping_interval=ping_interval
+        )
+        self._lock = threading.Lock()
+        self.acquires = 0
+        self.failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _record_acquire(self, waited, ok):
+        with self._lock:
+            if ok:
+                self.acquires += 1
+            else:
+                self.failures += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def acquire(self, primary=False):
+        """Take a connection from the pool, waiting at most wait_timeout ms
+
+        primary is for RoutedPool compatibility: a lone pool is the primary.
+        """
+        start = time.perf_counter()
+        try:
+            conn = self.pool.acquire()
+        except Exception:
+            self._record_acquire(time.perf_counter() - start, False)
+            raise
+        self._record_acquire(time.perf_counter() - start, True)
+        return conn
+
+    def release(self, conn):
+        """Hand a connection back; any uncommitted work is rolled back"""
+        self.pool.release(conn)
+
+    @contextmanager
+    def connection(self, primary=False):
+        """Borrow a connection; it goes back to the pool even if the body raises"""
+        conn = self.acquire(primary)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Snapshot of pool usage: busy/open sessions and acquire wait times"""
+        with self._lock:
+            attempts = self.acquires + self.failures
+            avg_wait = self.total_wait / attempts if attempts else 0.0
+            return {
+                "busy": self.pool.busy,
+                "open": self.pool.opened,
+                "min": self.pool.min,
+                "max": self.pool.max,
+                "acquires": self.acquires,
+                "acquire_failures": self.failures,
+                "avg_wait_ms": round(avg_wait * 1000, 2),
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+    def saturated(self):
+        """Every session is checked out (an acquire timeout means busy, not down)"""
+        return self.pool.busy >= self.pool.max
+
+    def close(self):
+        self.pool.close(force=True)
+
+
+# =============================================
+# READ/WRITE SPLIT
+# =============================================
+class Replica:
+    """One read-only standby: its pool (opened on first use) and health"""
+
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self.pool = None
+        self.down_until = 0.0
+        self.error = None
+        self.reads = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, connect):
+        with self.lock:
+            if self.pool is None:
+                self.pool = connect(self.dsn)
+        return self.pool.acquire()
+
+
+class RoutedPool:
+    """Primary pool for writes plus replica pools for reads, behind the ConnectionPool interface
+
+    acquire() takes a connection from the replicas in turn. A replica that
+    cannot hand one out is skipped for retry_s and the read moves on to the
+    next one, or to the primary when no replica is up; a replica that is
+    only busy is not marked down. acquire(primary=True) always uses the
+    primary: for writes, and for reads that must see the caller's own
+    recent writes (replicas apply them a little later).
+    """
+
+    def __init__(self, primary, replica_dsns, connect, retry_s=REPLICA_RETRY_S):
+        self.primary = primary
+        self.replicas = [Replica(dsn) for dsn in replica_dsns]
+        self.retry_s = retry_s
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._next = 0
+        self._owners = {}  # id(conn) -> pool it came from
+        self.primary_reads = 0
+        self.failovers = 0
+
+    def _read_acquire(self):
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        for replica in self.replicas[start:] + self.replicas[:start]:
+            if replica.down_until > time.monotonic():
+                continue
+            try:
+                conn = replica.acquire(self._connect)
+            except Exception as e:
+                if replica.pool is None or not replica.pool.saturated():
+                    replica.down_until = time.monotonic() + self.retry_s
+                    replica.error = str(e)
+                with self._lock:
+                    self.failovers += 1
+                continue
+            with self._lock:
+                replica.reads += 1
+                replica.error = None
+                self._owners[id(conn)] = replica.pool
+            return conn
+        conn = self.primary.acquire()
+        with self._lock:
+            self.primary_reads += 1
+        return conn
+
+    def acquire(self, primary=False):
+        """A replica connection, or a primary one when primary=True or no replica is up"""
+        if primary or not self.replicas:
+            return self.primary.acquire()
+        return self._read_acquire()
+
+    def release(self, conn):
+        with self._lock:
+            owner = self._owners.pop(id(conn), self.primary)
+        owner.release(conn)
+
+    @contextmanager
+    def connection(self, primary=False):
+        conn = self.acquire(primary)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        """Primary pool stats, plus stats["replicas"]: health and usage of each replica"""
+        stats = self.primary.stats()
+        stats["primary_reads"] = self.primary_reads
+        stats["failovers"] = self.failovers
+        stats["replicas"] = []
+        for replica in self.replicas:
+            entry = {"dsn": replica.dsn, "up": replica.down_until <= time.monotonic(),
+                     "reads": replica.reads, "error": replica.error}
+            if replica.pool is not None:
+                entry.update({key: value for key, value in replica.pool.stats().items()
+                              if key in ("busy", "open", "max", "avg_wait_ms")})
+            stats["replicas"].append(entry)
+        return stats
+
+    def close(self):
+        for replica in self.replicas:
+            if replica.pool is not None:
+                replica.pool.close()
+        self.primary.close()
+
+
+def create_pool(replicas=False):
+    """Build the pool from the credentials in config.py
+
+    replicas=True routes reads to ORACLE_REPLICA_DSNS when any are set;
+    batch jobs that read and then write keep to the primary.
+    """
+    primary = ConnectionPool(
+        user=config.ORACLE_USER,
+        password=config.ORACLE_PASSWORD,
+        dsn=config.ORACLE_DSN
+    )
+    if not (replicas and REPLICA_DSNS):
+        return primary
+    return RoutedPool(primary, REPLICA_DSNS, lambda dsn: ConnectionPool(
+        user=config.ORACLE_USER,
+        password=config.ORACLE_PASSWORD,
+        dsn=dsn
+    ))
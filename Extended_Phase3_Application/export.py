@@ -0,0 +1,317 @@
+"""
+MindConnect+ Data Export
+Streams MoodLog, CounselingSession and UserSession to CSV / JSONL / Parquet
+for the data team
+
+Rows are fetched in batches (fetch.iter_frames: Arrow batches with
+python-oracledb 3.x, otherwise cursor.fetchmany with a matching arraysize)
+and each batch is written and dropped before the next, so memory stays at
+one batch per worker whatever the table size. An export can be limited to
+a date range and a userID range, and split into partitions (by month, by
+year, or into equal userID ranges) that are written in parallel, one file
+each. A month/year split without a date range adds an _undated file for
+the rows whose date is NULL (sessions not scheduled yet, and their
+ratings). Files use the bulk_load.py column names, so an unsplit export loads
+straight back with bulk_load.py.
+
+Parquet needs pyarrow (pip install pyarrow).
+
+Usage:
+    python export.py MoodLog --format parquet --compression zstd --split month --workers 4
+    python export.py UserSession --format csv --compression gzip --split users --parts 8
+    python export.py CounselingSession --format jsonl --since 2024-01-01 --until 2025-01-01
+    python export.py MoodLog --engine sqlite --db bench.db --user-min 1 --user-max 5000
+"""
+
+import argparse
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+
+import config
+import fetch
+from bulk_load import TABLES
+
+EXPORT_BATCH_ROWS = getattr(config, "EXPORT_BATCH_ROWS", 50000)
+EXPORT_DIR = getattr(config, "EXPORT_DIR", "exports")
+
+# FROM clause, the column to split/filter users on and the date to split/filter on
+EXPORTS = {
+    "MoodLog": {
+        "from": "MoodLog",
+        "columns": "userID, logDate, moodLevel",
+        "user": "userID",
+        "date": "logDate",
+    },
+    "CounselingSession": {
+        "from": "CounselingSession",
+        "columns": "sessionID, sessionDate, topic, sessionMode, progressNote, counselorID, groupID",
+        "user": "counselorID",
+        "date": "sessionDate",
+    },
+    # Ratings are dated by their session
+    "UserSession": {
+        "from": "UserSession us JOIN CounselingSession cs ON cs.sessionID = us.sessionID",
+        "columns": "us.userID, us.sessionID, us.rating",
+        "user": "us.userID",
+        "date": "cs.sessionDate",
+    },
+}
+
+FORMATS = ["csv", "jsonl", "parquet"]
+# gzip wraps CSV/JSONL files; Parquet compresses column chunks itself
+COMPRESSIONS = {
+    "csv": ["none", "gzip"],
+    "jsonl": ["none", "gzip"],
+    "parquet": ["none", "snappy", "zstd", "gzip"],
+}
+
+
+# =============================================
+# QUERIES AND PARTITIONS
+# =============================================
+def export_query(table, filters):
+    """(sql, binds) for the rows of table matching filters
+
+    filters: user_min / user_max (inclusive) and since / until (dates,
+    until exclusive); None leaves that side open. undated: only the rows
+    whose date is NULL.
+    """
+    spec = EXPORTS[table]
+    predicates, binds = [], {}
+    for key, op, column in (("user_min", ">=", spec["user"]), ("user_max", "<=", spec["user"])):
+        if filters.get(key) is not None:
+            predicates.append(f"{column} {op} :{key}")
+            binds[key] = filters[key]
+    for key, op in (("since", ">="), ("until", "<")):
+        if filters.get(key) is not None:
+            predicates.append(f"{spec['date']} {op} TO_DATE(:{key}, 'YYYY-MM-DD')")
+            binds[key] = filters[key].strftime("%Y-%m-%d")
+    if filters.get("undated"):
+        predicates.append(f"{spec['date']} IS NULL")
+    where = f" WHERE {' AND '.join(predicates)}" if predicates else ""
+    return f"SELECT {spec['columns']} FROM {spec['from']}{where}", binds
+
+
+def _bounds(conn, table, column):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MIN({EXPORTS[table][column]}), MAX({EXPORTS[table][column]}) "
+                       f"FROM {EXPORTS[table]['from']}")
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _has_undated(conn, table, filters):
+    sql, binds = export_query(table, dict(filters, undated=True))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"{sql} FETCH FIRST 1 ROWS ONLY", binds)
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else pd.Timestamp(value).date()
+
+
+def partitions(conn, table, split="none", parts=4, since=None, until=None, user_min=None, user_max=None):
+    """[(name suffix, filters)] covering the requested rows, one per output file"""
+    base = dict(since=since, until=until, user_min=user_min, user_max=user_max)
+    if split == "none":
+        return [("", base)]
+
+    if split == "users":
+        low, high = _bounds(conn, table, "user")
+        if low is None:
+            return [("", base)]
+        low = max(low, user_min) if user_min is not None else low
+        high = min(high, user_max) if user_max is not None else high
+        step = max(1, -(-(high - low + 1) // parts))
+        return [(f"_users_{lo}-{min(lo + step - 1, high)}",
+                 dict(base, user_min=lo, user_max=min(lo + step - 1, high)))
+                for lo in range(low, high + 1, step)]
+
+    # month / year; rows without a date fall outside every range, so they get
+    # a file of their own unless a date range was asked for
+    result = []
+    if since is None and until is None and _has_undated(conn, table, base):
+        result.append(("_undated", dict(base, undated=True)))
+    if since is None or until is None:
+        first, last = _bounds(conn, table, "date")
+        if first is None:
+            return result or [("", base)]
+        since = since or _as_date(first)
+        until = until or date.fromordinal(_as_date(last).toordinal() + 1)
+    start = since.replace(day=1) if split == "month" else since.replace(month=1, day=1)
+    while start < until:
+        if split == "month":
+            end, label = date(start.year + start.month // 12, start.month % 12 + 1, 1), start.strftime("%Y-%m")
+        else:
+            end, label = date(start.year + 1, 1, 1), str(start.year)
+        result.append((f"_{label}", dict(base, since=max(start, since), until=min(end, until))))
+        start = end
+    return result
+
+
+# =============================================
+# WRITERS (one batch at a time)
+# =============================================
+def _prepare(frame, table):
+    """Table column names and types: dates as dates, nullable ints stay ints"""
+    names = {name.upper(): name for name in TABLES[table]}
+    frame = frame.rename(columns=lambda c: names.get(c.upper(), c))
+    for column, kind in TABLES[table].items():
+        if column not in frame:
+            continue
+        if kind is date:
+            frame[column] = pd.to_datetime(frame[column])
+        elif kind is int:
+            frame[column] = pd.to_numeric(frame[column]).astype("Int64")
+    return frame
+
+
+class TextWriter:
+    """CSV or JSON lines, optionally gzip'd; dates as YYYY-MM-DD"""
+
+    def __init__(self, path, table, fmt, compression):
+        self.table = table
+        self.fmt = fmt
+        self._file = (gzip.open(path, "wt", encoding="utf-8", newline="") if compression == "gzip"
+                      else open(path, "w", encoding="utf-8", newline=""))
+        self._header = True
+
+    def write(self, frame):
+        for column, kind in TABLES[self.table].items():
+            if kind is date and column in frame:
+                frame[column] = frame[column].dt.strftime("%Y-%m-%d")
+        if self.fmt == "csv":
+            frame.to_csv(self._file, header=self._header, index=False)
+            self._header = False
+        else:
+            text = frame.to_json(orient="records", lines=True)
+            self._file.write(text if text.endswith("\n") else text + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """One row group per batch, schema fixed up front from the table definition"""
+
+    def __init__(self, path, table, compression):
+        import pyarrow as pa  # only needed for Parquet output
+        import pyarrow.parquet as pq
+        types = {int: pa.int64(), str: pa.string(), float: pa.float64(), date: pa.date32()}
+        self._pa = pa
+        self.schema = pa.schema([(column, types[kind]) for column, kind in TABLES[table].items()])
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, frame):
+        self._writer.write_table(self._pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+
+def file_name(table, suffix, fmt, compression):
+    ext = ".parquet" if fmt == "parquet" else f".{fmt}" + (".gz" if compression == "gzip" else "")
+    return f"{table}{suffix}{ext}"
+
+
+def export_partition(conn, table, filters, path, fmt="csv", compression="gzip", batch_size=EXPORT_BATCH_ROWS):
+    """Stream one partition to path; returns the row count"""
+    sql, binds = export_query(table, filters)
+    if fmt == "parquet":
+        writer = ParquetWriter(path, table, None if compression == "none" else compression)
+    else:
+        writer = TextWriter(path, table, fmt, compression)
+    rows = 0
+    try:
+        for frame in fetch.iter_frames(conn, sql, binds, batch_size=batch_size):
+            writer.write(_prepare(frame, table))
+            rows += len(frame)
+    finally:
+        writer.close()
+    return rows
+
+
+def export_table(pool, table, out_dir=EXPORT_DIR, fmt="csv", compression="gzip", split="none", parts=4,
+                 since=None, until=None, user_min=None, user_max=None, batch_size=EXPORT_BATCH_ROWS,
+                 workers=4, progress=None):
+    """Export table into out_dir (a subfolder per table when split); [(path, rows, seconds)]"""
+    if compression not in COMPRESSIONS[fmt]:
+        raise ValueError(f"{fmt} supports compression {COMPRESSIONS[fmt]}, not {compression}")
+    with pool.connection() as conn:
+        plan = partitions(conn, table, split, parts, since, until, user_min, user_max)
+    folder = out_dir if split == "none" else os.path.join(out_dir, table)
+    os.makedirs(folder, exist_ok=True)
+
+    def run(part):
+        suffix, filters = part
+        path = os.path.join(folder, file_name(table, suffix, fmt, compression))
+        start = time.perf_counter()
+        with pool.connection() as conn:
+            rows = export_partition(conn, table, filters, path, fmt, compression, batch_size)
+        result = (path, rows, time.perf_counter() - start)
+        if progress:
+            progress(*result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(run, plan))
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def _date_arg(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream MindConnect+ tables to CSV / JSONL / Parquet")
+    parser.add_argument("tables", nargs="+", choices=list(EXPORTS))
+    parser.add_argument("--engine", choices=["oracle", "sqlite"], default="oracle")
+    parser.add_argument("--db", default="mindconnect.db", help="SQLite file (--engine sqlite)")
+    parser.add_argument("--out", default=EXPORT_DIR)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--compression", default="gzip",
+                        help="csv/jsonl: none, gzip; parquet: none, snappy, zstd, gzip")
+    parser.add_argument("--since", type=_date_arg, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=_date_arg, help="end date, exclusive (YYYY-MM-DD)")
+    parser.add_argument("--user-min", type=int)
+    parser.add_argument("--user-max", type=int)
+    parser.add_argument("--split", choices=["none", "month", "year", "users"], default="none",
+                        help="one file per month / year / userID range")
+    parser.add_argument("--parts", type=int, default=8, help="userID ranges for --split users")
+    parser.add_argument("--workers", type=int, default=4, help="partitions exported in parallel")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    if args.engine == "sqlite":
+        import local_engine
+        pool = local_engine.LocalPool(args.db)
+    else:
+        import db
+        pool = db.create_pool(replicas=True)  # read-only: a standby will do
+
+    for table in args.tables:
+        start = time.perf_counter()
+        results = export_table(
+            pool, table, args.out, args.format, args.compression, args.split, args.parts,
+            args.since, args.until, args.user_min, args.user_max, args.batch_size, args.workers,
+            progress=lambda path, rows, seconds: print(f"   {path}: {rows:,} rows in {seconds:.1f}s"))
+        total = sum(rows for _, rows, _ in results)
+        print(f"✅ {table}: {total:,} rows in {len(results)} file(s), {time.perf_counter() - start:.1f}s")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
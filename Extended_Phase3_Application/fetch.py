@@ -0,0 +1,85 @@
+"""
+MindConnect+ Result Fetching
+Builds pandas DataFrames straight from oracledb instead of pd.read_sql
+
+pd.read_sql on a raw DBAPI connection is unsupported by pandas (it warns),
+walks the result one Python tuple at a time and holds both the tuples and
+the frame at peak. With the pinned python-oracledb 3.x and pyarrow, results
+are fetched as Arrow columns and handed to pandas with minimal copying. A
+cursor with a large arraysize/prefetchrows is the fallback for connections
+without fetch_df_all (the SQLite backend) or when pyarrow is missing.
+"""
+
+import pandas as pd
+
+import config
+
+try:
+    import pyarrow
+except ImportError:  # required for Oracle; the cursor path still works without it
+    pyarrow = None
+
+# =============================================
+# FETCH SETTINGS (override in config.py)
+# =============================================
+# Rows per round trip; the oracledb default of 100 means many trips for big grids
+ARRAYSIZE = getattr(config, "FETCH_ARRAYSIZE", 1000)
+# Rows returned with the execute call itself, saving one round trip for small results
+PREFETCHROWS = getattr(config, "FETCH_PREFETCHROWS", 1000)
+
+
+def arrow_available(conn):
+    return pyarrow is not None and hasattr(conn, "fetch_df_all")
+
+
+def _to_pandas(table):
+    # split_blocks/self_destruct let Arrow hand buffers to pandas column by
+    # column instead of consolidating (and doubling) them
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def read_frame_arrow(conn, sql, params=None, arraysize=ARRAYSIZE):
+    """Fetch the whole result as Arrow columns (python-oracledb 3.x)"""
+    odf = conn.fetch_df_all(statement=sql, parameters=params, arraysize=arraysize)
+    return _to_pandas(pyarrow.table(odf))
+
+
+def read_frame_cursor(conn, sql, params=None, arraysize=ARRAYSIZE, prefetchrows=PREFETCHROWS):
+    """Fetch with a tuned cursor and build the frame from the row list"""
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = arraysize
+        cursor.prefetchrows = prefetchrows
+        cursor.execute(sql, params or [])
+        columns = [d[0] for d in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+    finally:
+        cursor.close()
+
+
+def read_frame(conn, sql, params=None, arraysize=ARRAYSIZE):
+    """Run a SELECT and return a DataFrame with upper-case Oracle column names"""
+    if arrow_available(conn):
+        return read_frame_arrow(conn, sql, params, arraysize)
+    return read_frame_cursor(conn, sql, params, arraysize)
+
+
+def iter_frames(conn, sql, params=None, batch_size=ARRAYSIZE):
+    """Yield the result as a sequence of DataFrames of at most batch_size rows"""
+    if arrow_available(conn):
+        for odf in conn.fetch_df_batches(statement=sql, parameters=params, size=batch_size):
+            yield _to_pandas(pyarrow.table(odf))
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = batch_size
+        cursor.prefetchrows = batch_size
+        cursor.execute(sql, params or [])
+        columns = [d[0] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns)
+    finally:
+        cursor.close()
@@ -0,0 +1,336 @@
+"""
+MindConnect+ Synthetic Data Generator
+Deterministic, referentially consistent data at any scale
+
+Every table is produced by its own seeded random stream, so the same seed
+and scale always give the same rows, and tables can be regenerated one at
+a time. Rows are streamed (never held in memory) either into files that
+bulk_load.py understands or straight into the database.
+
+Shape of the data:
+    - support group sizes and session popularity follow a power law
+    - mood logging is bursty: a few heavy loggers, streaks and gaps
+    - UserMatch is sparse (a handful of matches per user)
+
+Usage:
+    python generate_data.py --scale tiny --out data/
+    python generate_data.py --scale large --out data/ --format jsonl --gzip
+    python generate_data.py --scale small --load          # straight into Oracle
+    python generate_data.py --scale small --users 250000 --mood-logs 20000000 --out data/
+"""
+
+import argparse
+import bisect
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import bulk_load
+
+# =============================================
+# SCALE PRESETS
+# =============================================
+SCALES = {
+    "tiny": dict(users=1_000, counselors=20, groups=20, sessions=500, resources=50,
+                 mood_logs=30_000, user_sessions=5_000, matches_per_user=2.0),
+    "small": dict(users=100_000, counselors=500, groups=1_000, sessions=50_000, resources=500,
+                  mood_logs=5_000_000, user_sessions=500_000, matches_per_user=2.0),
+    "large": dict(users=1_000_000, counselors=5_000, groups=10_000, sessions=500_000, resources=5_000,
+                  mood_logs=100_000_000, user_sessions=5_000_000, matches_per_user=2.0),
+}
+
+MOODS = ["Sad", "Anxious", "Stressed", "Neutral", "Calm", "Happy"]
+PRIVACY = (["public", "private", "friends"], [5, 3, 2])
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+               "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil", "Trent", "Uma", "Victor", "Wendy"]
+LAST_NAMES = ["Johnson", "Smith", "Davis", "Wilson", "Martinez", "Chen", "Brown", "Taylor", "Nguyen",
+              "Garcia", "Patel", "Kim", "Lopez", "Clark", "Lewis", "Walker", "Young", "Hall", "Allen", "King"]
+FOCUS_AREAS = ["Anxiety", "Depression", "Stress", "General", "Trauma", "Grief", "Addiction", "Sleep"]
+SPECIALIZATIONS = ["Anxiety and Stress", "Depression", "Trauma and PTSD", "Grief Counseling",
+                   "Addiction", "Family Therapy"]
+TOPICS = ["Managing Anxiety", "Coping with Depression", "Stress Relief Techniques", "Building Resilience",
+          "Trauma Processing", "Mindfulness Practice", "Sleep and Mood", "Healthy Boundaries"]
+RESOURCE_TYPES = (["Article", "Video", "PDF"], [4, 3, 3])
+NOTES = ["Great progress shown", "Needs more support", "Excellent participation",
+         "Making steady progress", "Showing improvement", "Very engaged"]
+
+
+class Scale:
+    """Row counts and date range for one generated dataset"""
+
+    def __init__(self, users, counselors, groups, sessions, resources, mood_logs,
+                 user_sessions, matches_per_user, end_date="2025-06-30", days=730):
+        self.users = users
+        self.counselors = min(counselors, users)
+        self.groups = groups
+        self.sessions = sessions
+        self.resources = resources
+        self.mood_logs = mood_logs
+        self.user_sessions = user_sessions
+        self.matches_per_user = matches_per_user
+        self.end = datetime.strptime(end_date, "%Y-%m-%d")
+        self.days = days
+        self.start = self.end - timedelta(days=days - 1)
+
+    # Counselors are the last N users, so every counselor is also an AppUser
+    @property
+    def first_counselor(self):
+        return self.users - self.counselors + 1
+
+
+# =============================================
+# SAMPLING HELPERS
+# =============================================
+def _rng(seed, table):
+    return random.Random(f"{seed}:{table}")
+
+
+def zipf_weights(n, alpha=1.1):
+    """Cumulative power-law weights over ranks 1..n (rank 1 is the most popular)"""
+    total = 0.0
+    cumulative = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** alpha
+        cumulative.append(total)
+    return cumulative
+
+
+def pick(rng, cumulative):
+    """0-based index drawn from cumulative weights"""
+    return bisect.bisect(cumulative, rng.random() * cumulative[-1])
+
+
+def geometric(rng, mean):
+    return int(rng.expovariate(1.0 / mean)) if mean > 0 else 0
+
+
+def bursty_days(rng, count, days):
+    """count distinct day offsets clustered into streaks separated by gaps"""
+    if count >= days:
+        return list(range(days))
+    if count >= days // 2:
+        return sorted(rng.sample(range(days), count))
+    chosen = set()
+    while len(chosen) < count:
+        start = rng.randrange(days)
+        for d in range(start, min(days, start + 1 + geometric(rng, 5))):
+            chosen.add(d)
+    return sorted(rng.sample(sorted(chosen), count)) if len(chosen) > count else sorted(chosen)
+
+
+# =============================================
+# TABLE GENERATORS (each yields tuples in bulk_load.TABLES column order)
+# =============================================
+def gen_appuser(scale, seed):
+    rng = _rng(seed, "AppUser")
+    for uid in range(1, scale.users + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if uid >= scale.first_counselor:
+            name = "Dr. " + name
+        yield (uid, name, f"user{uid}@example.com", f"hash{rng.randrange(10**6):06d}",
+               rng.choices(*PRIVACY)[0])
+
+
+def gen_counselor(scale, seed):
+    rng = _rng(seed, "Counselor")
+    for uid in range(scale.first_counselor, scale.users + 1):
+        yield (uid, rng.choice(SPECIALIZATIONS), rng.randint(1995, scale.end.year))
+
+
+def gen_supportgroup(scale, seed):
+    rng = _rng(seed, "SupportGroup")
+    for gid in range(1, scale.groups + 1):
+        focus = rng.choice(FOCUS_AREAS)
+        yield (gid, f"{focus} Circle {gid}", focus)
+
+
+def gen_learningresource(scale, seed):
+    rng = _rng(seed, "LearningResource")
+    for rid in range(1, scale.resources + 1):
+        yield (rid, f"{rng.choice(TOPICS)} Guide {rid}", rng.choices(*RESOURCE_TYPES)[0])
+
+
+def gen_moodlog(scale, seed):
+    rng = _rng(seed, "MoodLog")
+    mean_logs = scale.mood_logs / scale.users
+    for uid in range(1, scale.users + 1):
+        # Pareto(1.5) has mean 3: a long tail of heavy loggers around a mean of mean_logs
+        count = min(scale.days, int(round(mean_logs * rng.paretovariate(1.5) / 3)))
+        if count == 0:
+            continue
+        # Each user has a baseline mood mix and tends to stay in the same mood
+        baseline = [rng.random() ** 2 for _ in MOODS]
+        mood = rng.choices(MOODS, baseline)[0]
+        for offset in bursty_days(rng, count, scale.days):
+            if rng.random() > 0.6:
+                mood = rng.choices(MOODS, baseline)[0]
+            yield (uid, scale.start + timedelta(days=offset), mood)
+
+
+def gen_counselingsession(scale, seed):
+    rng = _rng(seed, "CounselingSession")
+    group_weights = zipf_weights(scale.groups)
+    counselor_weights = zipf_weights(scale.counselors, alpha=0.8)
+    for sid in range(1, scale.sessions + 1):
+        yield (sid,
+               scale.start + timedelta(days=rng.randrange(scale.days)),
+               rng.choice(TOPICS),
+               rng.choice(["Online", "In-Person"]),
+               rng.choice(NOTES) if rng.random() < 0.7 else None,
+               scale.first_counselor + pick(rng, counselor_weights),
+               1 + pick(rng, group_weights))
+
+
+def gen_usermatch(scale, seed):
+    rng = _rng(seed, "UserMatch")
+    for u1 in range(1, scale.users):
+        partners = set()
+        for _ in range(geometric(rng, scale.matches_per_user)):
+            # Mostly nearby IDs (same cohort), sometimes anyone
+            if rng.random() < 0.7:
+                u2 = u1 + 1 + geometric(rng, 50)
+            else:
+                u2 = rng.randint(u1 + 1, scale.users)
+            if u2 <= scale.users:
+                partners.add(u2)
+        for u2 in sorted(partners):
+            yield (u1, u2, round(rng.uniform(40, 99.99), 2))
+
+
+def gen_usergroup(scale, seed):
+    rng = _rng(seed, "UserGroup")
+    weights = zipf_weights(scale.groups)
+    for uid in range(1, scale.users + 1):
+        groups = {1 + pick(rng, weights) for _ in range(1 + geometric(rng, 1.0))}
+        for gid in sorted(groups):
+            yield (uid, gid)
+
+
+def gen_usersession(scale, seed):
+    rng = _rng(seed, "UserSession")
+    weights = zipf_weights(scale.sessions, alpha=0.9)
+    mean = scale.user_sessions / scale.users
+    for uid in range(1, scale.users + 1):
+        count = int(round(mean * rng.paretovariate(2.0) / 2))
+        sessions = {1 + pick(rng, weights) for _ in range(count)}
+        for sid in sorted(sessions):
+            rating = rng.choices([1, 2, 3, 4, 5], [1, 1, 3, 6, 8])[0] if rng.random() < 0.7 else None
+            yield (uid, sid, rating)
+
+
+def gen_groupresource(scale, seed):
+    rng = _rng(seed, "GroupResource")
+    weights = zipf_weights(scale.resources)
+    for gid in range(1, scale.groups + 1):
+        for rid in sorted({1 + pick(rng, weights) for _ in range(1 + geometric(rng, 2))}):
+            yield (gid, rid)
+
+
+GENERATORS = {
+    "AppUser": gen_appuser,
+    "Counselor": gen_counselor,
+    "SupportGroup": gen_supportgroup,
+    "LearningResource": gen_learningresource,
+    "MoodLog": gen_moodlog,
+    "CounselingSession": gen_counselingsession,
+    "UserMatch": gen_usermatch,
+    "UserGroup": gen_usergroup,
+    "UserSession": gen_usersession,
+    "GroupResource": gen_groupresource,
+}
+
+
+def generate(table, scale, seed=42):
+    """Stream the rows of one table"""
+    return GENERATORS[table](scale, seed)
+
+
+# =============================================
+# OUTPUT
+# =============================================
+def _text_value(value):
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else value
+
+
+def write_file(path, columns, rows, fmt, compress):
+    """Write rows as CSV or JSONL (optionally gzipped); returns the row count"""
+    raw = gzip.open(path, "wb") if compress else open(path, "wb")
+    count = 0
+    with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(["" if v is None else _text_value(v) for v in row])
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, map(_text_value, row)))) + "\n")
+                count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate MindConnect+ test data")
+    parser.add_argument("--scale", choices=list(SCALES), default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    for name in SCALES["tiny"]:
+        kind = float if name == "matches_per_user" else int
+        parser.add_argument("--" + name.replace("_", "-"), type=kind, help=f"override {name}")
+    parser.add_argument("--end-date", default="2025-06-30")
+    parser.add_argument("--days", type=int, default=730, help="length of the mood/session history")
+    parser.add_argument("--tables", nargs="+", help="only generate these tables")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="directory for generated files")
+    target.add_argument("--load", action="store_true", help="insert directly into Oracle")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for name in params:
+        value = getattr(args, name)
+        if value is not None:
+            params[name] = value
+    scale = Scale(**params, end_date=args.end_date, days=args.days)
+    tables = [t for t in bulk_load.LOAD_ORDER
+              if not args.tables or t.lower() in {x.lower() for x in args.tables}]
+
+    print("=" * 60)
+    print(f"MindConnect+ Data Generator (scale={args.scale}, seed={args.seed})")
+    print("=" * 60)
+
+    conn = None
+    if args.load:
+        import oracledb
+        import config
+        conn = oracledb.connect(user=config.ORACLE_USER, password=config.ORACLE_PASSWORD,
+                                dsn=config.ORACLE_DSN)
+    else:
+        os.makedirs(args.out, exist_ok=True)
+
+    for table in tables:
+        start = time.perf_counter()
+        rows = generate(table, scale, args.seed)
+        if conn is not None:
+            count = bulk_load.load_rows(conn, table, rows, batch_size=args.batch_size).inserted
+        else:
+            ext = "." + args.format + (".gz" if args.gzip else "")
+            path = os.path.join(args.out, table + ext)
+            count = write_file(path, list(bulk_load.TABLES[table]), rows, args.format, args.gzip)
+        elapsed = time.perf_counter() - start
+        print(f"   ✅ {table:18} {count:>12,} rows  {count / elapsed if elapsed else 0:>10,.0f} rows/s")
+
+    if conn is not None:
+        conn.close()
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
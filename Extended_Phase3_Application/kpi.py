@@ -0,0 +1,115 @@
+"""
+MindConnect+ KPI Tiles
+One round trip per page for the headline metrics, with a short TTL cache
+and an optional stats-based "approximate" mode for very large tables
+"""
+
+import threading
+import time
+
+import config
+
+# =============================================
+# KPI SETTINGS (override in config.py)
+# =============================================
+KPI_TTL_S = getattr(config, "KPI_TTL_S", 30)
+# Tables whose exact COUNT(*) is too expensive for a page load, e.g. ["MoodLog"].
+# Their tiles read USER_TABLES.NUM_ROWS first and get exact values in the background.
+APPROXIMATE_TABLES = {t.upper() for t in getattr(config, "KPI_APPROXIMATE_TABLES", [])}
+
+# name -> (table counted, or None for non-count metrics; exact expression)
+METRICS = {
+    "users": ("APPUSER", "(SELECT COUNT(*) FROM AppUser)"),
+    "counselors": ("COUNSELOR", "(SELECT COUNT(*) FROM Counselor)"),
+    "groups": ("SUPPORTGROUP", "(SELECT COUNT(*) FROM SupportGroup)"),
+    "sessions": ("COUNSELINGSESSION", "(SELECT COUNT(*) FROM CounselingSession)"),
+    "mood_logs": ("MOODLOG", "(SELECT COUNT(*) FROM MoodLog)"),
+    "avg_rating": (None, "(SELECT ROUND(AVG(rating), 2) FROM UserSession WHERE rating IS NOT NULL)"),
+}
+
+HOME_METRICS = ("users", "groups", "sessions", "avg_rating")
+ANALYTICS_METRICS = ("users", "counselors", "mood_logs", "avg_rating")
+
+
+def build_query(metrics, approximate_tables=()):
+    """Single SELECT ... FROM DUAL returning every requested metric as a column"""
+    columns = []
+    for name in metrics:
+        table, expr = METRICS[name]
+        if table in approximate_tables:
+            expr = f"(SELECT num_rows FROM USER_TABLES WHERE table_name = '{table}')"
+        columns.append(f"{expr} AS {name}")
+    return "SELECT " + ",\n       ".join(columns) + "\nFROM DUAL"
+
+
+def fetch_kpis(conn, metrics, approximate_tables=()):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(build_query(metrics, approximate_tables))
+        return dict(zip(metrics, cursor.fetchone()))
+    finally:
+        cursor.close()
+
+
+# =============================================
+# SHARED KPI CACHE
+# =============================================
+class KpiCache:
+    """TTL cache of KPI rows shared across sessions
+
+    Exact values are served for ttl seconds. In approximate mode the first
+    hit reads optimizer statistics for the large tables and an exact query
+    runs on a background thread; once it lands, exact values are served and
+    later refreshes happen in the background while the previous value is shown.
+    """
+
+    def __init__(self, pool, ttl=KPI_TTL_S, approximate_tables=APPROXIMATE_TABLES):
+        self.pool = pool
+        self.ttl = ttl
+        self.approximate_tables = set(approximate_tables)
+        self._lock = threading.Lock()
+        self._exact = {}
+        self._refreshing = set()
+
+    def _uses_approximation(self, metrics):
+        return any(METRICS[m][0] in self.approximate_tables for m in metrics)
+
+    def _refresh_exact(self, key):
+        try:
+            with self.pool.connection() as conn:
+                values = fetch_kpis(conn, key)
+            with self._lock:
+                self._exact[key] = (time.monotonic(), values)
+        except Exception:
+            # Keep serving whatever we had; the next page view retries
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh_exact, args=(key,), daemon=True).start()
+
+    def get(self, metrics, conn):
+        """Return (values, approximate) for the given metric names"""
+        key = tuple(metrics)
+        with self._lock:
+            cached = self._exact.get(key)
+        fresh = cached is not None and time.monotonic() - cached[0] < self.ttl
+        if fresh:
+            return cached[1], False
+
+        if not self._uses_approximation(key):
+            values = fetch_kpis(conn, key)
+            with self._lock:
+                self._exact[key] = (time.monotonic(), values)
+            return values, False
+
+        self._refresh_in_background(key)
+        if cached is not None:
+            return cached[1], False
+        return fetch_kpis(conn, key, self.approximate_tables), True
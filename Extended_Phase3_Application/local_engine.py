@@ -0,0 +1,334 @@
+"""
+MindConnect+ Local Stand-in Database
+A SQLite copy of the schema for benchmarks and development without an Oracle server
+
+The tables are created from the Phase 2 DDL scripts (DROP statements, sample
+INSERTs and PL/SQL are skipped), filled with generate_data.py rows and brought
+up to date with the versioned migrations (migrate.py). The
+app's Oracle SQL is run through translate(), which rewrites the handful of
+Oracle-only constructs we use:
+
+    TO_DATE(x, 'YYYY-MM-DD')     -> x   (dates are stored as ISO text)
+    TRUNC(d, 'DD'/'IW'/'MM'/'Q'/'YYYY')  -> date(d, <start of day/week/...>)
+    FETCH FIRST n ROWS ONLY      -> LIMIT n
+    FROM DUAL                    -> (dropped)
+    SYSDATE / TRUNC(SYSDATE)     -> date('now')
+    NVL(a, b)                    -> IFNULL(a, b)
+    ... FOR UPDATE               -> (dropped; SQLite locks the whole file)
+    :1, :2 positional binds      -> ?  (both bind by occurrence)
+
+LocalPool hands out connections that behave like python-oracledb ones
+(named/positional/keyword binds, upper-case column names, DATE columns as
+datetime), so the app can run on this file through repository.py.
+
+Usage:
+    python local_engine.py mindconnect.db --scale tiny
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import aggregates
+import generate_data
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Phase2_DDL_Schema")
+SCHEMA_FILES = ["GroupProjectUpdated.sql", "Summary_Tables.sql", "Indexes.sql"]
+
+# Oracle MERGE backfills (Summary_Tables.sql) rewritten for SQLite
+SUMMARY_BACKFILL = [
+    """
+    INSERT OR REPLACE INTO GroupActivity (groupID, memberCount, sessionCount)
+    SELECT
+        sg.groupID,
+        (SELECT COUNT(*) FROM UserGroup ug WHERE ug.groupID = sg.groupID),
+        (SELECT COUNT(*) FROM CounselingSession cs WHERE cs.groupID = sg.groupID)
+    FROM SupportGroup sg
+    """,
+    """
+    INSERT OR REPLACE INTO CounselorActivity
+        (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+    SELECT
+        c.userID,
+        COUNT(DISTINCT cs.sessionID),
+        COUNT(us.userID),
+        COALESCE(SUM(us.rating), 0),
+        COUNT(us.rating)
+    FROM Counselor c
+    LEFT JOIN CounselingSession cs ON c.userID = cs.counselorID
+    LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+    GROUP BY c.userID
+    """,
+]
+# MoodRollup comes from migration V004, so it is only filled on a migrated database
+MOOD_ROLLUP_BACKFILL = aggregates.STATEMENTS["sqlite"]["backfill_mood_rollup"].format(where="")
+
+
+# =============================================
+# ORACLE -> SQLITE TRANSLATION
+# =============================================
+# Start of the Oracle TRUNC(date, fmt) period as SQLite date() modifiers
+_TRUNC_MODIFIERS = {
+    "DD": "",
+    "IW": ", '-6 days', 'weekday 1'",  # ISO weeks start on Monday
+    "MM": ", 'start of month'",
+    "Q": ", 'start of month', '-' || ((CAST(strftime('%m', {0}) AS INTEGER) - 1) % 3) || ' months'",
+    "YYYY": ", 'start of year'",
+}
+
+
+def _trunc(match):
+    column, fmt = match.group(1), match.group(2).upper()
+    return f"date({column}{_TRUNC_MODIFIERS[fmt].format(column)})"
+
+
+_REWRITES = [
+    (re.compile(r"TRUNC\(\s*([\w.]+)\s*,\s*'(DD|IW|MM|Q|YYYY)'\s*\)", re.I), _trunc),
+    (re.compile(r"TO_DATE\(\s*('[^']*'|:\w+)\s*,\s*'YYYY-MM-DD'\s*\)", re.I), r"\1"),
+    (re.compile(r"FETCH\s+FIRST\s+(\S+)\s+ROWS?\s+ONLY", re.I), r"LIMIT \1"),
+    (re.compile(r"\s+FROM\s+DUAL\b", re.I), ""),
+    (re.compile(r"TRUNC\(\s*SYSDATE\s*\)", re.I), "date('now')"),
+    (re.compile(r"\bSYSDATE\b", re.I), "date('now')"),
+    (re.compile(r"\bNVL\(", re.I), "IFNULL("),
+    (re.compile(r"\s+FOR\s+UPDATE\b", re.I), ""),
+    (re.compile(r"(?<![:\w]):\d+\b"), "?"),
+]
+
+
+def translate(sql):
+    """Rewrite the Oracle-only parts of an app query for SQLite"""
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+# =============================================
+# SCHEMA
+# =============================================
+def _strip_comments(statement):
+    return "\n".join(line for line in statement.splitlines()
+                     if not line.strip().startswith("--")).strip()
+
+
+def schema_statements():
+    """CREATE TABLE / CREATE INDEX statements from the Phase 2 scripts"""
+    statements = []
+    for name in SCHEMA_FILES:
+        with open(os.path.join(SCHEMA_DIR, name), encoding="utf-8") as f:
+            text = f.read()
+        # PL/SQL blocks end with a lone "/" and contain inner semicolons
+        text = re.sub(r"CREATE OR REPLACE TRIGGER.*?\n/\s*\n", "", text, flags=re.S | re.I)
+        for statement in text.split(";"):
+            statement = _strip_comments(statement)
+            if re.match(r"CREATE\s+(TABLE|INDEX)", statement, re.I):
+                statements.append(statement)
+    return statements
+
+
+# =============================================
+# DATABASE
+# =============================================
+def scale(name):
+    return generate_data.Scale(**generate_data.SCALES[name])
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def _sqlite_value(value):
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else value
+
+
+def create_database(path, scale, seed=42, batch_size=10000, progress=None, migrations=True):
+    """Build a fresh SQLite database at path filled with generated data
+
+    migrations=False stops at the Phase 2 schema, for migrate.py to compare
+    query plans before and after applying them.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    indexes = []
+    for statement in schema_statements():
+        if statement.upper().startswith("CREATE INDEX"):
+            indexes.append(statement)  # built after the load
+        else:
+            conn.execute(statement)
+
+    for table in generate_data.GENERATORS:
+        start = time.perf_counter()
+        columns = generate_data.bulk_load.TABLES[table]
+        sql = f"INSERT INTO {table} VALUES ({', '.join('?' for _ in columns)})"
+        count = 0
+        for batch in generate_data.bulk_load.batched(generate_data.generate(table, scale, seed), batch_size):
+            conn.executemany(sql, [tuple(_sqlite_value(v) for v in row) for row in batch])
+            count += len(batch)
+        conn.commit()
+        if progress:
+            progress(table, count, time.perf_counter() - start)
+
+    for statement in indexes:
+        conn.execute(statement)
+    backfill = SUMMARY_BACKFILL
+    if migrations:
+        import migrate  # imports bench_queries, which imports this module
+        migrate.migrate(conn, log=lambda line: None)
+        backfill = SUMMARY_BACKFILL + [MOOD_ROLLUP_BACKFILL]
+    for statement in backfill:
+        conn.execute(statement)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+# =============================================
+# ORACLE-STYLE CONNECTIONS (app backend)
+# =============================================
+# DATE columns come back as datetime and datetimes bind as ISO dates, as with oracledb
+sqlite3.register_converter("DATE", lambda b: datetime.strptime(b.decode()[:10], "%Y-%m-%d"))
+sqlite3.register_adapter(datetime, _sqlite_value)
+
+
+class LocalCursor:
+    """sqlite3 cursor that accepts the app's Oracle SQL and bind styles"""
+
+    dialect = "sqlite"
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.arraysize = 100
+        self.prefetchrows = 2  # accepted for oracledb compatibility, unused
+
+    def execute(self, sql, params=None, **kwargs):
+        self._cursor.execute(translate(sql), kwargs or params or ())
+        return self
+
+    def executemany(self, sql, rows, batcherrors=False):
+        self._cursor.executemany(translate(sql), rows)
+
+    def getbatcherrors(self):
+        return []
+
+    @property
+    def description(self):
+        # Unquoted Oracle identifiers are reported in upper case
+        if self._cursor.description is None:
+            return None
+        return [(d[0].upper(),) + tuple(d[1:]) for d in self._cursor.description]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class LocalConnection:
+    dialect = "sqlite"
+
+    def __init__(self, path, timeout=5.0):
+        self._conn = sqlite3.connect(path, timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+
+    def cursor(self):
+        return LocalCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def cancel(self):
+        """Abort the running statement from another thread, like oracledb's Connection.cancel()"""
+        self._conn.interrupt()
+
+    def close(self):
+        self._conn.close()
+
+
+class LocalPool:
+    """Same interface as db.ConnectionPool; SQLite connections are cheap,
+    so each acquire opens one and release closes it"""
+
+    dialect = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._acquires = 0
+        self._failures = 0
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode = WAL")  # readers don't block the writer
+
+    def acquire(self, primary=False):
+        try:
+            conn = LocalConnection(self.path)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        with self._lock:
+            self._busy += 1
+            self._acquires += 1
+        return conn
+
+    def release(self, conn):
+        conn.close()
+        with self._lock:
+            self._busy -= 1
+
+    @contextmanager
+    def connection(self, primary=False):
+        conn = self.acquire(primary)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            return {"busy": self._busy, "open": self._busy, "min": 0, "max": "-",
+                    "acquires": self._acquires, "acquire_failures": self._failures,
+                    "avg_wait_ms": 0.0, "max_wait_ms": 0.0}
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a local SQLite MindConnect+ database")
+    parser.add_argument("path")
+    parser.add_argument("--scale", choices=list(generate_data.SCALES), default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    create_database(args.path, scale(args.scale), args.seed,
+                    progress=lambda t, n, s: print(f"   ✅ {t:18} {n:>12,} rows  {s:6.1f}s"))
+    print(f"✅ Built {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+MindConnect+ Peer Compatibility Engine
+Nightly batch job that scores user pairs and writes the top matches to UserMatch
+
+Everything is fetched once in bulk and turned into sparse user x feature
+matrices:
+
+    G  user x group     (memberships, rarer groups weigh more)
+    S  user x session   (sessions attended)
+    M  user x mood      (how often each mood level was logged)
+
+Rows are L2-normalized, so for a pair of users
+
+    score = 100 * (w_groups * cos(G) + w_sessions * cos(S) + w_moods * cos(M))
+
+Candidates, and the group/session terms of their scores, come from one
+sparse product per chunk of users (G.Gt and S.St); mood similarity only
+re-ranks them. Groups and sessions with more than MAX_GROUP_SIZE members
+are left out of the products: they would pair everyone in them (the pair
+count grows with the square of the size) while saying little about any
+two members. Each user keeps its top_k partners, and a pair stays if it is
+in the top k of either user. Chunks are scored in parallel processes.
+
+Requires scipy (pip install scipy); numpy comes with pandas.
+
+Settings (config.py):
+    MATCH_WEIGHTS = {"groups": 0.4, "sessions": 0.3, "moods": 0.3}
+    MATCH_TOP_K = 10
+    MATCH_MAX_GROUP_SIZE = 1000
+
+Usage:
+    python match_engine.py --engine sqlite --db bench.db --top-k 10
+    python match_engine.py --engine oracle --workers 8
+    python match_engine.py --engine oracle --upsert
+    python match_engine.py --engine oracle --dry-run
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import config
+import fetch
+
+MATCH_WEIGHTS = getattr(config, "MATCH_WEIGHTS", {"groups": 0.4, "sessions": 0.3, "moods": 0.3})
+MATCH_TOP_K = getattr(config, "MATCH_TOP_K", 10)
+# Larger groups/sessions are not counted as shared (see above)
+MAX_GROUP_SIZE = getattr(config, "MATCH_MAX_GROUP_SIZE", 1000)
+
+USERS_SQL = "SELECT userID FROM AppUser"
+GROUPS_SQL = "SELECT userID, groupID FROM UserGroup"
+SESSIONS_SQL = "SELECT userID, sessionID FROM UserSession"
+MOODS_SQL = "SELECT userID, moodLevel, COUNT(*) AS logs FROM MoodLog GROUP BY userID, moodLevel"
+
+# Each write is stamped with a run number (matchRun, migration V006) so the
+# app's match index can load just the pairs a run changed
+NEXT_RUN_SQL = "SELECT NVL(MAX(matchRun), 0) + 1 FROM UserMatch"
+
+# Written with positional binds (user1ID, user2ID, score, run); user1ID < user2ID.
+# upsert leaves a pair whose score is unchanged alone, run number included.
+STATEMENTS = {
+    "oracle": {
+        "clear": "DELETE FROM UserMatch",  # not TRUNCATE: that is DDL and commits at once
+        "insert": "INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore, matchRun) "
+                  "VALUES (:1, :2, :3, :4)",
+        "upsert": """
+            MERGE INTO UserMatch um
+            USING (SELECT :1 AS user1ID, :2 AS user2ID, :3 AS score, :4 AS run FROM DUAL) src
+            ON (um.user1ID = src.user1ID AND um.user2ID = src.user2ID)
+            WHEN MATCHED THEN UPDATE SET um.compatibilityScore = src.score, um.matchRun = src.run
+                WHERE um.compatibilityScore <> src.score
+            WHEN NOT MATCHED THEN INSERT (user1ID, user2ID, compatibilityScore, matchRun)
+                VALUES (src.user1ID, src.user2ID, src.score, src.run)
+        """,
+    },
+    "sqlite": {
+        "clear": "DELETE FROM UserMatch",
+        "insert": "INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore, matchRun) "
+                  "VALUES (:1, :2, :3, :4)",
+        "upsert": """
+            INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore, matchRun) VALUES (:1, :2, :3, :4)
+            ON CONFLICT (user1ID, user2ID) DO UPDATE
+                SET compatibilityScore = excluded.compatibilityScore, matchRun = excluded.matchRun
+                WHERE compatibilityScore <> excluded.compatibilityScore
+        """,
+    },
+}
+
+
+# =============================================
+# FEATURE MATRICES
+# =============================================
+def _frame(conn, sql, columns):
+    frames = list(fetch.iter_frames(conn, sql, batch_size=50000))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def _normalize_rows(matrix):
+    """L2-normalize each row so row dot products are cosine similarities"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+def _membership(user_ids, frame, column):
+    """Binary user x item matrix from (userID, itemID) rows"""
+    rows = np.searchsorted(user_ids, frame["USERID"].to_numpy())
+    items, cols = np.unique(frame[column].to_numpy(), return_inverse=True)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                             shape=(len(user_ids), len(items)))
+
+
+def _drop_large(matrix, sizes, max_size):
+    """Zero the columns of items with more than max_size members"""
+    return sparse.csr_matrix(matrix.dot(sparse.diags((sizes <= max_size).astype(np.float32))))
+
+
+class Features:
+    """Bulk-fetched, normalized matrices for every user"""
+
+    def __init__(self, conn, max_group_size=MAX_GROUP_SIZE):
+        self.user_ids = np.sort(_frame(conn, USERS_SQL, ["USERID"])["USERID"].to_numpy(np.int64))
+
+        groups = _membership(self.user_ids, _frame(conn, GROUPS_SQL, ["USERID", "GROUPID"]), "GROUPID")
+        group_sizes = np.asarray(groups.sum(axis=0)).ravel()
+        # Inverse-frequency weights: a shared small group means more than a big one
+        groups = _normalize_rows(groups.dot(sparse.diags(1 / np.log(2 + group_sizes))))
+        self.groups = _drop_large(groups, group_sizes, max_group_size)
+
+        sessions = _membership(self.user_ids, _frame(conn, SESSIONS_SQL, ["USERID", "SESSIONID"]), "SESSIONID")
+        session_sizes = np.asarray(sessions.sum(axis=0)).ravel()
+        self.sessions = _drop_large(_normalize_rows(sessions), session_sizes, max_group_size)
+        self.skipped = {"groups": int((group_sizes > max_group_size).sum()),
+                        "sessions": int((session_sizes > max_group_size).sum())}
+
+        # Only a handful of mood levels, so a dense user x mood array
+        moods = _frame(conn, MOODS_SQL, ["USERID", "MOODLEVEL", "LOGS"])
+        rows = np.searchsorted(self.user_ids, moods["USERID"].to_numpy())
+        levels, cols = np.unique(moods["MOODLEVEL"].astype(str).to_numpy(), return_inverse=True)
+        self.moods = _normalize_rows(sparse.csr_matrix(
+            (moods["LOGS"].to_numpy(dtype=np.float32), (rows, cols)),
+            shape=(len(self.user_ids), len(levels)))).toarray()
+
+    def summary(self):
+        return {"users": len(self.user_ids), "memberships": self.groups.nnz,
+                "attendances": self.sessions.nnz, "large_groups_skipped": self.skipped["groups"],
+                "large_sessions_skipped": self.skipped["sessions"]}
+
+
+# =============================================
+# SCORING
+# =============================================
+_worker = {}
+
+
+def _init_worker(features, weights, top_k):
+    _worker.update(features=features, weights=weights, top_k=top_k)
+
+
+def score_chunk(start, stop):
+    """(user1 index, user2 index, score) for the top_k partners of users [start, stop)"""
+    f, w, k = _worker["features"], _worker["weights"], _worker["top_k"]
+
+    # Candidates are the non-zero cells: anyone sharing a group or a session
+    shared = (w["groups"] * f.groups[start:stop].dot(f.groups.T)
+              + w["sessions"] * f.sessions[start:stop].dot(f.sessions.T)).tocoo()
+    rows = shared.row.astype(np.int64) + start
+    cols = shared.col.astype(np.int64)
+    keep = rows != cols
+    rows, cols = rows[keep], cols[keep]
+    if len(rows) == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+
+    moods = np.einsum("ij,ij->i", f.moods[rows], f.moods[cols])
+    score = 100 * (shared.data[keep] + w["moods"] * moods)
+
+    # Top k per user without a Python loop: sort by (user, -score) and rank within user
+    order = np.lexsort((-score, rows))
+    rows, cols, score = rows[order], cols[order], score[order]
+    first = np.searchsorted(rows, rows, side="left")
+    keep = (np.arange(len(rows)) - first) < k
+    return rows[keep], cols[keep], score[keep].astype(np.float32)
+
+
+def compute_matches(features, top_k=MATCH_TOP_K, weights=MATCH_WEIGHTS, chunk_size=5000, workers=None,
+                    progress=None):
+    """DataFrame of USER1ID < USER2ID pairs with COMPATIBILITYSCORE (0-100)"""
+    n = len(features.user_ids)
+    chunks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    parts = []
+
+    def collect(result, done):
+        parts.append(result)
+        if progress:
+            progress(done, len(chunks))
+
+    if (workers or os.cpu_count() or 1) <= 1:
+        _init_worker(features, weights, top_k)
+        for i, chunk in enumerate(chunks, 1):
+            collect(score_chunk(*chunk), i)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(features, weights, top_k)) as pool:
+            for i, result in enumerate(pool.map(score_chunk, *zip(*chunks)), 1):
+                collect(result, i)
+
+    if not parts:
+        return pd.DataFrame(columns=["USER1ID", "USER2ID", "COMPATIBILITYSCORE"])
+    rows = np.concatenate([p[0] for p in parts])
+    cols = np.concatenate([p[1] for p in parts])
+    score = np.concatenate([p[2] for p in parts])
+
+    # A pair kept by both users appears twice; scores are symmetric
+    low, high = np.minimum(rows, cols), np.maximum(rows, cols)
+    _, first = np.unique(low * n + high, return_index=True)
+    return pd.DataFrame({"USER1ID": features.user_ids[low[first]],
+                         "USER2ID": features.user_ids[high[first]],
+                         "COMPATIBILITYSCORE": np.round(score[first].astype(np.float64), 2)})
+
+
+# =============================================
+# WRITE-BACK
+# =============================================
+def write_matches(conn, matches, replace=True, batch_size=5000):
+    """Array-DML the pairs into UserMatch in one transaction, stamped with
+    the next run number. replace clears the table first, so pairs that fell
+    out of every user's top k go; replace=False upserts and keeps them.
+    Readers see the old pairs until the commit."""
+    statements = STATEMENTS[getattr(conn, "dialect", "oracle")]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(NEXT_RUN_SQL)
+        run = cursor.fetchone()[0]
+        if replace:
+            cursor.execute(statements["clear"])
+        sql = statements["insert" if replace else "upsert"]
+        rows = list(zip(matches["USER1ID"].tolist(), matches["USER2ID"].tolist(),
+                        matches["COMPATIBILITYSCORE"].astype(float).tolist(), [run] * len(matches)))
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Score peer compatibility and fill UserMatch")
+    parser.add_argument("--engine", choices=["sqlite", "oracle"], default="oracle")
+    parser.add_argument("--db", default="mindconnect.db", help="SQLite file")
+    parser.add_argument("--top-k", type=int, default=MATCH_TOP_K)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="users scored per task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes")
+    parser.add_argument("--max-group-size", type=int, default=MAX_GROUP_SIZE,
+                        help="groups/sessions with more members don't count as shared")
+    parser.add_argument("--upsert", action="store_true",
+                        help="keep the pairs in UserMatch that this run did not score")
+    parser.add_argument("--dry-run", action="store_true", help="score but don't write")
+    args = parser.parse_args()
+
+    if args.engine == "sqlite":
+        import local_engine
+        pool = local_engine.LocalPool(args.db)
+    else:
+        import db
+        pool = db.create_pool()
+
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        features = Features(conn, args.max_group_size)
+    print(f"✅ Loaded features in {time.perf_counter() - start:.1f}s: {features.summary()}")
+
+    start = time.perf_counter()
+    matches = compute_matches(
+        features, args.top_k, chunk_size=args.chunk_size, workers=args.workers,
+        progress=lambda done, total: print(f"\r   Scored chunk {done}/{total}", end="", flush=True))
+    print(f"\n✅ {len(matches):,} pairs scored in {time.perf_counter() - start:.1f}s "
+          f"(mean score {matches['COMPATIBILITYSCORE'].mean():.1f})")
+
+    if args.dry_run:
+        print(matches.sort_values("COMPATIBILITYSCORE", ascending=False).head(10).to_string(index=False))
+        return
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        written = write_matches(conn, matches, replace=not args.upsert)
+    print(f"✅ Wrote {written:,} matches to UserMatch in {time.perf_counter() - start:.1f}s")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
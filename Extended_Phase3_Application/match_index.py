@@ -0,0 +1,249 @@
+"""
+MindConnect+ Match Index
+In-process top-k peer matches per user, serving "Find My Matches"
+
+UserMatch stores each pair once (user1ID, user2ID), so asking for one
+user's matches means looking on both sides of the pair. The index loads
+the table once, keeps every user's best MATCH_INDEX_TOP_K partners sorted
+by score, and answers a lookup with a dict access and a slice.
+
+match_engine.py stamps the pairs it writes with its run number (matchRun,
+migration V006). Every MATCH_INDEX_POLL_S a background thread looks for
+newer runs and reloads only the users in their pairs (--upsert runs). A
+run that rewrote the whole table (the default) or more than
+MATCH_INDEX_DELTA_MAX_ROWS pairs is loaded with a full rebuild instead, as
+are pairs written or deleted by other tools, every MATCH_INDEX_RELOAD_S.
+Until the first build finishes, lookup() returns None and the caller falls
+back to repository.USER_MATCHES_SQL.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+import fetch
+
+# =============================================
+# INDEX SETTINGS (override in config.py)
+# =============================================
+# Partners kept per user
+MATCH_INDEX_TOP_K = getattr(config, "MATCH_INDEX_TOP_K", 50)
+# Look for new match_engine.py runs this often
+MATCH_INDEX_POLL_S = getattr(config, "MATCH_INDEX_POLL_S", 60)
+# Rebuild from the whole of UserMatch this often, for changes made outside match_engine.py
+MATCH_INDEX_RELOAD_S = getattr(config, "MATCH_INDEX_RELOAD_S", 3600)
+# A run that wrote more pairs than this is loaded with a full rebuild
+MATCH_INDEX_DELTA_MAX_ROWS = getattr(config, "MATCH_INDEX_DELTA_MAX_ROWS", 100000)
+
+PAIRS_SQL = "SELECT user1ID, user2ID, compatibilityScore FROM UserMatch"
+NAMES_SQL = """
+    SELECT userID, userName FROM AppUser
+    WHERE userID IN (SELECT user1ID FROM UserMatch UNION SELECT user2ID FROM UserMatch)
+"""
+LAST_RUN_SQL = "SELECT MAX(matchRun) FROM UserMatch"
+# Pairs of newer runs, and all pairs: equal when a run replaced the table
+CHANGE_COUNT_SQL = "SELECT COUNT(CASE WHEN matchRun > :since THEN 1 END), COUNT(*) FROM UserMatch"
+CHANGED_SQL = "SELECT user1ID, user2ID FROM UserMatch WHERE matchRun > :since"
+# Both sides of the pair, each through its own index (pk_usermatch, idx_usermatch_user2)
+USER_PAIRS_SQL = """
+    SELECT user1ID, user2ID, compatibilityScore FROM UserMatch WHERE user1ID IN ({ids})
+    UNION ALL
+    SELECT user1ID, user2ID, compatibilityScore FROM UserMatch WHERE user2ID IN ({ids})
+"""
+USER_NAMES_SQL = "SELECT userID, userName FROM AppUser WHERE userID IN ({ids})"
+# User IDs bound per IN list (Oracle allows at most 1000)
+ID_CHUNK = 500
+
+COLUMNS = ["MATCHED_USERID", "USERNAME", "COMPATIBILITYSCORE"]
+PAIR_COLUMNS = ["USER1ID", "USER2ID", "COMPATIBILITYSCORE"]
+
+
+def _scalar(conn, sql, params=None):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params or {})
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _pairs(conn, sql, params=None, columns=PAIR_COLUMNS):
+    frames = list(fetch.iter_frames(conn, sql, params, batch_size=50000))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def _in_list(ids):
+    """(":u0, :u1, ...", {"u0": id, ...}) for an IN list of user IDs"""
+    binds = {f"u{i}": int(user_id) for i, user_id in enumerate(ids)}
+    return ", ".join(f":{name}" for name in binds), binds
+
+
+def _adjacency(pairs, top_k):
+    """{userID: [(-score, partnerID), ...] best first} from UserMatch rows"""
+    one, two = pairs["USER1ID"].to_numpy(np.int64), pairs["USER2ID"].to_numpy(np.int64)
+    score = pairs["COMPATIBILITYSCORE"].to_numpy(np.float64)
+
+    # Each pair once per direction, sorted by (user, best score first)
+    users = np.concatenate([one, two])
+    partners = np.concatenate([two, one])
+    keys = -np.concatenate([score, score])
+    order = np.lexsort((partners, keys, users))
+    users, partners, keys = users[order], partners[order], keys[order]
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]]) if len(users) else np.empty(0, np.int64)
+    ends = np.r_[starts[1:], len(users)]
+
+    adjacency = {}
+    for user, start, end in zip(users[starts].tolist(), starts.tolist(), ends.tolist()):
+        end = min(end, start + top_k)
+        adjacency[user] = list(zip(keys[start:end].tolist(), partners[start:end].tolist()))
+    return adjacency
+
+
+def last_run(conn):
+    """Newest match_engine.py run in UserMatch (0 when there is none)"""
+    return _scalar(conn, LAST_RUN_SQL)[0] or 0
+
+
+def build(conn, top_k=MATCH_INDEX_TOP_K):
+    """(adjacency, {userID: userName}, run) for the whole table"""
+    # Read before the pairs: a run committed in between is loaded again by the next poll
+    run = last_run(conn)
+    adjacency = _adjacency(_pairs(conn, PAIRS_SQL), top_k)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(NAMES_SQL)
+        names = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+    return adjacency, names, run
+
+
+def changes(conn, since, top_k=MATCH_INDEX_TOP_K, max_rows=MATCH_INDEX_DELTA_MAX_ROWS):
+    """(lists, names, run) for the users in pairs of runs after since
+
+    lists replaces those users' entries (an empty list: no matches left).
+    None when a full rebuild is cheaper or needed: more than max_rows pairs
+    changed, or a run rewrote every pair and may have deleted some.
+    """
+    run = last_run(conn)
+    if run <= since:
+        return {}, {}, since
+    changed, total = _scalar(conn, CHANGE_COUNT_SQL, {"since": since})
+    if changed > max_rows or changed == total:
+        return None
+
+    pairs = _pairs(conn, CHANGED_SQL, {"since": since}, columns=PAIR_COLUMNS[:2])
+    touched = np.unique(np.concatenate([pairs["USER1ID"].to_numpy(np.int64),
+                                        pairs["USER2ID"].to_numpy(np.int64)])).tolist()
+    frames = []
+    for start in range(0, len(touched), ID_CHUNK):
+        ids, binds = _in_list(touched[start:start + ID_CHUNK])
+        frames.append(_pairs(conn, USER_PAIRS_SQL.format(ids=ids), binds))
+    # A pair between two touched users comes back from both sides
+    pairs = pd.concat(frames, ignore_index=True).drop_duplicates(["USER1ID", "USER2ID"])
+    adjacency = _adjacency(pairs, top_k)
+    lists = {user: adjacency.get(user, []) for user in touched}
+
+    partners = sorted({partner for entries in lists.values() for _, partner in entries})
+    names = {}
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(partners), ID_CHUNK):
+            ids, binds = _in_list(partners[start:start + ID_CHUNK])
+            cursor.execute(USER_NAMES_SQL.format(ids=ids), binds)
+            names.update(cursor.fetchall())
+    finally:
+        cursor.close()
+    return lists, names, run
+
+
+class MatchIndex:
+    """Shared, thread-safe adjacency lists kept up to date in the background"""
+
+    def __init__(self, pool, top_k=MATCH_INDEX_TOP_K, reload_interval=MATCH_INDEX_RELOAD_S,
+                 poll_interval=MATCH_INDEX_POLL_S, delta_max_rows=MATCH_INDEX_DELTA_MAX_ROWS):
+        self.pool = pool
+        self.top_k = top_k
+        self.reload_interval = reload_interval
+        self.poll_interval = poll_interval
+        self.delta_max_rows = delta_max_rows
+        self._lock = threading.Lock()
+        self._adjacency = None
+        self._names = {}
+        self._run = 0
+        self._loaded_at = 0.0
+        self._polled_at = 0.0
+        self._loading = False
+        self.updates = 0
+        self.last_error = None
+
+    # -----------------------------------------
+    # Loading
+    # -----------------------------------------
+    def _load(self, full):
+        try:
+            with self.pool.connection() as conn:
+                # Only this thread changes _run, and only one load runs at a time
+                delta = None if full else changes(conn, self._run, self.top_k, self.delta_max_rows)
+                if delta is None:
+                    adjacency, names, run = build(conn, self.top_k)
+            with self._lock:
+                if delta is None:
+                    self._adjacency, self._names = adjacency, names
+                    self._loaded_at = time.monotonic()
+                else:
+                    lists, names, run = delta
+                    self._adjacency.update(lists)
+                    self._names.update(names)
+                    self.updates += bool(lists)
+                self._run = run
+                self._polled_at = time.monotonic()
+                self.last_error = None
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def refresh(self, force=False):
+        """Start a background rebuild when cold, stale or forced, or a poll for new runs when due"""
+        with self._lock:
+            if self._loading:
+                return
+            now = time.monotonic()
+            full = (self._adjacency is None
+                    or force or now - self._loaded_at >= self.reload_interval)
+            if not full and now - self._polled_at < self.poll_interval:
+                return
+            self._loading = True
+        threading.Thread(target=self._load, args=(full,), name="match-index", daemon=True).start()
+
+    @property
+    def warm(self):
+        return self._adjacency is not None
+
+    # -----------------------------------------
+    # Reading
+    # -----------------------------------------
+    def lookup(self, user_id, limit=None):
+        """DataFrame of the user's best matches, or None while the index is cold"""
+        self.refresh()
+        with self._lock:
+            if self._adjacency is None:
+                return None
+            entries = self._adjacency.get(user_id, [])[:limit or self.top_k]
+            rows = [(partner, self._names.get(partner), -key) for key, partner in entries]
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def stats(self):
+        with self._lock:
+            lists = self._adjacency or {}
+            return {"warm": self._adjacency is not None, "users": len(lists),
+                    "entries": sum(len(v) for v in lists.values()), "run": self._run,
+                    "updates": self.updates,
+                    "age_s": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+                    "loading": self._loading, "error": self.last_error}
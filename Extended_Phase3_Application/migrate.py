@@ -0,0 +1,370 @@
+"""
+MindConnect+ Schema Migrations
+Versioned index/constraint changes with an EXPLAIN PLAN check of the app queries
+
+Migrations live in Phase2_DDL_Schema/migrations as V<nnn>__<description>.sql
+and are applied in version order. Applied versions are recorded in the
+SCHEMA_VERSION table; a statement whose object already exists (an index
+created by hand from Indexes.sql, a re-run after a failure) counts as
+applied, so running the tool twice is harmless.
+
+Before and after applying, every query in the bench_queries.py catalog is
+explained (EXPLAIN PLAN on Oracle, EXPLAIN QUERY PLAN on SQLite). The plans
+are written to migrate_results/ and the run fails if a HOT_QUERIES entry
+still plans a full scan of a large table.
+
+Usage:
+    python migrate.py status --engine sqlite --db bench.db
+    python migrate.py up --engine sqlite --db bench.db --scale small
+    python migrate.py up --engine oracle
+    python migrate.py verify --engine oracle          # plan check only
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+import config
+import bench_queries
+import generate_data
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Phase2_DDL_Schema",
+                              "migrations")
+
+# Tables with at least this many rows count as large for the plan check
+LARGE_TABLE_ROWS = getattr(config, "MIGRATE_LARGE_TABLE_ROWS", 10000)
+
+# Selective queries (one user, group, session, ...) that must reach large
+# tables through an index; catalog names from bench_queries.QUERIES
+HOT_QUERIES = getattr(config, "MIGRATE_HOT_QUERIES", [
+    "app_user_search", "app_user_by_id", "app_mood_history", "app_mood_range", "app_mood_timeline_month",
+    "app_mood_analytics", "app_mood_periods", "app_similar_moods",
+    "app_my_groups", "app_rate_session_list", "app_find_matches", "app_my_resources",
+    "s10_group_members", "s12_group_statistics", "s15_group_sessions", "s18_session_history",
+    "s20_counselor_summary", "s24_shared_groups", "s27_my_resources", "s29_user_dashboard",
+    "s31_needs_intervention",
+])
+# SQLite cannot drive LIKE through an expression index such as UPPER(userName)
+ORACLE_ONLY_HOT_QUERIES = {"app_user_search"}
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE SCHEMA_VERSION (
+        version NUMBER(6) PRIMARY KEY,
+        description VARCHAR2(200) NOT NULL,
+        checksum VARCHAR2(64) NOT NULL,
+        appliedAt DATE NOT NULL
+    )
+"""
+
+# "Object already exists" errors: name in use, column list already indexed,
+# table already has a primary/unique key, constraint exists, column exists
+_ALREADY_EXISTS = re.compile(r"ORA-0(0955|1408|2260|2261|2264|2275|1430)\b|already exists|duplicate column name",
+                             re.I)
+
+
+# =============================================
+# MIGRATION FILES
+# =============================================
+class Migration:
+    def __init__(self, path):
+        name = os.path.basename(path)
+        match = re.match(r"V(\d+)__(.+)\.sql$", name)
+        if not match:
+            raise ValueError(f"Bad migration file name: {name} (expected V<nnn>__<description>.sql)")
+        self.version = int(match.group(1))
+        self.description = match.group(2).replace("_", " ")
+        with open(path, encoding="utf-8") as f:
+            self.text = f.read()
+        self.checksum = hashlib.sha256(self.text.replace("\r\n", "\n").encode()).hexdigest()
+
+    def statements(self):
+        """Statements without comments; DDL only, so splitting on ';' is safe"""
+        for statement in self.text.split(";"):
+            statement = "\n".join(line for line in statement.splitlines()
+                                  if not line.strip().startswith("--")).strip()
+            if statement:
+                yield statement
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    migrations = [Migration(os.path.join(directory, name))
+                  for name in os.listdir(directory) if name.endswith(".sql")]
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+# =============================================
+# APPLYING
+# =============================================
+def _run_ddl(conn, sql):
+    """Execute one DDL statement; False if the object already existed"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        return True
+    except Exception as e:
+        if _ALREADY_EXISTS.search(str(e)):
+            return False
+        raise
+    finally:
+        cursor.close()
+
+
+def applied_versions(conn):
+    """{version: checksum} from SCHEMA_VERSION (created on first use)"""
+    _run_ddl(conn, SCHEMA_VERSION_DDL)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version, checksum FROM SCHEMA_VERSION")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def pending(conn, migrations, target=None):
+    applied = applied_versions(conn)
+    for m in migrations:
+        if m.version in applied and applied[m.version] != m.checksum:
+            print(f"   ⚠️  V{m.version:03d} was edited after it was applied; add a new migration instead")
+    return [m for m in migrations
+            if m.version not in applied and (target is None or m.version <= target)]
+
+
+def apply(conn, migration, log=print):
+    """Run one migration and record it; DDL auto-commits on Oracle"""
+    for sql in migration.statements():
+        created = _run_ddl(conn, sql)
+        log(f"      {'✅' if created else '↩️ '} {' '.join(sql.split())[:90]}"
+            f"{'' if created else '  (already exists)'}")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT INTO SCHEMA_VERSION (version, description, checksum, appliedAt) "
+                       "VALUES (:version, :description, :checksum, :applied_at)",
+                       dict(version=migration.version, description=migration.description,
+                            checksum=migration.checksum, applied_at=datetime.now()))
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def migrate(conn, migrations=None, target=None, log=print):
+    """Apply every pending migration (up to target); returns the versions applied"""
+    todo = pending(conn, migrations or load_migrations(), target)
+    for m in todo:
+        log(f"   V{m.version:03d} {m.description}")
+        apply(conn, m, log)
+    return [m.version for m in todo]
+
+
+# =============================================
+# QUERY PLANS
+# =============================================
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_NOT_ALIAS = {"ON", "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "GROUP", "ORDER",
+              "UNION", "FETCH", "USING", "AND", "OR"}
+
+
+def table_aliases(sql):
+    """{ALIAS: TABLE} (and TABLE: TABLE) for the FROM/JOIN items of a statement"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table.upper()] = table.upper()
+        if alias and alias.upper() not in _NOT_ALIAS:
+            aliases[alias.upper()] = table.upper()
+    return aliases
+
+
+class OraclePlanner:
+    """EXPLAIN PLAN into PLAN_TABLE; bind values are not needed"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._ids = 0
+
+    def explain(self, sql, params):
+        self._ids += 1
+        statement_id = f"mc_migrate_{self._ids}"
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}")
+            cursor.execute("""
+                SELECT LPAD(' ', 2 * depth) || operation || NVL2(options, ' ' || options, ''),
+                       object_name, object_type, operation, options
+                FROM plan_table
+                WHERE statement_id = :sid
+                ORDER BY id
+            """, sid=statement_id)
+            steps = []
+            for text, obj, obj_type, operation, options in cursor.fetchall():
+                full = operation == "TABLE ACCESS" and "FULL" in (options or "")
+                steps.append({"step": f"{text} {obj or ''}".rstrip(),
+                              "table": obj if obj_type == "TABLE" or full else None,
+                              "full_scan": full})
+            cursor.execute("DELETE FROM plan_table WHERE statement_id = :sid", sid=statement_id)
+            self.conn.commit()
+            return steps
+        finally:
+            cursor.close()
+
+
+class SqlitePlanner:
+    """EXPLAIN QUERY PLAN; SQLite reports aliases, mapped back to tables"""
+
+    _SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def explain(self, sql, params):
+        aliases = table_aliases(sql)
+        rows = self.conn.execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+        depth = {0: -1}
+        steps = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            match = self._SCAN.match(detail)
+            table = None
+            if match:
+                name = (match.group(2) or match.group(1)).upper()
+                table = aliases.get(name, name)
+            steps.append({"step": "  " * depth[node] + detail, "table": table, "full_scan": table is not None})
+        return steps
+
+
+def capture_plans(target, conn, binds, names=None):
+    """{query name: [plan steps]} for every read in the catalog (writes are skipped)"""
+    planner = OraclePlanner(conn) if target.name == "oracle" else SqlitePlanner(conn)
+    plans = {}
+    for name, entry in bench_queries.QUERIES.items():
+        if entry["write"] or (names is not None and name not in names):
+            continue
+        try:
+            plans[name] = planner.explain(target.prepare(entry["sql"], entry),
+                                          bench_queries.bind_values(entry, binds))
+        except Exception as e:
+            plans[name] = {"error": str(e).splitlines()[0]}
+    return plans
+
+
+def large_tables(counts, threshold=LARGE_TABLE_ROWS):
+    return {table.upper() for table, rows in counts.items() if rows >= threshold}
+
+
+def full_scan_violations(plans, large, engine, hot=HOT_QUERIES):
+    """[(query, table)] where a hot query full-scans a large table"""
+    violations = []
+    for name in hot:
+        if engine != "oracle" and name in ORACLE_ONLY_HOT_QUERIES:
+            continue
+        steps = plans.get(name)
+        if not isinstance(steps, list):
+            continue
+        for table in sorted({s["table"].upper() for s in steps if s["full_scan"] and s["table"]}):
+            if table in large:
+                violations.append((name, table))
+    return violations
+
+
+def print_plan_changes(before, after):
+    changed = 0
+    for name, steps in after.items():
+        if before.get(name) == steps or not isinstance(steps, list):
+            continue
+        changed += 1
+        print(f"\n   {name}")
+        old = [s["step"] for s in before.get(name) or [] if isinstance(before.get(name), list)]
+        for line in difflib.ndiff(old, [s["step"] for s in steps]):
+            if line[0] in "-+":
+                print(f"      {line}")
+    print(f"\n   {changed} of {len(after)} query plans changed")
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Apply MindConnect+ schema migrations")
+    parser.add_argument("command", choices=["status", "up", "verify"])
+    parser.add_argument("--engine", choices=["sqlite", "oracle"], default="sqlite")
+    parser.add_argument("--db", default="bench.db", help="SQLite file (built if missing)")
+    parser.add_argument("--scale", choices=list(generate_data.SCALES), default="tiny")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", type=int, help="apply migrations up to this version only")
+    parser.add_argument("--large-rows", type=int, default=LARGE_TABLE_ROWS,
+                        help="tables with at least this many rows must not be full-scanned")
+    parser.add_argument("--output", help="plan JSON (default migrate_results/plans_<engine>_<time>.json)")
+    args = parser.parse_args()
+
+    if args.engine == "sqlite":
+        target = bench_queries.SqliteTarget(args.db)
+        if not os.path.exists(args.db):
+            print(f"Building {args.db} at scale '{args.scale}'...")
+            target.local_engine.create_database(args.db, generate_data.Scale(**generate_data.SCALES[args.scale]),
+                                                args.seed, migrations=False)
+    else:
+        target = bench_queries.OracleTarget()
+
+    migrations = load_migrations()
+    conn = target.connect()
+    try:
+        todo = pending(conn, migrations, args.target)
+        if args.command == "status":
+            done = {m.version for m in migrations} - {m.version for m in todo}
+            for m in migrations:
+                print(f"   {'✅' if m.version in done else '⏳'} V{m.version:03d} {m.description}")
+            return
+
+        binds = bench_queries.resolve_binds(target, conn)
+        large = large_tables(bench_queries.dataset_counts(target, conn), args.large_rows)
+        report = {"engine": target.name, "started": datetime.now().isoformat(timespec="seconds"),
+                  "large_tables": sorted(large)}
+
+        if args.command == "up":
+            report["before"] = capture_plans(target, conn, binds)
+            if todo:
+                print(f"Applying {len(todo)} migration(s)...")
+                for m in todo:
+                    print(f"   V{m.version:03d} {m.description}")
+                    apply(conn, m)
+            else:
+                print("✅ Schema is up to date")
+            if target.name == "sqlite":
+                conn.execute("ANALYZE")  # let the planner see the new indexes' statistics
+        report["after"] = capture_plans(target, conn, binds)
+        report["applied"] = [m.version for m in todo] if args.command == "up" else []
+    finally:
+        conn.close()
+
+    if args.command == "up":
+        print_plan_changes(report["before"], report["after"])
+
+    violations = full_scan_violations(report["after"], large, target.name)
+    report["violations"] = [{"query": q, "table": t} for q, t in violations]
+    output = args.output or os.path.join(
+        "migrate_results", f"plans_{target.name}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n✅ Plans written to {output}")
+
+    errors = [name for name, steps in report["after"].items() if not isinstance(steps, list)]
+    for name in errors:
+        print(f"   ⚠️  Could not explain {name}: {report['after'][name]['error']}")
+    if violations:
+        print(f"❌ {len(violations)} hot query full scan(s) of large tables:")
+        for name, table in violations:
+            print(f"   {name:28} FULL SCAN {table}")
+        sys.exit(1)
+    print(f"✅ No hot query full-scans a large table ({', '.join(sorted(large)) or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+MindConnect+ Keyset Pagination
+Server-side paging, sorting and filtering for the large table views
+
+Instead of loading a whole table and shipping it to the browser, each page
+is fetched with
+
+    SELECT * FROM (<base query>)
+    WHERE <filters> AND (<sort key, unique key>) > (<last row seen>)
+    ORDER BY <sort key>, <unique key>
+    FETCH FIRST :page_size + 1 ROWS ONLY
+
+so memory and transfer are bounded by the page size, and page N costs the
+same as page 1 (no OFFSET scan). The extra row tells us whether there is a
+next page.
+"""
+
+import fetch
+import refdata
+
+
+class KeysetGrid:
+    """A paginated view over a base SELECT
+
+    key       -- column(s) that make a row unique, used as the tie-breaker
+    sorts     -- {label: (column, descending)} the user can pick from; sort
+                 columns must be NOT NULL for keyset comparisons to hold, so
+                 nullable ones are sorted on an NVL() of them from the base SELECT
+    filters   -- {label: (column, mode)} with mode "prefix" (matched literally,
+                 ignoring case) or "equals"
+    columns   -- columns to display (key columns may be hidden)
+    """
+
+    def __init__(self, name, base_sql, key, sorts, filters, columns):
+        self.name = name
+        self.base_sql = base_sql
+        self.key = list(key)
+        self.sorts = sorts
+        self.filters = filters
+        self.columns = columns
+
+    # -----------------------------------------
+    # SQL building
+    # -----------------------------------------
+    def _order(self, sort):
+        column, descending = self.sorts[sort]
+        order = [(column, descending)]
+        order += [(k, descending) for k in self.key if k != column]
+        return order
+
+    def _where(self, filter_values, binds):
+        clauses = []
+        for i, (label, value) in enumerate(sorted(filter_values.items())):
+            if value in (None, ""):
+                continue
+            column, mode = self.filters[label]
+            if mode == "prefix":
+                binds[f"f{i}"] = refdata.like_prefix(str(value).upper())
+                clauses.append(f"UPPER({column}) LIKE :f{i} ESCAPE '\\'")
+            else:
+                binds[f"f{i}"] = value
+                clauses.append(f"{column} = :f{i}")
+        return clauses
+
+    @staticmethod
+    def _after(order, last_row, binds):
+        """Lexicographic (c1, c2, ...) > (v1, v2, ...) honouring each direction"""
+        alternatives = []
+        for i, (column, descending) in enumerate(order):
+            terms = [f"{order[j][0]} = :k{j}" for j in range(i)]
+            terms.append(f"{column} {'<' if descending else '>'} :k{i}")
+            alternatives.append("(" + " AND ".join(terms) + ")")
+        for i, (column, _) in enumerate(order):
+            binds[f"k{i}"] = last_row[column]
+        return "(" + " OR ".join(alternatives) + ")"
+
+    def page_query(self, sort, filter_values, page_size, last_row=None):
+        binds = {}
+        order = self._order(sort)
+        clauses = self._where(filter_values, binds)
+        if last_row is not None:
+            clauses.append(self._after(order, last_row, binds))
+        binds["n"] = page_size + 1
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        order_by = ", ".join(f"{c} {'DESC' if d else 'ASC'}" for c, d in order)
+        sql = (f"SELECT * FROM ({self.base_sql}) g\n{where}\n"
+               f"ORDER BY {order_by}\nFETCH FIRST :n ROWS ONLY")
+        return sql, binds
+
+    def count_query(self, filter_values):
+        binds = {}
+        clauses = self._where(filter_values, binds)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        return f"SELECT COUNT(*) FROM ({self.base_sql}) g\n{where}", binds
+
+    # -----------------------------------------
+    # Fetching
+    # -----------------------------------------
+    def fetch_page(self, conn, sort, filter_values, page_size, last_row=None, read=fetch.read_frame):
+        """Return (DataFrame of at most page_size rows, has_next, last_row_key)
+
+        read(conn, sql, binds) runs the page query.
+        """
+        sql, binds = self.page_query(sort, filter_values, page_size, last_row)
+        df = read(conn, sql, binds)
+        has_next = len(df) > page_size
+        df = df.iloc[:page_size]
+        last = None
+        if not df.empty:
+            last = {c: _plain(df.iloc[-1][c]) for c in self.cursor_columns(sort)}
+        return df, has_next, last
+
+    def cursor_columns(self, sort):
+        """Columns of the last_row key fetch_page returns and takes back"""
+        return [column for column, _ in self._order(sort)]
+
+    def count(self, conn, filter_values):
+        sql, binds = self.count_query(filter_values)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, binds)
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+
+def _plain(value):
+    """numpy/pandas scalars -> Python values oracledb can bind"""
+    if hasattr(value, "to_pydatetime"):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+# =============================================
+# GRIDS USED BY THE APP
+# =============================================
+USERS_GRID = KeysetGrid(
+    name="users",
+    base_sql="SELECT userID, userName, email, privacySetting, NVL(userName, ' ') AS sortName FROM AppUser",
+    key=["USERID"],
+    sorts={"User ID": ("USERID", False), "Name": ("SORTNAME", False)},
+    filters={"Name starts with": ("USERNAME", "prefix"),
+             "Email starts with": ("EMAIL", "prefix"),
+             "Privacy": ("PRIVACYSETTING", "equals")},
+    columns=["USERID", "USERNAME", "EMAIL", "PRIVACYSETTING"],
+)
+
+SESSIONS_GRID = KeysetGrid(
+    name="sessions",
+    base_sql="""
+        SELECT
+            cs.sessionID,
+            cs.sessionDate,
+            NVL(cs.sessionDate, TO_DATE('1900-01-01', 'YYYY-MM-DD')) AS sortDate,
+            cs.topic,
+            cs.sessionMode,
+            u.userName as counselor,
+            sg.groupName
+        FROM CounselingSession cs
+        JOIN Counselor c ON cs.counselorID = c.userID
+        JOIN AppUser u ON c.userID = u.userID
+        JOIN SupportGroup sg ON cs.groupID = sg.groupID
+    """,
+    key=["SESSIONID"],
+    sorts={"Newest first": ("SORTDATE", True), "Oldest first": ("SORTDATE", False),
+           "Session ID": ("SESSIONID", False)},
+    filters={"Topic starts with": ("TOPIC", "prefix"),
+             "Mode": ("SESSIONMODE", "equals"),
+             "Group starts with": ("GROUPNAME", "prefix")},
+    columns=["SESSIONID", "SESSIONDATE", "TOPIC", "SESSIONMODE", "COUNSELOR", "GROUPNAME"],
+)
+
+MATCHES_GRID = KeysetGrid(
+    name="matches",
+    base_sql="""
+        SELECT
+            um.user1ID,
+            um.user2ID,
+            u1.userName as user1,
+            u2.userName as user2,
+            um.compatibilityScore
+        FROM UserMatch um
+        JOIN AppUser u1 ON um.user1ID = u1.userID
+        JOIN AppUser u2 ON um.user2ID = u2.userID
+        WHERE um.compatibilityScore IS NOT NULL
+    """,
+    key=["USER1ID", "USER2ID"],
+    sorts={"Best matches first": ("COMPATIBILITYSCORE", True),
+           "Lowest scores first": ("COMPATIBILITYSCORE", False)},
+    filters={"User 1 starts with": ("USER1", "prefix"),
+             "User 2 starts with": ("USER2", "prefix")},
+    columns=["USER1", "USER2", "COMPATIBILITYSCORE"],
+)
+
+# One user's mood log, newest first; the app always pins the "User" filter,
+# so every page is a range scan of pk_moodlog (userID, logDate)
+MOOD_HISTORY_GRID = KeysetGrid(
+    name="mood_history",
+    base_sql="SELECT userID, logDate, moodLevel FROM MoodLog",
+    key=["USERID", "LOGDATE"],
+    sorts={"Newest first": ("LOGDATE", True),
+           "Oldest first": ("LOGDATE", False)},
+    filters={"User": ("USERID", "equals"),
+             "Mood": ("MOODLEVEL", "equals")},
+    columns=["LOGDATE", "MOODLEVEL"],
+)
+
@@ -86,13 +86,13 @@ INSERT INTO LearningResource VALUES (307, 'Crisis Helpline Numbers', 'Article');
 INSERT INTO LearningResource VALUES (308, 'Journaling for Mental Health', 'PDF');
 
 -- USER MATCH DATA
-INSERT INTO UserMatch VALUES (1, 2, 85.5);
-INSERT INTO UserMatch VALUES (1, 3, 72.0);
-INSERT INTO UserMatch VALUES (1, 4, 90.0);
-INSERT INTO UserMatch VALUES (2, 3, 65.0);
-INSERT INTO UserMatch VALUES (2, 5, 88.0);
-INSERT INTO UserMatch VALUES (3, 4, 78.5);
-INSERT INTO UserMatch VALUES (4, 5, 82.0);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (1, 2, 85.5);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (1, 3, 72.0);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (1, 4, 90.0);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (2, 3, 65.0);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (2, 5, 88.0);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (3, 4, 78.5);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (4, 5, 82.0);
 
 -- USER GROUP DATA
 INSERT INTO UserGroup VALUES (1, 101);
@@ -0,0 +1,186 @@
+"""
+MindConnect+ Query Result Cache
+DataFrames of the app's repeated SELECTs, dropped when a table they read is written
+
+Entries are keyed by the SQL fingerprint plus the bind values and tagged
+with the tables the SQL reads. They are evicted least recently used first
+once there are more than QUERY_CACHE_MAX_ENTRIES or they take more than
+QUERY_CACHE_MAX_MB, and expire after QUERY_CACHE_TTL_S, which bounds how
+stale a result can get from writes made outside the app (batch jobs,
+other app processes).
+
+Writes made through the app (Repository and write_queue.py) run on a
+WriteRecorder cursor that notes the tables each INSERT / UPDATE / MERGE /
+DELETE touches, including the summary tables maintained by aggregates.py;
+after the commit only the entries tagged with one of those tables are
+dropped. A result whose query started before an invalidation of one of its
+tables (or within settle_s after it, for replicas that apply writes late)
+is returned but not stored.
+
+Settings (config.py):
+    QUERY_CACHE_ENABLED = True
+    QUERY_CACHE_TTL_S = 60
+    QUERY_CACHE_MAX_ENTRIES = 512
+    QUERY_CACHE_MAX_MB = 64
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import config
+import fetch
+
+QUERY_CACHE_ENABLED = getattr(config, "QUERY_CACHE_ENABLED", True)
+QUERY_CACHE_TTL_S = getattr(config, "QUERY_CACHE_TTL_S", 60)
+QUERY_CACHE_MAX_ENTRIES = getattr(config, "QUERY_CACHE_MAX_ENTRIES", 512)
+QUERY_CACHE_MAX_MB = getattr(config, "QUERY_CACHE_MAX_MB", 64)
+
+# Every table in the schema (Phase2_DDL_Schema), upper case
+TABLES = {"APPUSER", "COUNSELOR", "SUPPORTGROUP", "LEARNINGRESOURCE", "MOODLOG", "COUNSELINGSESSION",
+          "USERMATCH", "PEERMATCH", "USERGROUP", "USERSESSION", "GROUPRESOURCE", "GROUPMEMBERSHIP",
+          "FEEDBACK", "GROUPACTIVITY", "COUNSELORACTIVITY", "MOODROLLUP", "SIMILARMOOD"}
+
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+_DML = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|MERGE\s+INTO|DELETE\s+FROM)\s+(\w+)", re.IGNORECASE)
+
+
+# =============================================
+# FINGERPRINTS AND TAGS
+# =============================================
+def fingerprint(sql):
+    """Hash of the SQL with whitespace collapsed; unlike tracing.fingerprint,
+    literals are kept since they change the result"""
+    return hashlib.sha1(_SPACE.sub(" ", sql).strip().upper().encode()).hexdigest()[:16]
+
+
+def read_tables(sql):
+    """Schema tables named anywhere in a SELECT"""
+    return frozenset(word for word in _WORD.findall(sql.upper()) if word in TABLES)
+
+
+def written_table(sql):
+    """Target table of an INSERT / UPDATE / MERGE / DELETE, None for anything else"""
+    match = _DML.match(sql)
+    return match.group(1).upper() if match else None
+
+
+def _bind_key(binds):
+    if binds is None:
+        return ()
+    if isinstance(binds, dict):
+        return tuple(sorted(binds.items()))
+    return tuple(binds)
+
+
+class WriteRecorder:
+    """Cursor proxy that collects the tables written through it"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.tables = set()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _record(self, sql):
+        table = written_table(sql)
+        if table:
+            self.tables.add(table)
+
+    def execute(self, sql, *args, **kwargs):
+        self._record(sql)
+        return self._cursor.execute(sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        self._record(sql)
+        return self._cursor.executemany(sql, *args, **kwargs)
+
+
+# =============================================
+# CACHE
+# =============================================
+class QueryCache:
+    """Thread-safe LRU + TTL cache of query results, shared by all sessions"""
+
+    def __init__(self, ttl=QUERY_CACHE_TTL_S, max_entries=QUERY_CACHE_MAX_ENTRIES,
+                 max_mb=QUERY_CACHE_MAX_MB, settle_s=0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.settle_s = settle_s
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires, tags, size, frame), oldest use first
+        self._invalidated = {}  # table -> monotonic time of its last invalidation
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0,
+                       "uncached": 0}
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def read_frame(self, conn, sql, binds=None, read=fetch.read_frame):
+        """read(conn, sql, binds), or a copy of its cached result"""
+        key = (fingerprint(sql), _bind_key(binds))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[3].copy()
+            if entry is not None:
+                self._drop(key)
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+
+        frame = read(conn, sql, binds)
+        self._store(key, read_tables(sql), frame, now)
+        return frame
+
+    def _store(self, key, tags, frame, started):
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            # Written while (or just before) we read: the result may predate the write
+            if size > self.max_bytes or any(self._invalidated.get(table, float("-inf")) > started - self.settle_s
+                                            for table in tags):
+                self._stats["uncached"] += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tags, size, frame.copy())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate(self, tables):
+        """Drop every entry that reads one of tables (names in any case)"""
+        tables = {table.upper() for table in tables}
+        if not tables:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            for table in tables:
+                self._invalidated[table] = now
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                self._drop(key)
+            self._stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters plus current size; hit_ratio is over all lookups so far"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries,
+                        mb=round(self._bytes / 1024 / 1024, 2), max_mb=round(self.max_bytes / 1024 / 1024, 2),
+                        hit_ratio=round(self._stats["hits"] / lookups, 3) if lookups else None)
@@ -0,0 +1,224 @@
+"""
+MindConnect+ Reference Data Snapshot
+In-process copy of the small lookup lists (users, groups, sessions,
+counselors) that feed every dropdown in the app
+"""
+
+import threading
+import time
+
+import config
+
+# =============================================
+# SNAPSHOT SETTINGS (override in config.py)
+# =============================================
+# Pick up rows added by other processes with a cheap delta query
+REFRESH_INTERVAL_S = getattr(config, "REFDATA_REFRESH_S", 60)
+# Reload everything now and then so deletes/renames are not missed forever
+FULL_RELOAD_INTERVAL_S = getattr(config, "REFDATA_FULL_RELOAD_S", 900)
+
+# Each list is keyed by its ID; the ID doubles as the high-water mark
+SOURCES = {
+    "users": """
+        SELECT userID, userName FROM AppUser
+        WHERE userID > :1 ORDER BY userID
+    """,
+    "groups": """
+        SELECT groupID, groupName FROM SupportGroup
+        WHERE groupID > :1 ORDER BY groupID
+    """,
+    "sessions": """
+        SELECT sessionID, topic FROM CounselingSession
+        WHERE sessionID > :1 ORDER BY sessionID
+    """,
+    "counselors": """
+        SELECT c.userID, u.userName
+        FROM Counselor c
+        JOIN AppUser u ON c.userID = u.userID
+        WHERE c.userID > :1 ORDER BY c.userID
+    """,
+}
+
+
+class _Table:
+    """Rows and bookkeeping for one lookup list"""
+
+    def __init__(self):
+        self.rows = {}
+        self.high_water = None
+        self.version = 0
+        self.loaded_at = 0.0
+        self.refreshed_at = 0.0
+        self.options = {}
+        self.options_version = -1
+        self.refreshing = False
+        self.invalidations = 0
+        self.written = {}  # upserts made while a refresh was in flight
+
+
+class ReferenceData:
+    """Shared, thread-safe lookup lists refreshed by delta on a timer"""
+
+    def __init__(self, refresh_interval=REFRESH_INTERVAL_S,
+                 full_reload_interval=FULL_RELOAD_INTERVAL_S):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._lock = threading.Lock()
+        self._tables = {kind: _Table() for kind in SOURCES}
+
+    # -----------------------------------------
+    # Loading
+    # -----------------------------------------
+    def _fetch(self, kind, conn, after):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SOURCES[kind], [after])
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _plan(self, table, now):
+        """(full, after) if a refresh is due, else None; called under the lock"""
+        full = table.high_water is None or now - table.loaded_at >= self.full_reload_interval
+        if not full and now - table.refreshed_at < self.refresh_interval:
+            return None
+        return full, -1 if full else table.high_water
+
+    def _apply(self, table, full, rows, now, invalidations):
+        """Merge fetched rows into the snapshot; called under the lock"""
+        if full:
+            table.rows = {}
+            table.loaded_at = now
+        for key, label in rows:
+            table.rows[key] = label
+        table.rows.update(table.written)
+        if rows or full or table.written:
+            table.version += 1
+        if table.invalidations != invalidations:
+            table.high_water = None  # invalidated mid-fetch: reload again next time
+        elif table.rows:
+            table.high_water = max(table.high_water or -1, max(table.rows))
+        else:
+            table.high_water = -1
+        table.refreshed_at = now
+
+    def _refresh(self, kind, conn):
+        """Run a due refresh with the lock released during the query, so other
+        sessions keep reading the current snapshot meanwhile"""
+        now = time.monotonic()
+        with self._lock:
+            table = self._tables[kind]
+            plan = None if table.refreshing else self._plan(table, now)
+            if plan is None:
+                return
+            table.refreshing = True
+            table.written = {}
+            invalidations = table.invalidations
+
+        full, after = plan
+        try:
+            rows = self._fetch(kind, conn, after)
+        except Exception:
+            with self._lock:
+                table.refreshing = False
+            raise
+        with self._lock:
+            self._apply(table, full, rows, now, invalidations)
+            table.refreshing = False
+            table.written = {}
+
+    # -----------------------------------------
+    # Reading
+    # -----------------------------------------
+    def options(self, kind, conn=None):
+        """Return {"Name (ID: n)": n} for a dropdown, refreshing only when due
+
+        conn is only used if the snapshot is empty or its refresh timer
+        has expired; otherwise no database round trip is made.
+        """
+        if conn is not None:
+            self._refresh(kind, conn)
+        with self._lock:
+            table = self._tables[kind]
+            if table.options_version != table.version:
+                table.options = {
+                    f"{label} (ID: {key})": key
+                    for key, label in sorted(table.rows.items())
+                }
+                table.options_version = table.version
+            return table.options
+
+    def version(self, kind):
+        with self._lock:
+            return self._tables[kind].version
+
+    # -----------------------------------------
+    # Write-through from the app's own INSERT/UPDATE paths
+    # -----------------------------------------
+    def upsert(self, kind, key, label):
+        """Apply a row the app just wrote so no reload is needed"""
+        with self._lock:
+            table = self._tables[kind]
+            if table.rows.get(key) == label:
+                return
+            table.rows[key] = label
+            if table.refreshing:
+                table.written[key] = label
+            if table.high_water is not None:
+                table.high_water = max(table.high_water, key)
+            table.version += 1
+
+    def invalidate(self, kind=None):
+        """Force a full reload of one list (or all of them) on next use"""
+        with self._lock:
+            kinds = [kind] if kind else list(self._tables)
+            for k in kinds:
+                self._tables[k].high_water = None
+                self._tables[k].invalidations += 1
+
+
+# =============================================
+# USER SEARCH (type-ahead picker)
+# =============================================
+# Served by idx_appuser_name_upper and the UNIQUE index on email
+# (Phase2_DDL_Schema/Indexes.sql); each branch is an index range scan.
+# Names match case-insensitively; emails match as typed, since wrapping
+# email in LOWER() would stop the UNIQUE index from serving the prefix.
+USER_SEARCH_SQL = """
+    SELECT userID, userName, email FROM (
+        SELECT userID, userName, email FROM AppUser
+        WHERE UPPER(userName) LIKE :name_prefix ESCAPE '\\'
+        UNION
+        SELECT userID, userName, email FROM AppUser
+        WHERE email LIKE :email_prefix ESCAPE '\\'
+    )
+    ORDER BY userName, userID
+    FETCH FIRST :n ROWS ONLY
+"""
+
+USER_BY_ID_SQL = "SELECT userID, userName, email FROM AppUser WHERE userID = :id"
+
+
+def like_prefix(term):
+    """LIKE pattern matching term literally as a prefix (use with ESCAPE '\\')"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def search_users(conn, term, limit=20):
+    """[(userID, userName, email)] matching an ID, a name prefix or an email prefix"""
+    term = term.strip()
+    if not term:
+        return []
+    cursor = conn.cursor()
+    try:
+        if term.isdigit():
+            cursor.execute(USER_BY_ID_SQL, id=int(term))
+        else:
+            cursor.execute(USER_SEARCH_SQL,
+                           name_prefix=like_prefix(term.upper()),
+                           email_prefix=like_prefix(term),
+                           n=limit)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
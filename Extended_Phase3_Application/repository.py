@@ -0,0 +1,463 @@
+"""
+MindConnect+ Data Access
+Every query and write the app issues, behind one object
+
+The repository runs on a connection pool: the Oracle session pool (db.py)
+or the embedded SQLite engine (local_engine.py), selected in config.py:
+
+    DATA_BACKEND = "oracle"            # default
+    DATA_BACKEND = "sqlite"            # no server needed
+    LOCAL_DB_PATH = "mindconnect.db"   # built from generate_data.py if missing
+    LOCAL_DB_SCALE = "tiny"            # tiny / small / large
+
+All statements use named binds and the Oracle SQL the app always used;
+the SQLite connections translate the few Oracle-only constructs.
+"""
+
+import os
+from datetime import timedelta
+
+import pandas as pd
+
+import config
+import aggregates
+import fetch
+import kpi
+import match_index
+import query_cache
+import tracing
+
+DATA_BACKEND = getattr(config, "DATA_BACKEND", "oracle")
+
+# Choices the app offers (and the only values the API accepts)
+MOOD_LEVELS = ["Sad", "Anxious", "Stressed", "Neutral", "Calm", "Happy"]
+PRIVACY_SETTINGS = ["public", "private", "friends"]
+
+
+class NotFound(LookupError):
+    """A write's UPDATE matched no row"""
+# Most buckets (days/weeks/...) a mood timeline returns per mood level
+MOOD_TIMELINE_MAX_POINTS = getattr(config, "MOOD_TIMELINE_MAX_POINTS", 120)
+LOCAL_DB_PATH = getattr(config, "LOCAL_DB_PATH", "mindconnect.db")
+LOCAL_DB_SCALE = getattr(config, "LOCAL_DB_SCALE", "tiny")
+
+# =============================================
+# USERS
+# =============================================
+INSERT_USER_SQL = """
+    INSERT INTO AppUser (userID, userName, email, userPassword, privacySetting)
+    VALUES (:user_id, :user_name, :email, :password, :privacy)
+"""
+
+UPDATE_PRIVACY_SQL = "UPDATE AppUser SET privacySetting = :privacy WHERE userID = :user_id"
+
+# =============================================
+# MOOD LOGS
+# =============================================
+INSERT_MOOD_SQL = """
+    INSERT INTO MoodLog (userID, logDate, moodLevel)
+    VALUES (:user_id, TO_DATE(:log_date, 'YYYY-MM-DD'), :mood)
+"""
+
+MOOD_RANGE_SQL = "SELECT MIN(logDate), MAX(logDate) FROM MoodLog WHERE userID = :user_id"
+
+# Counts per (bucket, mood); {fmt} is a TRUNC format from TIMELINE_BUCKETS
+MOOD_TIMELINE_SQL = """
+    SELECT TRUNC(logDate, '{fmt}') as bucket, moodLevel, COUNT(*) as logs
+    FROM MoodLog
+    WHERE userID = :user_id
+      AND logDate >= TO_DATE(:start_date, 'YYYY-MM-DD')
+      AND logDate < TO_DATE(:end_date, 'YYYY-MM-DD')
+    GROUP BY TRUNC(logDate, '{fmt}'), moodLevel
+    ORDER BY bucket
+"""
+
+# (name, TRUNC format, approximate days per bucket, pandas frequency), finest first
+TIMELINE_BUCKETS = [
+    ("day", "DD", 1, "D"),
+    ("week", "IW", 7, "W-MON"),
+    ("month", "MM", 30.4, "MS"),
+    ("quarter", "Q", 91.3, "QS"),
+    ("year", "YYYY", 365.25, "YS"),
+]
+
+
+def timeline_bucket(start, end, max_points=MOOD_TIMELINE_MAX_POINTS):
+    """Finest bucket that covers [start, end] in at most max_points buckets"""
+    days = (end - start).days + 1
+    for bucket in TIMELINE_BUCKETS:
+        if days / bucket[2] <= max_points:
+            return bucket
+    return TIMELINE_BUCKETS[-1]
+
+# Per-user statistics from the rollup (aggregates.on_log_mood keeps it current):
+# one primary-key range read however long the history is
+MOOD_ROLLUP_SQL = """
+    SELECT moodLevel, logCount as frequency, firstLog, lastLog, streak
+    FROM MoodRollup
+    WHERE userID = :user_id AND period = :period
+    ORDER BY logCount DESC, moodLevel
+"""
+
+MOOD_PERIODS_SQL = """
+    SELECT period FROM MoodRollup
+    WHERE userID = :user_id AND moodLevel = '*'
+    ORDER BY period DESC
+"""
+
+# "People who felt like you", precomputed by similar_moods.py
+SIMILAR_MOODS_SQL = """
+    SELECT sm.similarUserID, u.userName, sm.sharedDays, sm.windowEnd
+    FROM SimilarMood sm
+    JOIN AppUser u ON u.userID = sm.similarUserID
+    WHERE sm.userID = :user_id
+    ORDER BY sm.sharedDays DESC, sm.similarUserID
+"""
+
+# =============================================
+# SUPPORT GROUPS
+# =============================================
+GROUPS_SQL = """
+    SELECT
+        sg.groupID,
+        sg.groupName,
+        sg.focusArea,
+        COUNT(ug.userID) as member_count
+    FROM SupportGroup sg
+    LEFT JOIN UserGroup ug ON sg.groupID = ug.groupID
+    GROUP BY sg.groupID, sg.groupName, sg.focusArea
+    ORDER BY member_count DESC
+"""
+
+USER_GROUPS_SQL = """
+    SELECT sg.groupID, sg.groupName, sg.focusArea
+    FROM SupportGroup sg
+    JOIN UserGroup ug ON sg.groupID = ug.groupID
+    WHERE ug.userID = :user_id
+"""
+
+JOIN_GROUP_SQL = "INSERT INTO UserGroup (userID, groupID) VALUES (:user_id, :group_id)"
+
+# =============================================
+# COUNSELING SESSIONS
+# =============================================
+USER_SESSIONS_SQL = """
+    SELECT cs.sessionID, cs.topic, us.rating
+    FROM CounselingSession cs
+    JOIN UserSession us ON cs.sessionID = us.sessionID
+    WHERE us.userID = :user_id
+"""
+
+REGISTER_SESSION_SQL = """
+    INSERT INTO UserSession (userID, sessionID, rating) VALUES (:user_id, :session_id, NULL)
+"""
+
+RATE_SESSION_SQL = """
+    UPDATE UserSession SET rating = :rating WHERE userID = :user_id AND sessionID = :session_id
+"""
+
+# =============================================
+# PEER MATCHES
+# =============================================
+# Each pair is stored once, so look on both sides: pk_usermatch serves the
+# first branch and idx_usermatch_user2 the second. The app normally answers
+# from match_index.py; this runs while the index is still loading.
+USER_MATCHES_SQL = """
+    SELECT um.user2ID as matched_userID, u.userName, um.compatibilityScore
+    FROM UserMatch um
+    JOIN AppUser u ON u.userID = um.user2ID
+    WHERE um.user1ID = :user_id
+    UNION ALL
+    SELECT um.user1ID as matched_userID, u.userName, um.compatibilityScore
+    FROM UserMatch um
+    JOIN AppUser u ON u.userID = um.user1ID
+    WHERE um.user2ID = :user_id
+    ORDER BY compatibilityScore DESC
+"""
+
+# =============================================
+# LEARNING RESOURCES
+# =============================================
+RESOURCES_SQL = """
+    SELECT
+        lr.resourceID,
+        lr.title,
+        lr.resourceType,
+        COUNT(gr.groupID) as used_by_groups
+    FROM LearningResource lr
+    LEFT JOIN GroupResource gr ON lr.resourceID = gr.resourceID
+    GROUP BY lr.resourceID, lr.title, lr.resourceType
+    ORDER BY used_by_groups DESC
+"""
+
+USER_RESOURCES_SQL = """
+    SELECT DISTINCT
+        lr.resourceID,
+        lr.title,
+        lr.resourceType,
+        sg.groupName
+    FROM LearningResource lr
+    JOIN GroupResource gr ON lr.resourceID = gr.resourceID
+    JOIN SupportGroup sg ON gr.groupID = sg.groupID
+    JOIN UserGroup ug ON sg.groupID = ug.groupID
+    WHERE ug.userID = :user_id
+    ORDER BY sg.groupName, lr.title
+"""
+
+
+# =============================================
+# WRITES
+# =============================================
+# Each write is a list of (sql, binds) or callable(cursor) run as one unit:
+# Repository commits it on its own, write_queue.py commits many together.
+def update_privacy_statements(user_id, privacy):
+    return [(UPDATE_PRIVACY_SQL, dict(user_id=user_id, privacy=privacy))]
+
+
+def log_mood_statements(user_id, log_date, mood):
+    return [(INSERT_MOOD_SQL, dict(user_id=user_id, log_date=log_date.strftime("%Y-%m-%d"), mood=mood)),
+            lambda cursor: aggregates.on_log_mood(cursor, user_id, log_date, mood)]
+
+
+def join_group_statements(user_id, group_id):
+    return [(JOIN_GROUP_SQL, dict(user_id=user_id, group_id=group_id)),
+            lambda cursor: aggregates.on_join_group(cursor, group_id)]
+
+
+def register_session_statements(user_id, session_id):
+    return [(REGISTER_SESSION_SQL, dict(user_id=user_id, session_id=session_id)),
+            lambda cursor: aggregates.on_register_session(cursor, session_id)]
+
+
+def _update_one(cursor, sql, binds, missing):
+    cursor.execute(sql, binds)
+    if cursor.rowcount == 0:
+        raise NotFound(missing)
+
+
+def rate_session_statements(user_id, session_id, rating):
+    return [lambda cursor: aggregates.on_rate_session(cursor, user_id, session_id, rating),
+            lambda cursor: _update_one(cursor, RATE_SESSION_SQL,
+                                       dict(user_id=user_id, session_id=session_id, rating=rating),
+                                       f"User {user_id} is not registered for session {session_id}")]
+
+
+WRITES = {
+    "update_privacy": update_privacy_statements,
+    "log_mood": log_mood_statements,
+    "join_group": join_group_statements,
+    "register_session": register_session_statements,
+    "rate_session": rate_session_statements,
+}
+
+
+def run_statements(cursor, statements):
+    for statement in statements:
+        if callable(statement):
+            statement(cursor)
+        else:
+            cursor.execute(*statement)
+
+
+class Repository:
+    """App queries and writes over a pool (db.ConnectionPool, db.RoutedPool or local_engine.LocalPool)
+
+    Reads take a borrowed connection and return DataFrames, served from the
+    query cache (query_cache.py) when enabled; writes run in their own
+    transaction (including summary-table maintenance), commit, and drop
+    the cached results of the tables they wrote.
+    """
+
+    def __init__(self, pool, cache=None):
+        self.pool = pool
+        self.dialect = getattr(pool, "dialect", "oracle")
+        # Borrowed connections may be read-only replicas
+        self.routed = bool(getattr(pool, "replicas", None))
+        if cache is None and query_cache.QUERY_CACHE_ENABLED:
+            settle_s = 0
+            if self.routed:
+                import db
+                settle_s = db.READ_YOUR_WRITES_S  # replicas may still serve the old rows
+            cache = query_cache.QueryCache(settle_s=settle_s)
+        self.cache = cache
+
+    def connection(self, primary=False):
+        return self.pool.connection(primary)
+
+    def kpi_cache(self):
+        # Optimizer statistics (USER_TABLES) only exist on Oracle
+        approximate = kpi.APPROXIMATE_TABLES if self.dialect == "oracle" else ()
+        return kpi.KpiCache(self.pool, approximate_tables=approximate)
+
+    def _write(self, conn, statements):
+        """Run [(sql, binds) or callable(cursor)] as one transaction on the primary"""
+        if self.routed:
+            with self.pool.connection(primary=True) as primary:
+                return self._commit(primary, statements)
+        self._commit(conn, statements)
+
+    def _commit(self, conn, statements):
+        cursor = query_cache.WriteRecorder(conn.cursor())
+        try:
+            run_statements(cursor, statements)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        self.invalidate(cursor.tables)
+
+    def read_frame(self, conn, sql, binds=None):
+        """fetch.read_frame through the query cache"""
+        if self.cache is None:
+            return fetch.read_frame(conn, sql, binds)
+        return self.cache.read_frame(conn, sql, binds)
+
+    def invalidate(self, tables):
+        """Drop cached results that read any of tables (after a commit)"""
+        if self.cache is not None:
+            self.cache.invalidate(tables)
+
+    # ---------- users ----------
+    def register_user(self, conn, user_id, user_name, email, password, privacy):
+        self._write(conn, [(INSERT_USER_SQL, dict(user_id=user_id, user_name=user_name, email=email,
+                                                  password=password, privacy=privacy))])
+
+    def update_privacy(self, conn, user_id, privacy):
+        self._write(conn, update_privacy_statements(user_id, privacy))
+
+    # ---------- mood logs ----------
+    def log_mood(self, conn, user_id, log_date, mood):
+        self._write(conn, log_mood_statements(user_id, log_date, mood))
+
+    def mood_range(self, conn, user_id):
+        """(first, last) log date of the user, (None, None) if there are none"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(MOOD_RANGE_SQL, dict(user_id=user_id))
+            first, last = cursor.fetchone()
+        finally:
+            cursor.close()
+        if first is None:
+            return None, None
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def mood_timeline(self, conn, user_id, start, end, max_points=MOOD_TIMELINE_MAX_POINTS):
+        """(bucket name, DataFrame of log counts: one row per bucket, one column per mood)
+
+        Bucketing runs in SQL, so at most max_points rows per mood come back
+        however long the history is.
+        """
+        name, fmt, _, freq = timeline_bucket(start, end, max_points)
+        df = self.read_frame(conn, MOOD_TIMELINE_SQL.format(fmt=fmt),
+                              dict(user_id=user_id, start_date=start.strftime("%Y-%m-%d"),
+                                   end_date=(end + timedelta(days=1)).strftime("%Y-%m-%d")))
+        if df.empty:
+            return name, pd.DataFrame()
+        df["BUCKET"] = pd.to_datetime(df["BUCKET"])
+        counts = df.pivot_table(index="BUCKET", columns="MOODLEVEL", values="LOGS", aggfunc="sum", fill_value=0)
+        # Empty buckets are zeros, not gaps
+        first = pd.tseries.frequencies.to_offset(freq).rollback(pd.Timestamp(start))
+        return name, counts.reindex(pd.date_range(first, pd.Timestamp(end), freq=freq), fill_value=0)
+
+    def mood_summary(self, conn, user_id, period=aggregates.ALL_TIME):
+        """(totals, per-mood DataFrame) for ALL_TIME or a 'YYYY-MM' month; totals is None without logs
+
+        totals: logs, first, last, streak (consecutive days logged up to
+        last), most_common, most_common_logs, mood (mood logged on the last
+        day) and mood_streak (consecutive days of that mood).
+        """
+        df = self.read_frame(conn, MOOD_ROLLUP_SQL, dict(user_id=user_id, period=period))
+        overall = df[df["MOODLEVEL"] == aggregates.ALL_MOODS]
+        moods = df[df["MOODLEVEL"] != aggregates.ALL_MOODS].reset_index(drop=True)
+        if overall.empty:
+            return None, moods
+        overall = overall.iloc[0]
+        last = pd.Timestamp(overall["LASTLOG"])
+        current = moods[pd.to_datetime(moods["LASTLOG"]) == last].iloc[0]
+        totals = {
+            "logs": int(overall["FREQUENCY"]),
+            "first": pd.Timestamp(overall["FIRSTLOG"]).date(),
+            "last": last.date(),
+            "streak": int(overall["STREAK"]),
+            "most_common": moods.iloc[0]["MOODLEVEL"],
+            "most_common_logs": int(moods.iloc[0]["FREQUENCY"]),
+            "mood": current["MOODLEVEL"],
+            "mood_streak": int(current["STREAK"]),
+        }
+        return totals, moods
+
+    def mood_periods(self, conn, user_id):
+        """Months the user logged in, newest first ('YYYY-MM')"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(MOOD_PERIODS_SQL, dict(user_id=user_id))
+            return [row[0] for row in cursor.fetchall() if row[0] != aggregates.ALL_TIME]
+        finally:
+            cursor.close()
+
+    def similar_moods(self, conn, user_id):
+        return self.read_frame(conn, SIMILAR_MOODS_SQL, dict(user_id=user_id))
+
+    # ---------- support groups ----------
+    def groups(self, conn):
+        return self.read_frame(conn, GROUPS_SQL)
+
+    def user_groups(self, conn, user_id):
+        return self.read_frame(conn, USER_GROUPS_SQL, dict(user_id=user_id))
+
+    def join_group(self, conn, user_id, group_id):
+        self._write(conn, join_group_statements(user_id, group_id))
+
+    # ---------- counseling sessions ----------
+    def user_sessions(self, conn, user_id):
+        """[(sessionID, topic, rating)] the user registered for"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(USER_SESSIONS_SQL, dict(user_id=user_id))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def register_session(self, conn, user_id, session_id):
+        self._write(conn, register_session_statements(user_id, session_id))
+
+    def rate_session(self, conn, user_id, session_id, rating):
+        self._write(conn, rate_session_statements(user_id, session_id, rating))
+
+    # ---------- peer matches ----------
+    def user_matches(self, conn, user_id):
+        return self.read_frame(conn, USER_MATCHES_SQL, dict(user_id=user_id))
+
+    def match_index(self):
+        return match_index.MatchIndex(self.pool)
+
+    def write_queue(self):
+        import write_queue
+        return write_queue.WriteQueue(self.pool, on_commit=self.invalidate)
+
+    # ---------- learning resources ----------
+    def resources(self, conn):
+        return self.read_frame(conn, RESOURCES_SQL)
+
+    def user_resources(self, conn, user_id):
+        return self.read_frame(conn, USER_RESOURCES_SQL, dict(user_id=user_id))
+
+    # ---------- analytics ----------
+    def top_groups(self, conn):
+        return self.read_frame(conn, aggregates.TOP_GROUPS_QUERY)
+
+    def top_counselors(self, conn):
+        return self.read_frame(conn, aggregates.TOP_COUNSELORS_QUERY)
+
+
+def create_repository(backend=DATA_BACKEND):
+    """Repository on the configured backend ("oracle" or "sqlite")"""
+    if backend == "sqlite":
+        import local_engine
+        if not os.path.exists(LOCAL_DB_PATH):
+            local_engine.create_database(LOCAL_DB_PATH, local_engine.scale(LOCAL_DB_SCALE))
+        return Repository(tracing.wrap_pool(local_engine.LocalPool(LOCAL_DB_PATH)))
+    import db
+    return Repository(tracing.wrap_pool(db.create_pool(replicas=True)))
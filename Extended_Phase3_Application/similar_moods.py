@@ -0,0 +1,257 @@
+"""
+MindConnect+ Similar Mood Patterns
+Batch job behind "People who felt like you" (Phase-3 Scenario 7)
+
+Scenario 7 self-joins MoodLog on (logDate, moodLevel), which is fine for
+one user on a small table and hopeless for every user on a large one.
+This job reads the logs of a sliding window once (the WINDOW_DAYS up to
+the newest log, through idx_moodlog_date_mood), turns each distinct
+(logDate, moodLevel) into a column of a sparse user x day-mood matrix B,
+and counts co-occurrences as B.Bt: cell (u, v) is the number of days u and
+v logged the same mood. A (day, mood) logged by more than
+MAX_COLUMN_USERS users is left out, as match_engine.py does with big
+groups: it would pair all of them while saying little about any two.
+Row chunks of that product are computed in parallel processes, with fewer
+users per chunk where their rows are dense, so no chunk holds more than
+about CHUNK_PAIRS counts. Each user keeps its top_k partners with at least
+min_shared days in common, and the result replaces the SimilarMood table
+(Phase2_DDL_Schema/migrations/V005__similar_moods.sql) in one transaction.
+
+Requires scipy (pip install scipy); numpy comes with pandas.
+
+Settings (config.py):
+    SIMILAR_MOODS_WINDOW_DAYS = 90
+    SIMILAR_MOODS_TOP_K = 10
+    SIMILAR_MOODS_MIN_SHARED = 2
+    SIMILAR_MOODS_MAX_COLUMN_USERS = 10000
+    SIMILAR_MOODS_CHUNK_PAIRS = 20000000
+
+Usage:
+    python similar_moods.py --engine sqlite --db bench.db
+    python similar_moods.py --engine oracle --workers 8 --window-days 30
+    python similar_moods.py --engine oracle --dry-run
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import config
+import fetch
+
+WINDOW_DAYS = getattr(config, "SIMILAR_MOODS_WINDOW_DAYS", 90)
+TOP_K = getattr(config, "SIMILAR_MOODS_TOP_K", 10)
+# Sharing a single day is mostly chance
+MIN_SHARED = getattr(config, "SIMILAR_MOODS_MIN_SHARED", 2)
+# More popular (day, mood) pairs are not counted as shared (see above)
+MAX_COLUMN_USERS = getattr(config, "SIMILAR_MOODS_MAX_COLUMN_USERS", 10000)
+# Upper bound on the (user, partner) counts one chunk's product may hold
+CHUNK_PAIRS = getattr(config, "SIMILAR_MOODS_CHUNK_PAIRS", 20_000_000)
+
+LAST_LOG_SQL = "SELECT MAX(logDate) FROM MoodLog"
+LOGS_SQL = """
+    SELECT userID, logDate, moodLevel
+    FROM MoodLog
+    WHERE logDate > TO_DATE(:since, 'YYYY-MM-DD') AND logDate <= TO_DATE(:until, 'YYYY-MM-DD')
+"""
+
+CLEAR_SQL = "DELETE FROM SimilarMood"
+INSERT_SQL = """
+    INSERT INTO SimilarMood (userID, similarUserID, sharedDays, windowEnd)
+    VALUES (:1, :2, :3, TO_DATE(:4, 'YYYY-MM-DD'))
+"""
+
+COLUMNS = ["USERID", "SIMILARUSERID", "SHAREDDAYS"]
+
+
+# =============================================
+# DAY-MOOD MATRIX
+# =============================================
+def last_log_date(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LAST_LOG_SQL)
+        value = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return None if value is None else pd.Timestamp(value).date()
+
+
+class Window:
+    """Users x (logDate, moodLevel) incidence matrix for the logs in (since, until]"""
+
+    def __init__(self, conn, until, window_days=WINDOW_DAYS, max_column_users=MAX_COLUMN_USERS):
+        self.until = until
+        self.since = until - timedelta(days=window_days)
+        frames = list(fetch.iter_frames(conn, LOGS_SQL, dict(since=self.since.strftime("%Y-%m-%d"),
+                                                             until=until.strftime("%Y-%m-%d")),
+                                        batch_size=50000))
+        logs = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["USERID", "LOGDATE",
+                                                                                         "MOODLEVEL"])
+        self.logs = len(logs)
+        self.user_ids, rows = np.unique(logs["USERID"].to_numpy(np.int64), return_inverse=True)
+        days = pd.to_datetime(logs["LOGDATE"]).to_numpy("datetime64[D]").astype(np.int64)
+        levels, moods = np.unique(logs["MOODLEVEL"].astype(str).to_numpy(), return_inverse=True)
+        keys, cols = np.unique(days * len(levels) + moods, return_inverse=True)
+        # MoodLog's key is (userID, logDate): at most one 1 per user and day
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(self.user_ids), len(keys)))
+        small = np.asarray(matrix.sum(axis=0)).ravel() <= max_column_users
+        self.dropped = int(len(small) - small.sum())
+        self.matrix = matrix[:, np.flatnonzero(small)]
+
+    def summary(self):
+        return {"window": f"{self.since + timedelta(days=1)} .. {self.until}", "logs": self.logs,
+                "users": len(self.user_ids), "day_moods": self.matrix.shape[1], "too_popular": self.dropped}
+
+
+# =============================================
+# CO-OCCURRENCE COUNTS
+# =============================================
+_worker = {}
+
+
+def _init_worker(matrix, top_k, min_shared):
+    _worker.update(matrix=matrix, transposed=matrix.T.tocsc(), top_k=top_k, min_shared=min_shared)
+
+
+def count_chunk(start, stop):
+    """(user index, partner index, shared days) for the top_k partners of users [start, stop)"""
+    b, k, minimum = _worker["matrix"], _worker["top_k"], _worker["min_shared"]
+    shared = b[start:stop].dot(_worker["transposed"]).tocoo()
+    rows = shared.row.astype(np.int64) + start
+    cols = shared.col.astype(np.int64)
+    keep = (rows != cols) & (shared.data >= minimum)
+    rows, cols, counts = rows[keep], cols[keep], shared.data[keep]
+
+    # Most shared days first, then lower partner index; rank within user
+    order = np.lexsort((cols, -counts, rows))
+    rows, cols, counts = rows[order], cols[order], counts[order]
+    first = np.searchsorted(rows, rows, side="left")
+    keep = (np.arange(len(rows)) - first) < k
+    return rows[keep], cols[keep], counts[keep]
+
+
+def plan_chunks(matrix, chunk_size=2000, max_pairs=CHUNK_PAIRS):
+    """[(start, stop)] row ranges of at most chunk_size users and about max_pairs counts each"""
+    # A user's row of B.Bt has at most as many entries as the users in its columns
+    column_users = np.asarray(matrix.sum(axis=0)).ravel().astype(np.int64)
+    ends = np.cumsum(matrix.dot(column_users))
+    n, chunks, start = matrix.shape[0], [], 0
+    while start < n:
+        done = ends[start - 1] if start else 0
+        stop = int(np.searchsorted(ends, done + max_pairs, side="right"))
+        stop = min(max(stop, start + 1), start + chunk_size, n)  # a single dense user still gets a chunk
+        chunks.append((start, stop))
+        start = stop
+    return chunks
+
+
+def compute_similar(window, top_k=TOP_K, min_shared=MIN_SHARED, chunk_size=2000, workers=None, progress=None,
+                    max_pairs=CHUNK_PAIRS):
+    """DataFrame of (USERID, SIMILARUSERID, SHAREDDAYS), top_k rows per user"""
+    chunks = plan_chunks(window.matrix, chunk_size, max_pairs)
+    parts = []
+
+    def collect(result, done):
+        parts.append(result)
+        if progress:
+            progress(done, len(chunks))
+
+    if (workers or os.cpu_count() or 1) <= 1:
+        _init_worker(window.matrix, top_k, min_shared)
+        for i, chunk in enumerate(chunks, 1):
+            collect(count_chunk(*chunk), i)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(window.matrix, top_k, min_shared)) as pool:
+            for i, result in enumerate(pool.map(count_chunk, *zip(*chunks)), 1):
+                collect(result, i)
+
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.DataFrame({"USERID": window.user_ids[np.concatenate([p[0] for p in parts])],
+                         "SIMILARUSERID": window.user_ids[np.concatenate([p[1] for p in parts])],
+                         "SHAREDDAYS": np.concatenate([p[2] for p in parts]).astype(np.int64)})
+
+
+# =============================================
+# WRITE-BACK
+# =============================================
+def write_similar(conn, similar, window_end, batch_size=5000):
+    """Replace SimilarMood with the new lists; readers see the old ones until the commit"""
+    end = window_end.strftime("%Y-%m-%d")
+    rows = list(zip(similar["USERID"].tolist(), similar["SIMILARUSERID"].tolist(),
+                    similar["SHAREDDAYS"].tolist(), [end] * len(similar)))
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CLEAR_SQL)
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(INSERT_SQL, rows[start:start + batch_size])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+# =============================================
+# COMMAND LINE
+# =============================================
+def main():
+    parser = argparse.ArgumentParser(description="Find users with similar mood patterns and fill SimilarMood")
+    parser.add_argument("--engine", choices=["sqlite", "oracle"], default="oracle")
+    parser.add_argument("--db", default="mindconnect.db", help="SQLite file")
+    parser.add_argument("--window-days", type=int, default=WINDOW_DAYS, help="days of logs compared")
+    parser.add_argument("--until", help="last day of the window (YYYY-MM-DD, default: newest log)")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--min-shared", type=int, default=MIN_SHARED, help="fewest shared days to count")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="most users counted per task")
+    parser.add_argument("--max-column-users", type=int, default=MAX_COLUMN_USERS,
+                        help="(day, mood) pairs logged by more users don't count as shared")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="counting processes")
+    parser.add_argument("--dry-run", action="store_true", help="count but don't write")
+    args = parser.parse_args()
+
+    if args.engine == "sqlite":
+        import local_engine
+        pool = local_engine.LocalPool(args.db)
+    else:
+        import db
+        pool = db.create_pool()
+
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        until = pd.Timestamp(args.until).date() if args.until else last_log_date(conn)
+        if until is None:
+            raise SystemExit("❌ MoodLog is empty")
+        window = Window(conn, until, args.window_days, args.max_column_users)
+    print(f"✅ Loaded logs in {time.perf_counter() - start:.1f}s: {window.summary()}")
+
+    start = time.perf_counter()
+    similar = compute_similar(
+        window, args.top_k, args.min_shared, chunk_size=args.chunk_size, workers=args.workers,
+        progress=lambda done, total: print(f"\r   Counted chunk {done}/{total}", end="", flush=True))
+    print(f"\n✅ {len(similar):,} similar users for {similar['USERID'].nunique():,} users "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if args.dry_run:
+        print(similar.sort_values("SHAREDDAYS", ascending=False).head(10).to_string(index=False))
+        return
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        written = write_similar(conn, similar, until)
+    print(f"✅ Wrote {written:,} rows to SimilarMood in {time.perf_counter() - start:.1f}s")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+MindConnect+ Test Fixtures
+A small generated SQLite database (local_engine.py) standing in for Oracle
+
+The database is built once per run; every test that writes gets its own copy.
+
+Usage (from Extended_Phase3_Application):
+    python -m pytest tests
+"""
+
+import os
+import shutil
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py holds the Oracle credentials and is not committed; the modules only
+# read optional settings from it, so the tests run on the defaults
+sys.modules["config"] = types.ModuleType("config")
+
+import generate_data  # noqa: E402
+import local_engine  # noqa: E402
+import repository  # noqa: E402
+
+SCALE = dict(users=200, counselors=5, groups=5, sessions=40, resources=10,
+             mood_logs=3_000, user_sessions=400, matches_per_user=1.0)
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "template.db")
+    local_engine.create_database(path, generate_data.Scale(**SCALE))
+    return path
+
+
+@pytest.fixture
+def db_path(template_db, tmp_path):
+    path = str(tmp_path / "mindconnect.db")
+    shutil.copy(template_db, path)
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    return local_engine.LocalPool(db_path)
+
+
+@pytest.fixture
+def repo(pool):
+    return repository.Repository(pool)
+
+
+def query(pool, sql, binds=()):
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, binds)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
@@ -0,0 +1,69 @@
+"""Summary tables kept by the app's writes match a full recompute"""
+
+from datetime import datetime, timedelta
+
+from conftest import query
+import aggregates
+import local_engine
+
+GROUP_ACTIVITY_SQL = "SELECT * FROM GroupActivity ORDER BY groupID"
+COUNSELOR_ACTIVITY_SQL = "SELECT * FROM CounselorActivity ORDER BY counselorID"
+MOOD_ROLLUP_SQL = "SELECT * FROM MoodRollup ORDER BY userID, period, moodLevel"
+
+
+def recompute(pool, statements):
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def test_activity_matches_backfill_after_writes(pool, repo):
+    user_id, group_id = query(pool, """
+        SELECT u.userID, g.groupID FROM AppUser u, SupportGroup g
+        WHERE NOT EXISTS (SELECT 1 FROM UserGroup ug WHERE ug.userID = u.userID AND ug.groupID = g.groupID)
+        ORDER BY u.userID, g.groupID LIMIT 1
+    """)[0]
+    session_ids = [row[0] for row in query(pool, """
+        SELECT s.sessionID FROM CounselingSession s
+        WHERE NOT EXISTS (SELECT 1 FROM UserSession us WHERE us.userID = :1 AND us.sessionID = s.sessionID)
+        ORDER BY s.sessionID LIMIT 2
+    """, [user_id])]
+
+    with pool.connection() as conn:
+        repo.join_group(conn, user_id, group_id)
+        for session_id in session_ids:
+            repo.register_session(conn, user_id, session_id)
+        repo.rate_session(conn, user_id, session_ids[0], 4)
+        repo.rate_session(conn, user_id, session_ids[0], 2)  # re-rating moves the sum, not the count
+        repo.rate_session(conn, user_id, session_ids[1], 5)
+
+    maintained = query(pool, GROUP_ACTIVITY_SQL), query(pool, COUNSELOR_ACTIVITY_SQL)
+    recompute(pool, local_engine.SUMMARY_BACKFILL)
+    assert (query(pool, GROUP_ACTIVITY_SQL), query(pool, COUNSELOR_ACTIVITY_SQL)) == maintained
+
+
+def test_mood_rollup_matches_backfill_after_logs(pool, repo):
+    user_id, last_log = query(pool, """
+        SELECT userID, MAX(logDate) FROM MoodLog GROUP BY userID ORDER BY COUNT(*) DESC, userID LIMIT 1
+    """)[0]
+    last_log = datetime.strptime(str(last_log)[:10], "%Y-%m-%d")
+    logged = {row[0] for row in query(pool, "SELECT logDate FROM MoodLog WHERE userID = :1", [user_id])}
+    gap = next(day for day in (last_log - timedelta(days=n) for n in range(1, 400)) if day not in logged)
+
+    with pool.connection() as conn:
+        repo.log_mood(conn, user_id, last_log + timedelta(days=1), "Happy")  # extends the streak
+        repo.log_mood(conn, user_id, last_log + timedelta(days=2), "Sad")
+        repo.log_mood(conn, user_id, last_log + timedelta(days=40), "Happy")  # new month, streak restarts
+        repo.log_mood(conn, user_id, gap, "Neutral")  # backdated
+
+    maintained = query(pool, MOOD_ROLLUP_SQL)
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        aggregates.backfill_mood_rollup(cursor)
+        conn.commit()
+    assert query(pool, MOOD_ROLLUP_SQL) == maintained
@@ -0,0 +1,108 @@
+"""JSON API: cursors, status codes and ETags"""
+
+import base64
+import json
+
+import pytest
+
+pytest.importorskip("httpx")  # starlette's TestClient runs on it
+from starlette.testclient import TestClient  # noqa: E402
+
+from conftest import query  # noqa: E402
+import api  # noqa: E402
+
+
+@pytest.fixture
+def client(repo):
+    api.app.state.backend = api.Backend(workers=2, repo=repo)
+    yield TestClient(api.app)  # outside "with": the lifespan would build its own backend
+    api.app.state.backend.close()
+
+
+def token(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def busiest_user(pool):
+    return query(pool, "SELECT userID, COUNT(*) FROM MoodLog GROUP BY userID ORDER BY COUNT(*) DESC LIMIT 1")[0]
+
+
+@pytest.mark.parametrize("order", ["newest", "oldest"])
+def test_mood_history_cursor_walks_every_log_once(pool, client, order):
+    user_id, logs = busiest_user(pool)
+    dates, cursor = [], None
+    while True:
+        params = {"order": order, "limit": 7, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/users/{user_id}/moods", params=params).json()
+        dates += [item["logdate"] for item in page["items"]]
+        cursor = page["next"]
+        if cursor is None:
+            break
+    assert len(dates) == len(set(dates)) == logs
+    assert dates == sorted(dates, reverse=order == "newest")
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",                                                    # not base64
+    token([1, 2]),                                            # not an object
+    token({"LOGDATE": {"$dt": "2024-01-01T00:00:00"}}),       # missing USERID
+    token({"LOGDATE": {"$dt": "2024-01-01T00:00:00"}, "USERID": 1, "X": 1}),  # extra key
+    token({"LOGDATE": "2024-01-01", "USERID": 1}),            # date not tagged
+    token({"LOGDATE": {"$dt": 5}, "USERID": 1}),              # bad date
+    token({"LOGDATE": {"$dt": "2024-01-01T00:00:00"}, "USERID": 2}),  # another user's cursor
+])
+def test_bad_mood_history_cursor_is_400(client, cursor):
+    response = client.get("/users/1/moods", params={"cursor": cursor})
+    assert response.status_code == 400 and response.json() == {"error": "Invalid cursor"}
+
+
+def test_bad_offset_cursor_is_400(client):
+    for cursor in (token(-1), token({"a": 1}), "%%%"):
+        assert client.get("/users/1/resources", params={"cursor": cursor}).status_code == 400
+
+
+def test_write_status_codes(pool, client):
+    user_id = query(pool, "SELECT MAX(userID) + 1 FROM AppUser")[0][0]
+    user = {"user_id": user_id, "user_name": "API User", "email": f"api{user_id}@example.com", "password": "pw"}
+    assert client.post("/users", json=user).status_code == 201
+    assert client.post("/users", json=user).status_code == 409
+    assert client.post("/users", json={"user_id": user_id}).status_code == 400
+    assert client.post("/users", content=b"not json").status_code == 400
+
+    mood = {"date": "2024-05-01", "mood": "Calm"}
+    assert client.post(f"/users/{user_id}/moods", json=mood).status_code == 201
+    assert client.post(f"/users/{user_id}/moods", json=mood).status_code == 409
+    assert client.post(f"/users/{user_id}/moods", json={"date": "05/01/2024", "mood": "Calm"}).status_code == 400
+    assert client.put(f"/users/{user_id}/sessions/1/rating", json={"rating": 9}).status_code == 400
+    assert client.get("/users/x/groups").status_code == 400
+    assert client.get(f"/users/{user_id}/moods", params={"order": "sideways"}).status_code == 400
+
+
+def test_writes_to_missing_rows_are_404_and_bad_choices_400(pool, client):
+    user_id, session_id = query(pool, """
+        SELECT u.userID, s.sessionID FROM AppUser u, CounselingSession s
+        WHERE NOT EXISTS (SELECT 1 FROM UserSession us WHERE us.userID = u.userID AND us.sessionID = s.sessionID)
+        ORDER BY u.userID, s.sessionID LIMIT 1
+    """)[0]
+    missing = query(pool, "SELECT MAX(userID) + 1 FROM AppUser")[0][0]
+    rating = client.put(f"/users/{user_id}/sessions/{session_id}/rating", json={"rating": 4})
+    assert rating.status_code == 404 and "not registered" in rating.json()["error"]
+    assert client.post(f"/users/{missing}/moods", json={"mood": "Calm"}).status_code == 404
+    assert client.post(f"/users/{user_id}/groups", json={"group_id": 10 ** 6}).status_code == 404
+
+    assert client.post(f"/users/{user_id}/moods", json={"mood": "Ecstatic"}).status_code == 400
+    user = {"user_id": missing, "user_name": "API User", "email": "x@example.com", "password": "pw",
+            "privacy": "everyone"}
+    assert client.post("/users", json=user).status_code == 400
+    assert query(pool, "SELECT COUNT(*) FROM AppUser WHERE userID = ?", (missing,))[0][0] == 0
+
+
+def test_etag_not_modified_until_a_write(pool, client):
+    user_id, _ = busiest_user(pool)
+    first = client.get(f"/users/{user_id}/moods", params={"limit": 5})
+    etag = first.headers["etag"]
+    assert client.get(f"/users/{user_id}/moods", params={"limit": 5},
+                      headers={"If-None-Match": etag}).status_code == 304
+    assert client.post(f"/users/{user_id}/moods", json={"date": "2031-01-01", "mood": "Happy"}).status_code == 201
+    second = client.get(f"/users/{user_id}/moods", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert second.status_code == 200 and second.json()["items"][0]["logdate"] == "2031-01-01"
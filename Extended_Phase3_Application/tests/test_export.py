@@ -0,0 +1,21 @@
+"""Export partitions: a month/year split covers every row"""
+
+import pytest
+
+from conftest import query
+import export
+
+
+@pytest.mark.parametrize("table", ["CounselingSession", "UserSession"])
+@pytest.mark.parametrize("split", ["month", "year"])
+def test_date_split_keeps_undated_rows(pool, tmp_path, table, split):
+    with pool.connection() as conn:
+        conn.cursor().execute("UPDATE CounselingSession SET sessionDate = NULL WHERE MOD(sessionID, 5) = 0")
+        conn.commit()
+    sql, binds = export.export_query(table, {})
+    total = len(query(pool, sql, binds))
+
+    results = export.export_table(pool, table, str(tmp_path), fmt="csv", compression="none", split=split)
+    undated = [rows for path, rows, _ in results if path.endswith("_undated.csv")]
+    assert undated and undated[0] > 0
+    assert sum(rows for _, rows, _ in results) == total
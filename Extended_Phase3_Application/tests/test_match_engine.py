@@ -0,0 +1,30 @@
+"""Match engine: empty tables and pairs that drop out of the top k"""
+
+import pytest
+
+pytest.importorskip("scipy")
+
+from conftest import query  # noqa: E402
+import match_engine  # noqa: E402
+
+
+def test_features_with_no_memberships_or_logs(pool):
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        for table in ("UserGroup", "UserSession", "MoodRollup", "MoodLog"):
+            cursor.execute(f"DELETE FROM {table}")
+        conn.commit()
+        features = match_engine.Features(conn)
+    assert features.groups.nnz == features.sessions.nnz == 0
+    assert match_engine.compute_matches(features, workers=1).empty
+
+
+def test_nightly_run_drops_pairs_no_longer_scored(pool):
+    with pool.connection() as conn:
+        matches = match_engine.compute_matches(match_engine.Features(conn), top_k=2, workers=1)
+        match_engine.write_matches(conn, matches)
+        kept = match_engine.compute_matches(match_engine.Features(conn), top_k=1, workers=1)
+        match_engine.write_matches(conn, kept)
+    pairs = set(query(pool, "SELECT user1ID, user2ID FROM UserMatch"))
+    assert pairs == set(zip(kept["USER1ID"].tolist(), kept["USER2ID"].tolist()))
+    assert len(kept) < len(matches)
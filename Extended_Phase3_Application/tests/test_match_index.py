@@ -0,0 +1,47 @@
+"""Match index: a match_engine.py run is loaded without rebuilding the index"""
+
+import pandas as pd
+
+from conftest import query
+import match_engine
+import match_index
+
+
+def _partners(index, user_id):
+    return index.lookup(user_id)["MATCHED_USERID"].tolist()
+
+
+def test_upsert_run_updates_only_the_users_it_touched(pool):
+    index = match_index.MatchIndex(pool)
+    index._load(full=True)
+    loaded_at = index._loaded_at
+    one, two = query(pool, """
+        SELECT a.userID, b.userID FROM AppUser a, AppUser b
+        WHERE a.userID < b.userID AND NOT EXISTS (
+            SELECT 1 FROM UserMatch um WHERE um.user1ID = a.userID AND um.user2ID = b.userID)
+        ORDER BY a.userID, b.userID LIMIT 1
+    """)[0]
+    with pool.connection() as conn:
+        match_engine.write_matches(conn, pd.DataFrame(
+            {"USER1ID": [one], "USER2ID": [two], "COMPATIBILITYSCORE": [100.0]}), replace=False)
+
+    index._load(full=False)
+    assert _partners(index, one)[0] == two and _partners(index, two)[0] == one
+    assert index._loaded_at == loaded_at and index.stats()["updates"] == 1
+
+    with pool.connection() as conn:
+        built, _, run = match_index.build(conn)
+    assert run == index.stats()["run"] and all(built.get(u) == index._adjacency.get(u) for u in (one, two))
+
+
+def test_replace_run_rebuilds_the_index(pool):
+    index = match_index.MatchIndex(pool)
+    index._load(full=True)
+    one, two = query(pool, "SELECT user1ID, user2ID FROM UserMatch ORDER BY user1ID, user2ID LIMIT 1")[0]
+    with pool.connection() as conn:
+        match_engine.write_matches(conn, pd.DataFrame(
+            {"USER1ID": [one], "USER2ID": [two], "COMPATIBILITYSCORE": [50.0]}), replace=True)
+
+    index._load(full=False)  # the dropped pairs are not in any newer run
+    assert index.stats()["users"] == 2 and index.stats()["updates"] == 0
+    assert _partners(index, one) == [two]
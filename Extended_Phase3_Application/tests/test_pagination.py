@@ -0,0 +1,51 @@
+"""Keyset paging visits every row exactly once, in every sort order"""
+
+import pytest
+
+from conftest import query
+import pagination
+
+GRIDS = [pagination.USERS_GRID, pagination.SESSIONS_GRID, pagination.MATCHES_GRID]
+
+
+@pytest.fixture
+def nulls(pool):
+    """Rows whose sort columns are NULL, and names holding LIKE wildcards"""
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO AppUser (userID, userName, email) VALUES (:1, :2, :3)",
+                           [(900001, None, "nobody@example.com"), (900002, "100%_sure", "sure@example.com"),
+                            (900003, "100 percent", "percent@example.com")])
+        cursor.execute("""
+            INSERT INTO CounselingSession (sessionID, sessionDate, topic, counselorID, groupID)
+            SELECT 900001, NULL, 'Undated', MIN(userID), (SELECT MIN(groupID) FROM SupportGroup) FROM Counselor
+        """)
+        conn.commit()
+    return pool
+
+
+def walk(conn, grid, sort, filters, page_size):
+    keys, last, has_next = [], None, True
+    while has_next:
+        df, has_next, last = grid.fetch_page(conn, sort, filters, page_size, last)
+        keys += [tuple(row) for row in df[grid.key].itertuples(index=False)]
+    return keys
+
+
+@pytest.mark.parametrize("grid", GRIDS, ids=lambda grid: grid.name)
+def test_pages_cover_every_row_once(nulls, grid):
+    with nulls.connection() as conn:
+        expected = grid.count(conn, {})
+        all_keys = {tuple(row) for row in query(nulls, f"SELECT {', '.join(grid.key)} FROM ({grid.base_sql}) g")}
+        for sort in grid.sorts:
+            keys = walk(conn, grid, sort, {}, page_size=7)
+            assert len(keys) == len(set(keys)) == expected, sort
+            assert set(keys) == all_keys, sort
+
+
+def test_prefix_filter_matches_wildcards_literally(nulls):
+    grid = pagination.USERS_GRID
+    with nulls.connection() as conn:
+        df, has_next, _ = grid.fetch_page(conn, "User ID", {"Name starts with": "100%_"}, 10)
+        assert list(df["USERID"]) == [900002] and not has_next
+        assert grid.count(conn, {"Name starts with": "100"}) == 2
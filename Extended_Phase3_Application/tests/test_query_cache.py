@@ -0,0 +1,49 @@
+"""Query cache: writes drop exactly the results of the tables they touch"""
+
+import pandas as pd
+
+from conftest import query
+import query_cache
+
+
+def test_write_invalidates_only_touched_tables(pool, repo):
+    user_id, group_id = query(pool, """
+        SELECT u.userID, g.groupID FROM AppUser u, SupportGroup g
+        WHERE NOT EXISTS (SELECT 1 FROM UserGroup ug WHERE ug.userID = u.userID AND ug.groupID = g.groupID)
+        ORDER BY u.userID, g.groupID LIMIT 1
+    """)[0]
+    with pool.connection() as conn:
+        groups = repo.user_groups(conn, user_id)
+        repo.resources(conn)
+        repo.user_groups(conn, user_id)
+        assert repo.cache.stats()["hits"] == 1
+
+        repo.join_group(conn, user_id, group_id)
+        assert len(repo.user_groups(conn, user_id)) == len(groups) + 1  # re-read, not the stale copy
+        repo.resources(conn)  # LearningResource was not written: still cached
+        stats = repo.cache.stats()
+        assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 3, 1)
+
+
+def test_result_read_during_a_write_is_not_stored():
+    cache = query_cache.QueryCache()
+    sql = "SELECT * FROM UserGroup"
+
+    def read_racing_a_write(conn, sql, binds):
+        cache.invalidate({"usergroup"})  # committed while the SELECT was running
+        return pd.DataFrame({"N": [1]})
+
+    cache.read_frame(None, sql, read=read_racing_a_write)
+    assert cache.stats()["uncached"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_write_recorder_collects_dml_targets():
+    class Cursor:
+        def execute(self, sql, *args):
+            pass
+
+    recorder = query_cache.WriteRecorder(Cursor())
+    recorder.execute("INSERT INTO UserGroup (userID, groupID) VALUES (:1, :2)")
+    recorder.execute("  merge into GroupActivity g USING (SELECT 1 FROM DUAL) s ON (1 = 1)")
+    recorder.execute("SELECT * FROM AppUser")
+    assert recorder.tables == {"USERGROUP", "GROUPACTIVITY"}
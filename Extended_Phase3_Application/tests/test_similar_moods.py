@@ -0,0 +1,44 @@
+"""Similar moods: the sparse counts match a self-join of MoodLog"""
+
+import pytest
+
+pytest.importorskip("scipy")
+
+from conftest import query  # noqa: E402
+import similar_moods  # noqa: E402
+
+SHARED_SQL = """
+    SELECT a.userID, b.userID, COUNT(*) FROM MoodLog a
+    JOIN MoodLog b ON b.logDate = a.logDate AND b.moodLevel = a.moodLevel AND b.userID <> a.userID
+    GROUP BY a.userID, b.userID
+"""
+
+
+def test_counts_match_a_self_join_with_many_mood_levels(pool):
+    with pool.connection() as conn:
+        # 24 levels: more than the 16 an earlier column key had room for
+        conn.cursor().execute("UPDATE MoodLog SET moodLevel = moodLevel || MOD(userID, 4)")
+        conn.commit()
+        window = similar_moods.Window(conn, similar_moods.last_log_date(conn), window_days=100000)
+    similar = similar_moods.compute_similar(window, top_k=10 ** 6, min_shared=1, chunk_size=50,
+                                            workers=1, max_pairs=500)
+    expected = {(one, two): shared for one, two, shared in query(pool, SHARED_SQL)}
+    assert dict(zip(zip(similar["USERID"], similar["SIMILARUSERID"]), similar["SHAREDDAYS"])) == expected
+    assert window.dropped == 0
+
+
+def test_chunks_shrink_where_rows_are_dense(pool):
+    with pool.connection() as conn:
+        window = similar_moods.Window(conn, similar_moods.last_log_date(conn), window_days=100000)
+    chunks = similar_moods.plan_chunks(window.matrix, chunk_size=50, max_pairs=200)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(window.user_ids)
+    assert all(stop == start_next for (_, stop), (start_next, _) in zip(chunks, chunks[1:]))
+    assert len(chunks) > -(-len(window.user_ids) // 50)
+
+
+def test_popular_day_moods_are_not_counted(pool):
+    with pool.connection() as conn:
+        window = similar_moods.Window(conn, similar_moods.last_log_date(conn), window_days=100000,
+                                      max_column_users=1)
+    assert window.dropped > 0 and window.matrix.nnz < window.logs
+    assert similar_moods.compute_similar(window, min_shared=1, workers=1).empty
@@ -0,0 +1,89 @@
+"""Write queue: savepoints isolate a failing write, retries are capped, replay stays journaled"""
+
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+from conftest import query
+import write_queue
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(pool, **kwargs):
+        wq = write_queue.WriteQueue(pool, journal_path=str(tmp_path / "journal.jsonl"), **kwargs)
+        queues.append(wq)
+        return wq
+
+    yield make
+    for wq in queues:
+        wq.close()
+
+
+def test_savepoint_isolates_failing_write(pool, make_queue):
+    user_id, group_id = query(pool, "SELECT userID, groupID FROM UserGroup ORDER BY userID LIMIT 1")[0]
+    other_id = query(pool, "SELECT MAX(userID) FROM AppUser")[0][0]
+    before = query(pool, "SELECT COUNT(*) FROM UserGroup")[0][0]
+
+    wq = make_queue(pool, flush_ms=500)  # long enough for all three to share a batch
+    ok_before = wq.submit("update_privacy", user_id=other_id, privacy="friends")
+    duplicate = wq.submit("join_group", user_id=user_id, group_id=group_id)
+    ok_after = wq.submit("log_mood", user_id=other_id, log_date=date(2030, 1, 1), mood="Calm")
+
+    with pytest.raises(Exception, match="UNIQUE"):
+        duplicate.result(timeout=5)
+    assert ok_before.result(timeout=5) is None and ok_after.result(timeout=5) is None
+    stats = wq.stats()
+    assert (stats["batches"], stats["committed"], stats["failed"], stats["pending"]) == (1, 2, 1, 0)
+    assert query(pool, "SELECT privacySetting FROM AppUser WHERE userID = :1", [other_id]) == [("friends",)]
+    assert query(pool, "SELECT COUNT(*) FROM MoodLog WHERE userID = :1 AND logDate = '2030-01-01'",
+                 [other_id]) == [(1,)]
+    assert query(pool, "SELECT COUNT(*) FROM UserGroup")[0][0] == before
+
+
+class DownPool:
+    @contextmanager
+    def connection(self, primary=False):
+        raise ConnectionError("database is down")
+        yield
+
+
+def test_batch_fails_after_max_retries(make_queue):
+    wq = make_queue(DownPool(), retry_s=0.01, max_retries=2)
+    future = wq.submit("update_privacy", user_id=1, privacy="public")
+    with pytest.raises(ConnectionError):
+        future.result(timeout=5)
+    stats = wq.stats()
+    assert (stats["retries"], stats["failed"], stats["pending"]) == (2, 1, 0)
+    assert wq.journal.pending() == []  # not replayed on the next start
+
+
+def test_replay_keeps_unflushed_writes_journaled(pool, tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    user_id = query(pool, "SELECT MAX(userID) FROM AppUser")[0][0]
+    journal = write_queue.Journal(path)
+    writes = [(f"w{day}", "log_mood", dict(user_id=user_id, log_date=date(2030, 1, day), mood="Calm"))
+              for day in range(1, 7)]
+    for write_id, kind, args in writes:
+        journal.write(write_id, kind, args)
+    journal.close()
+
+    seen = []  # journal contents right after each commit, as a second crash would find them
+    wq = write_queue.WriteQueue(pool, journal_path=path, batch_rows=1, size=1,  # replay outnumbers the slots
+                                on_commit=lambda tables: seen.append(
+                                    [w[0] for w in write_queue.Journal(path).pending()]))
+    try:
+        deadline = time.monotonic() + 10
+        while wq.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = wq.stats()
+    finally:
+        wq.close()
+    assert (stats["replayed"], stats["committed"], stats["pending"]) == (6, 6, 0)
+    assert seen[:5] == [[w[0] for w in writes[n:]] for n in range(1, 6)]
+    assert query(pool, "SELECT COUNT(*) FROM MoodLog WHERE userID = :1 AND logDate >= '2030-01-01'",
+                 [user_id]) == [(6,)]
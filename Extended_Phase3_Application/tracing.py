@@ -0,0 +1,457 @@
+"""
+MindConnect+ Database Call Tracing
+Per-query timings tagged with the page and tab that issued them
+
+TracedPool wraps the connection pool (db.ConnectionPool or
+local_engine.LocalPool), so every cursor the app, refdata, kpi,
+pagination and fetch open is measured without changing their code. For
+each statement we record:
+
+    page, tab, SQL fingerprint, bind count, elapsed ms (execute + fetch),
+    rows fetched, estimated round trips, and the pool acquire wait
+
+Events are kept per Streamlit rerun for the sidebar debug panel, folded
+into latency histograms served in Prometheus text format, and optionally
+appended to a JSONL file by a background writer thread (queries never
+wait on the disk; events beyond TRACE_JSONL_QUEUE waiting to be written
+are dropped and counted).
+
+Settings (config.py):
+    TRACE_ENABLED = True
+    TRACE_JSONL_PATH = "db_trace.jsonl"   # default None: no file
+    TRACE_JSONL_QUEUE = 10000
+    TRACE_METRICS_PORT = 9464             # default None: no /metrics endpoint
+"""
+
+import contextvars
+import hashlib
+import itertools
+import json
+import math
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+TRACE_ENABLED = getattr(config, "TRACE_ENABLED", True)
+TRACE_JSONL_PATH = getattr(config, "TRACE_JSONL_PATH", None)
+TRACE_JSONL_QUEUE = getattr(config, "TRACE_JSONL_QUEUE", 10000)
+TRACE_METRICS_PORT = getattr(config, "TRACE_METRICS_PORT", None)
+
+# Latency histogram buckets in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Reruns whose events are kept for the debug panel
+RECENT_RUNS = 50
+
+# =============================================
+# PAGE / TAB CONTEXT
+# =============================================
+_run = contextvars.ContextVar("trace_run", default=None)
+_run_ids = itertools.count(1)
+
+
+def start_run(page):
+    """Call once at the top of each rerun; returns the run id"""
+    run = {"id": next(_run_ids), "page": page, "tab": None}
+    _run.set(run)
+    return run["id"]
+
+
+def set_tab(tab):
+    run = _run.get()
+    if run is not None:
+        run["tab"] = tab
+
+
+def current_run():
+    return _run.get()
+
+
+# =============================================
+# SQL FINGERPRINTS
+# =============================================
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w:])\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_BIND = re.compile(r"(?<![:\w]):\w+")
+
+
+@lru_cache(maxsize=512)
+def fingerprint(sql):
+    """(id, normalized text): literals -> ?, whitespace collapsed, upper case"""
+    text = _SPACE.sub(" ", _NUMBER.sub("?", _STRING.sub("?", sql))).strip().upper()
+    return hashlib.sha1(text.encode()).hexdigest()[:10], text
+
+
+def _bind_count(sql, params, kwargs):
+    if kwargs:
+        return len(kwargs)
+    if params:
+        return len(params)
+    return len(set(_BIND.findall(sql)))
+
+
+# =============================================
+# RECORDER
+# =============================================
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.total += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+class _JsonlWriter:
+    """Daemon thread appending queued events to one open JSONL file"""
+
+    def __init__(self, path, max_queued=TRACE_JSONL_QUEUE):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        threading.Thread(target=self._run, name="trace-jsonl", daemon=True).start()
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                event = self._queue.get()
+                while event is not None:
+                    f.write(json.dumps(event, default=str) + "\n")
+                    try:
+                        event = self._queue.get_nowait()
+                    except queue.Empty:
+                        event = None
+                f.flush()  # once per burst, not per event
+
+
+class Tracer:
+    """Thread-safe sink for query events shared by all sessions"""
+
+    def __init__(self, jsonl_path=TRACE_JSONL_PATH):
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._runs = OrderedDict()
+        self._latency = {}
+        self._rows = {}
+        self._round_trips = {}
+        self._acquire = Histogram()
+        self._writer = _JsonlWriter(jsonl_path) if jsonl_path else None
+
+    def record_acquire(self, seconds):
+        with self._lock:
+            self._acquire.observe(seconds)
+        run = _run.get()
+        if run is not None:
+            run["acquire_ms"] = run.get("acquire_ms", 0.0) + seconds * 1000
+
+    def record(self, event):
+        run = _run.get()
+        event["page"] = run["page"] if run else None
+        event["tab"] = run["tab"] if run else None
+        key = (event["page"] or "", event["tab"] or "", event["fingerprint"])
+        with self._lock:
+            self._latency.setdefault(key, Histogram()).observe(event["elapsed_ms"] / 1000)
+            self._rows[key] = self._rows.get(key, 0) + event["rows"]
+            self._round_trips[key] = self._round_trips.get(key, 0) + event["round_trips"]
+            if run is not None:
+                self._runs.setdefault(run["id"], []).append(event)
+                self._runs.move_to_end(run["id"])
+                while len(self._runs) > RECENT_RUNS:
+                    self._runs.popitem(last=False)
+        if self._writer is not None:
+            self._writer.put(event)
+
+    def run_events(self, run_id):
+        with self._lock:
+            return list(self._runs.get(run_id, []))
+
+    def run_summary(self, run_id):
+        events = self.run_events(run_id)
+        run = _run.get()
+        return {
+            "queries": len(events),
+            "round_trips": sum(e["round_trips"] for e in events),
+            "db_ms": round(sum(e["elapsed_ms"] for e in events), 2),
+            "rows": sum(e["rows"] for e in events),
+            "acquire_ms": round(run.get("acquire_ms", 0.0), 2) if run and run["id"] == run_id else None,
+        }
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, h in series:
+                for bound, count in zip(BUCKETS, h.counts):
+                    lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {h.total}')
+                lines.append(f"{name}_sum{{{labels.rstrip(',')}}} {h.sum:.6f}")
+                lines.append(f"{name}_count{{{labels.rstrip(',')}}} {h.total}")
+
+        def counter(name, help_text, values):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in values:
+                lines.append(f"{name}{{{labels.rstrip(',')}}} {value}")
+
+        with self._lock:
+            keyed = sorted(self._latency)
+            labels = {k: f'page="{_escape(k[0])}",tab="{_escape(k[1])}",fingerprint="{k[2]}",' for k in keyed}
+            histogram("mindconnect_db_query_seconds", "Statement latency (execute + fetch)",
+                      [(labels[k], self._latency[k]) for k in keyed])
+            counter("mindconnect_db_rows_total", "Rows fetched", [(labels[k], self._rows[k]) for k in keyed])
+            counter("mindconnect_db_round_trips_total", "Estimated client/server round trips",
+                    [(labels[k], self._round_trips[k]) for k in keyed])
+            histogram("mindconnect_db_pool_acquire_seconds", "Time waiting for a pooled connection",
+                      [("", self._acquire)])
+        if self._writer is not None:
+            counter("mindconnect_db_trace_dropped_total", "Trace events dropped because the JSONL writer fell behind",
+                    [("", self._writer.dropped)])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+tracer = Tracer()
+
+
+# =============================================
+# WRAPPERS
+# =============================================
+class TracedCursor:
+    """Cursor proxy; one event per execute, completed when the result is
+    exhausted, the next statement runs or the cursor closes"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._event = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    # arraysize/prefetchrows are set by fetch.py and must reach the real cursor
+    @property
+    def arraysize(self):
+        return self._cursor.arraysize
+
+    @arraysize.setter
+    def arraysize(self, value):
+        self._cursor.arraysize = value
+
+    @property
+    def prefetchrows(self):
+        return getattr(self._cursor, "prefetchrows", 0)
+
+    @prefetchrows.setter
+    def prefetchrows(self, value):
+        self._cursor.prefetchrows = value
+
+    def _finish(self):
+        event, self._event = self._event, None
+        if event is None:
+            return
+        # One trip for execute (returning up to prefetchrows), then one per arraysize batch
+        extra = max(0, event["rows"] - self.prefetchrows)
+        event["round_trips"] = 1 + math.ceil(extra / max(1, self.arraysize))
+        event["elapsed_ms"] = round(event["elapsed_ms"], 3)
+        tracer.record(event)
+
+    def _start(self, sql, binds, elapsed):
+        fp, text = fingerprint(sql)
+        self._event = {"ts": time.time(), "fingerprint": fp, "sql": text[:160], "binds": binds,
+                       "elapsed_ms": elapsed * 1000, "rows": 0, "round_trips": 1}
+
+    def execute(self, sql, params=None, **kwargs):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            if kwargs:
+                result = self._cursor.execute(sql, **kwargs)
+            elif params is not None:
+                result = self._cursor.execute(sql, params)
+            else:
+                result = self._cursor.execute(sql)
+        finally:
+            self._start(sql, _bind_count(sql, params, kwargs), time.perf_counter() - start)
+        if self._cursor.description is None:
+            self._finish()  # DML/DDL: nothing to fetch
+        return result
+
+    def executemany(self, sql, rows, **kwargs):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, rows, **kwargs)
+        finally:
+            self._start(sql, len(rows[0]) if rows else 0, time.perf_counter() - start)
+            self._event["rows"] = len(rows)
+            event, self._event = self._event, None
+            event["elapsed_ms"] = round(event["elapsed_ms"], 3)
+            tracer.record(event)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._event is not None:
+            self._event["elapsed_ms"] += (time.perf_counter() - start) * 1000
+        return result
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if self._event is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._event["rows"] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = self._fetch(self._cursor.fetchmany, size)
+        if self._event is not None:
+            self._event["rows"] += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        if self._event is not None:
+            self._event["rows"] += len(rows)
+            self._finish()
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+
+class TracedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        attr = getattr(self._conn, name)  # AttributeError keeps hasattr() honest
+        if name == "fetch_df_all":
+            return self._traced_df_all(attr)
+        if name == "fetch_df_batches":
+            return self._traced_df_batches(attr)
+        return attr
+
+    def cursor(self):
+        return TracedCursor(self._conn.cursor())
+
+    @staticmethod
+    def _record_df(sql, params, rows, seconds, arraysize):
+        fp, text = fingerprint(sql)
+        tracer.record({"ts": time.time(), "fingerprint": fp, "sql": text[:160],
+                       "binds": len(params) if params else 0, "elapsed_ms": round(seconds * 1000, 3),
+                       "rows": rows, "round_trips": 1 + rows // max(1, arraysize)})
+
+    def _traced_df_all(self, method):
+        def fetch_df_all(statement, parameters=None, arraysize=100, **kwargs):
+            start = time.perf_counter()
+            odf = method(statement=statement, parameters=parameters, arraysize=arraysize, **kwargs)
+            self._record_df(statement, parameters, odf.num_rows(), time.perf_counter() - start, arraysize)
+            return odf
+        return fetch_df_all
+
+    def _traced_df_batches(self, method):
+        def fetch_df_batches(statement, parameters=None, size=100, **kwargs):
+            start = time.perf_counter()
+            rows = 0
+            for odf in method(statement=statement, parameters=parameters, size=size, **kwargs):
+                rows += odf.num_rows()
+                yield odf
+            self._record_df(statement, parameters, rows, time.perf_counter() - start, size)
+        return fetch_df_batches
+
+
+class TracedPool:
+    """Pool proxy that hands out traced connections and times acquire()"""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    def acquire(self, primary=False):
+        start = time.perf_counter()
+        try:
+            conn = self._pool.acquire(primary)
+        finally:
+            tracer.record_acquire(time.perf_counter() - start)
+        return TracedConnection(conn)
+
+    def release(self, conn):
+        self._pool.release(conn._conn if isinstance(conn, TracedConnection) else conn)
+
+    @contextmanager
+    def connection(self, primary=False):
+        conn = self.acquire(primary)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+
+def wrap_pool(pool):
+    return TracedPool(pool) if TRACE_ENABLED else pool
+
+
+# =============================================
+# PROMETHEUS ENDPOINT
+# =============================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = tracer.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep scrapes out of the Streamlit console
+
+
+def start_metrics_server(port=TRACE_METRICS_PORT, host="0.0.0.0"):
+    """Serve /metrics on a daemon thread; returns the server (None if disabled)"""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
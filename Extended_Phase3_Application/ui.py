@@ -0,0 +1,308 @@
+"""
+MindConnect+ Reusable Streamlit Widgets
+"""
+
+import contextvars
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import config
+import export
+import fetch
+import refdata
+import tracing
+
+# Total row counts for paginated grids are reused for this long
+GRID_COUNT_TTL_S = getattr(config, "GRID_COUNT_TTL_S", 60)
+# How long a page section waits for its query before giving up on it
+SECTION_TIMEOUT_S = getattr(config, "SECTION_TIMEOUT_S", 10)
+# Threads shared by all sessions for section queries (each holds a pooled connection)
+SECTION_WORKERS = getattr(config, "SECTION_WORKERS", 8)
+
+
+# =============================================
+# LAZY TABS
+# =============================================
+def lazy_tabs(page, labels):
+    """Tab strip that returns the selected label so only that tab's code runs
+
+    st.tabs renders (and queries for) every tab on each rerun; a horizontal
+    radio keyed per page keeps the choice across reruns and form submits.
+    """
+    tab = st.radio(page, labels, horizontal=True, key=f"tab_{page}",
+                   label_visibility="collapsed")
+    tracing.set_tab(tab)
+    return tab
+
+
+# =============================================
+# KEYSET-PAGINATED GRID
+# =============================================
+@st.cache_data(ttl=GRID_COUNT_TTL_S, show_spinner=False)
+def _total_rows(grid_name, filter_items, _grid, _conn):
+    return _grid.count(_conn, dict(filter_items))
+
+
+def paginated_grid(conn, grid, page_sizes=(25, 50, 100, 250), fixed_filters=None,
+                   read=fetch.read_frame):
+    """Render one page of a pagination.KeysetGrid with sort/filter/size controls
+
+    fixed_filters ({label: value}) are always applied and not offered as controls.
+    read(conn, sql, binds) fetches the page, e.g. Repository.read_frame to cache it.
+    """
+    state_key = f"grid_{grid.name}"
+    fixed_filters = fixed_filters or {}
+
+    col1, col2, col3, col4 = st.columns([2, 2, 3, 1])
+    sort = col1.selectbox("Sort by", list(grid.sorts), key=f"{state_key}_sort")
+    filter_label = col2.selectbox("Filter", ["(none)"] + [f for f in grid.filters if f not in fixed_filters],
+                                  key=f"{state_key}_filter")
+    filter_value = col3.text_input("Filter value", key=f"{state_key}_value",
+                                   disabled=filter_label == "(none)")
+    page_size = col4.selectbox("Rows", page_sizes, key=f"{state_key}_size")
+
+    filters = dict(fixed_filters)
+    if filter_label != "(none)" and filter_value.strip():
+        filters[filter_label] = filter_value.strip()
+
+    # Any change to sort/filter/size starts again from the first page
+    view = (sort, page_size, tuple(sorted(filters.items())))
+    state = st.session_state.setdefault(state_key, {"view": view, "stack": [None]})
+    if state["view"] != view:
+        state.update(view=view, stack=[None])
+
+    df, has_next, last = grid.fetch_page(conn, sort, filters, page_size, state["stack"][-1], read)
+    state["last"] = last
+    total = _total_rows(grid.name, view[2], grid, conn)
+
+    st.dataframe(df[grid.columns] if not df.empty else df, use_container_width=True)
+
+    def go_next():
+        state["stack"].append(state["last"])
+
+    def go_prev():
+        if len(state["stack"]) > 1:
+            state["stack"].pop()
+
+    pages = max(1, math.ceil(total / page_size))
+    nav1, nav2, nav3 = st.columns([1, 4, 1])
+    nav1.button("◀ Prev", key=f"{state_key}_prev", on_click=go_prev,
+                disabled=len(state["stack"]) == 1)
+    nav2.caption(f"Page {len(state['stack'])} of {pages} · {total} rows")
+    nav3.button("Next ▶", key=f"{state_key}_next", on_click=go_next,
+                disabled=not has_next)
+
+
+# =============================================
+# TYPE-AHEAD USER PICKER
+# =============================================
+USER_SEARCH_LIMIT = getattr(config, "USER_SEARCH_LIMIT", 20)
+USER_SEARCH_TTL_S = getattr(config, "USER_SEARCH_TTL_S", 30)
+RECENT_USERS = 10
+
+
+@st.cache_data(ttl=USER_SEARCH_TTL_S, show_spinner=False)
+def _search_users(term, limit, _conn):
+    return refdata.search_users(_conn, term, limit)
+
+
+def _user_label(user_id, name):
+    return f"{name} (ID: {user_id})"
+
+
+def user_picker(conn, key, label="Select User"):
+    """Search box + short result list; returns the chosen userID or None
+
+    Only the matching rows (at most USER_SEARCH_LIMIT) are fetched, so the
+    page stays the same size however many users exist. With an empty search
+    the user's recent picks (kept per browser session) are offered instead.
+    """
+    recent = st.session_state.setdefault("recent_users", [])
+    term = st.text_input(f"{label} — search by name, email or ID", key=f"{key}_search")
+
+    if term.strip():
+        matches = [(u[0], u[1]) for u in _search_users(term.strip(), USER_SEARCH_LIMIT, conn)]
+        if not matches:
+            st.caption("No users match that search.")
+            return None
+    else:
+        matches = list(recent)
+        if not matches:
+            st.caption("Type to search for a user.")
+            return None
+
+    options = {_user_label(uid, name): (uid, name) for uid, name in matches}
+    choice = st.selectbox(label, list(options.keys()), key=f"{key}_choice")
+    user_id, name = options[choice]
+
+    # Most recently used first, without duplicates
+    entry = (user_id, name)
+    if not recent or recent[0] != entry:
+        if entry in recent:
+            recent.remove(entry)
+        recent.insert(0, entry)
+        del recent[RECENT_USERS:]
+    return user_id
+
+
+# =============================================
+# CONCURRENT PAGE SECTIONS
+# =============================================
+class _Running:
+    """A section's connection while its query runs, so a timeout can cancel it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def cancel(self):
+        with self.lock:
+            if self.conn is not None and hasattr(self.conn, "cancel"):
+                self.conn.cancel()
+
+
+def _load_section(pool, load, primary, running):
+    with pool.connection(primary) as conn:
+        with running.lock:
+            running.conn = conn
+        try:
+            return load(conn)
+        finally:
+            with running.lock:
+                running.conn = None  # back to the pool: no longer ours to cancel
+
+
+class SectionLoader:
+    """Independent page sections queried in parallel, each rendered as soon as its data arrives
+
+    add() starts the section's query right away on its own pooled
+    connection (load(conn) runs on a worker thread and must not call st.*);
+    render() then waits, filling each section's placeholder in order of
+    completion, so the page takes as long as its slowest query instead of
+    the sum. Each section has its own timeout and error: a section that
+    fails or runs out of time shows that in its place (a timed-out query
+    is cancelled on the server) and the others render normally. Threads
+    rather than asyncio, since Streamlit runs the page script synchronously
+    and the Repository queries use blocking cursors.
+
+        loader = SectionLoader(executor, pool)
+        loader.add(st.empty(), lambda conn: repo.top_groups(conn), st.dataframe)
+        loader.render()
+    """
+
+    def __init__(self, executor, pool, primary=False):
+        self.executor = executor
+        self.pool = pool
+        self.primary = primary
+        self._sections = {}
+
+    def add(self, slot, load, render, timeout=SECTION_TIMEOUT_S):
+        """Start load(conn) now; render(result) fills slot (an st.empty()) later"""
+        slot.caption("⏳ Loading...")
+        running = _Running()
+        # Each task gets its own copy of the context so tracing tags it with this page
+        future = self.executor.submit(contextvars.copy_context().run, _load_section,
+                                      self.pool, load, self.primary, running)
+        self._sections[future] = (slot, render, time.monotonic() + timeout, timeout, running)
+
+    def render(self):
+        pending = set(self._sections)
+        while pending:
+            deadline = min(self._sections[f][2] for f in pending)
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                slot, render = self._sections[future][:2]
+                with slot.container():
+                    try:
+                        render(future.result())
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+            now = time.monotonic()
+            for future in [f for f in pending if self._sections[f][2] <= now]:
+                pending.discard(future)
+                slot, _, _, timeout, running = self._sections[future]
+                if not future.cancel():  # still queued: it never runs
+                    try:
+                        running.cancel()
+                    except Exception:
+                        pass
+                slot.warning(f"⌛ No answer within {timeout}s - showing the rest of the page without it.")
+        self._sections.clear()
+
+
+# =============================================
+# MOOD SUMMARY
+# =============================================
+def mood_metrics(totals):
+    """Metric row for repository.mood_summary() totals"""
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Mood Logs", f"{totals['logs']:,}")
+    col2.metric("Most Common Mood", totals["most_common"], f"{totals['most_common_logs']:,} times",
+                delta_color="off")
+    col3.metric("Logging Streak", f"{totals['streak']} days")
+    col4.metric("Latest Mood", totals["mood"], f"{totals['mood_streak']} days in a row", delta_color="off")
+    st.caption(f"Logging since {totals['first']} · last log {totals['last']}")
+
+
+# =============================================
+# DATA EXPORT
+# =============================================
+# CSV/JSONL are gzip'd; snappy ships with every pyarrow build
+EXPORT_COMPRESSION = {"csv": "gzip", "jsonl": "gzip", "parquet": "snappy"}
+
+
+def export_panel(conn):
+    """Date-range extract of an export.EXPORTS table, streamed to a temp file and offered for download"""
+    with st.form("export_form"):
+        col1, col2, col3 = st.columns(3)
+        table = col1.selectbox("Table", list(export.EXPORTS))
+        fmt = col2.selectbox("Format", export.FORMATS)
+        period = col3.date_input("Dates", (date.today() - timedelta(days=30), date.today()))
+        submitted = st.form_submit_button("Prepare Export")
+    if not submitted or len(period) != 2:
+        return
+    compression = EXPORT_COMPRESSION[fmt]
+    folder = tempfile.mkdtemp(prefix="mindconnect_export_")
+    try:
+        name = export.file_name(table, f"_{period[0]}_{period[1]}", fmt, compression)
+        path = os.path.join(folder, name)
+        with st.spinner("Exporting..."):
+            rows = export.export_partition(conn, table, dict(since=period[0], until=period[1] + timedelta(days=1)),
+                                           path, fmt, compression)
+        st.caption(f"{rows:,} rows · {os.path.getsize(path) / 1024:,.0f} KB")
+        with open(path, "rb") as f:
+            st.download_button(f"Download {name}", f, file_name=name)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+# =============================================
+# DB TRACE PANEL
+# =============================================
+def trace_panel(run_id):
+    """Sidebar toggle showing the statements this rerun issued"""
+    if not tracing.TRACE_ENABLED or not st.sidebar.toggle("Show DB trace", key="show_db_trace"):
+        return
+    summary = tracing.tracer.run_summary(run_id)
+    events = tracing.tracer.run_events(run_id)
+    with st.sidebar.expander("DB Trace (this rerun)", expanded=True):
+        st.caption(f"{summary['queries']} statements · ~{summary['round_trips']} round trips · "
+                   f"{summary['rows']:,} rows")
+        st.caption(f"DB time {summary['db_ms']} ms · Acquire wait {summary['acquire_ms']} ms")
+        if events:
+            st.dataframe(pd.DataFrame(events)[["tab", "fingerprint", "binds", "elapsed_ms", "rows",
+                                               "round_trips", "sql"]],
+                         hide_index=True, use_container_width=True)
+            st.download_button("Download JSONL", "\n".join(json.dumps(e, default=str) for e in events),
+                               file_name=f"db_trace_{run_id}.jsonl", mime="application/json")
@@ -0,0 +1,317 @@
+"""
+MindConnect+ Write Queue
+Group commit for the app's small writes (log mood, join group, register for
+/ rate a session, update privacy)
+
+Committing every click on its own makes each user wait for a redo log sync
+of their own. Here a write is appended to a local journal and put on a
+bounded queue; a background flusher takes whatever is pending (up to
+WRITE_QUEUE_BATCH_ROWS, or what arrived within WRITE_QUEUE_FLUSH_MS) and
+runs it on one connection in one transaction with a single commit.
+
+    - Each write runs under a savepoint, so a constraint error (already
+      logged that day, already a member, ...) rolls back only that write
+      and is reported to its caller; the rest of the batch commits.
+    - A write is acknowledged once it is in the journal (fsync'd when
+      WRITE_JOURNAL_FSYNC). Committed writes are marked done there, so
+      after a crash the writes that never committed are replayed on start.
+      A write that committed just before the crash is replayed too; the
+      inserts then fail as duplicates and the updates set the same values.
+    - If the database is unreachable, the batch stays queued and is
+      retried every WRITE_QUEUE_RETRY_S; callers keep waiting on their
+      Future, or stop waiting and check back later. After
+      WRITE_QUEUE_MAX_RETRIES failed retries the batch is given up: every
+      write in it fails with the last error and is marked done in the
+      journal, so the writes behind it are not held up forever.
+
+After each commit on_commit(tables) is called with the tables the batch
+wrote, which the repository uses to drop cached query results.
+
+Writes are repository.WRITES builders called with keyword arguments:
+
+    future = queue.submit("log_mood", user_id=1, log_date=date.today(), mood="Calm")
+    future.result(timeout=2)   # None, or raises the write's database error
+
+Settings (config.py):
+    WRITE_QUEUE_ENABLED = True
+    WRITE_QUEUE_SIZE = 1000
+    WRITE_QUEUE_BATCH_ROWS = 200
+    WRITE_QUEUE_FLUSH_MS = 20
+    WRITE_QUEUE_RETRY_S = 2.0
+    WRITE_QUEUE_MAX_RETRIES = 30
+    WRITE_QUEUE_WAIT_S = 3.0
+    WRITE_JOURNAL_PATH = "write_journal.jsonl"
+    WRITE_JOURNAL_FSYNC = True
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import date, datetime
+
+import config
+import query_cache
+import repository
+
+WRITE_QUEUE_ENABLED = getattr(config, "WRITE_QUEUE_ENABLED", True)
+# Most writes waiting at once; submit() raises queue.Full beyond that
+WRITE_QUEUE_SIZE = getattr(config, "WRITE_QUEUE_SIZE", 1000)
+WRITE_QUEUE_BATCH_ROWS = getattr(config, "WRITE_QUEUE_BATCH_ROWS", 200)
+WRITE_QUEUE_FLUSH_MS = getattr(config, "WRITE_QUEUE_FLUSH_MS", 20)
+WRITE_QUEUE_RETRY_S = getattr(config, "WRITE_QUEUE_RETRY_S", 2.0)
+# Retries of a batch the database keeps refusing before its writes fail
+WRITE_QUEUE_MAX_RETRIES = getattr(config, "WRITE_QUEUE_MAX_RETRIES", 30)
+# How long the app waits for a commit before telling the user the write is queued
+WRITE_QUEUE_WAIT_S = getattr(config, "WRITE_QUEUE_WAIT_S", 3.0)
+WRITE_JOURNAL_PATH = getattr(config, "WRITE_JOURNAL_PATH", "write_journal.jsonl")
+WRITE_JOURNAL_FSYNC = getattr(config, "WRITE_JOURNAL_FSYNC", True)
+
+SAVEPOINT = "write_queue_item"
+
+
+# =============================================
+# JOURNAL
+# =============================================
+def _encode(value):
+    if isinstance(value, (date, datetime)):
+        return {"$date": value.strftime("%Y-%m-%d")}
+    raise TypeError(f"Cannot journal {type(value).__name__}")
+
+
+def _decode(obj):
+    if set(obj) == {"$date"}:
+        return datetime.strptime(obj["$date"], "%Y-%m-%d").date()
+    return obj
+
+
+class Journal:
+    """Append-only JSON lines: {"id", "kind", "args"} per write, {"done": [ids]} per commit"""
+
+    def __init__(self, path=WRITE_JOURNAL_PATH, fsync=WRITE_JOURNAL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, default=_encode) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def write(self, write_id, kind, args):
+        self._append({"id": write_id, "kind": kind, "args": args})
+
+    def done(self, write_ids):
+        self._append({"done": write_ids})
+
+    def truncate(self):
+        """Nothing outstanding: start the file over"""
+        self._file.truncate(0)
+
+    def pending(self):
+        """[(id, kind, args)] written but never marked done, oldest first"""
+        writes, done = {}, set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line, object_hook=_decode)
+                except ValueError:
+                    continue  # torn last line from a crash mid-append
+                if "done" in record:
+                    done.update(record["done"])
+                else:
+                    writes[record["id"]] = (record["id"], record["kind"], record["args"])
+        return [w for write_id, w in writes.items() if write_id not in done]
+
+    def close(self):
+        self._file.close()
+
+
+# =============================================
+# QUEUE
+# =============================================
+def _notify(future, on_success, on_error):
+    error = future.exception()
+    if error is None:
+        if on_success:
+            on_success()
+    elif on_error:
+        on_error(error)
+
+
+class WriteQueue:
+    """Bounded queue of writes committed in batches by one background thread"""
+
+    def __init__(self, pool, journal_path=WRITE_JOURNAL_PATH, batch_rows=WRITE_QUEUE_BATCH_ROWS,
+                 flush_ms=WRITE_QUEUE_FLUSH_MS, size=WRITE_QUEUE_SIZE, retry_s=WRITE_QUEUE_RETRY_S,
+                 max_retries=WRITE_QUEUE_MAX_RETRIES, on_commit=None):
+        self.pool = pool
+        self.on_commit = on_commit
+        self.batch_rows = batch_rows
+        self.flush_s = flush_ms / 1000
+        self.retry_s = retry_s
+        self.max_retries = max_retries
+        self._slots = threading.BoundedSemaphore(size)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()  # journal appends, the outstanding count and stats
+        self._outstanding = 0
+        self._stop = threading.Event()
+        self._stats = {"submitted": 0, "committed": 0, "failed": 0, "batches": 0, "retries": 0,
+                       "replayed": 0, "last_error": None}
+
+        # Queue and count every replayed write before the flusher starts: it
+        # truncates the journal whenever nothing is outstanding
+        self.journal = Journal(journal_path)
+        replay = self.journal.pending()
+        if not replay:
+            self.journal.truncate()
+        self._unslotted = 0  # replayed writes beyond the queue size, holding no slot
+        for write_id, kind, args in replay:
+            if not self._slots.acquire(blocking=False):
+                self._unslotted += 1
+            self._outstanding += 1
+            self._stats["replayed"] += 1
+            self._queue.put((write_id, kind, args, Future()))
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    # -----------------------------------------
+    # Submitting
+    # -----------------------------------------
+    def submit(self, kind, on_success=None, on_error=None, timeout=1.0, **args):
+        """Journal and queue a repository.WRITES write; returns a Future
+
+        on_success() / on_error(exception) run on the flusher thread once the
+        write has committed or been rejected by the database.
+        """
+        if kind not in repository.WRITES:
+            raise ValueError(f"Unknown write: {kind}")
+        if not self._slots.acquire(timeout=timeout):
+            raise queue.Full(f"Write queue is full ({self._outstanding} pending)")
+        future = Future()
+        if on_success or on_error:
+            future.add_done_callback(lambda f: _notify(f, on_success, on_error))
+        write_id = uuid.uuid4().hex
+        try:
+            with self._lock:
+                self.journal.write(write_id, kind, args)
+                self._outstanding += 1
+                self._stats["submitted"] += 1
+        except Exception:
+            self._slots.release()
+            raise
+        self._queue.put((write_id, kind, args, future))
+        return future
+
+    # -----------------------------------------
+    # Flushing
+    # -----------------------------------------
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_s
+        while len(batch) < self.batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch):
+        """Run the batch in one transaction; ({write_id: exception} for rejected writes, tables written)"""
+        errors = {}
+        with self.pool.connection(primary=True) as conn:
+            cursor = query_cache.WriteRecorder(conn.cursor())
+            try:
+                for write_id, kind, args, _ in batch:
+                    cursor.execute(f"SAVEPOINT {SAVEPOINT}")
+                    try:
+                        repository.run_statements(cursor, repository.WRITES[kind](**args))
+                    except Exception as e:
+                        # If this fails too, the connection is gone: retry the whole batch
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {SAVEPOINT}")
+                        errors[write_id] = e
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                cursor.close()
+        return errors, cursor.tables
+
+    def _flush(self, batch):
+        retries = 0
+        while True:
+            try:
+                errors, tables = self._commit(batch)
+                committed = True
+                break
+            except Exception as e:
+                with self._lock:
+                    self._stats["last_error"] = str(e)
+                    if retries < self.max_retries:
+                        self._stats["retries"] += 1
+                if retries >= self.max_retries:
+                    # Give up: fail every write in the batch instead of blocking the queue
+                    errors, tables = {write_id: e for write_id, _, _, _ in batch}, set()
+                    committed = False
+                    break
+                retries += 1
+                if self._stop.wait(self.retry_s):
+                    return  # shutting down: the journal replays these on restart
+
+        with self._lock:
+            self.journal.done([write_id for write_id, _, _, _ in batch])
+            self._outstanding -= len(batch)
+            if self._outstanding == 0:
+                self.journal.truncate()
+            self._stats["committed"] += len(batch) - len(errors)
+            self._stats["failed"] += len(errors)
+            if committed:
+                self._stats["batches"] += 1
+                self._stats["last_error"] = None
+        if committed and self.on_commit:
+            try:
+                self.on_commit(tables)
+            except Exception:
+                pass  # a failed hook must not hold up the writers
+        for write_id, _, _, future in batch:
+            if self._unslotted:
+                self._unslotted -= 1
+            else:
+                self._slots.release()
+            if write_id in errors:
+                future.set_exception(errors[write_id])
+            else:
+                future.set_result(None)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    # -----------------------------------------
+    # Monitoring / shutdown
+    # -----------------------------------------
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=self._outstanding)
+
+    def close(self, timeout=5.0):
+        """Stop after the current batch; unflushed writes stay in the journal"""
+        self._stop.set()
+        self._thread.join(timeout)
+        self.journal.close()
@@ -0,0 +1,8 @@
+-- =============================================
+-- MindConnect+ Lookup Indexes
+-- =============================================
+
+-- Type-ahead user search (Extended_Phase3_Application/refdata.py):
+-- case-insensitive name prefix. Email prefix search uses the existing
+-- UNIQUE index on AppUser.email.
+CREATE INDEX idx_appuser_name_upper ON AppUser (UPPER(userName));
@@ -0,0 +1,172 @@
+-- =============================================
+-- MindConnect+ Summary Tables
+-- Precomputed activity counts read by the Analytics page
+-- =============================================
+
+-- The app keeps these rows up to date in the same transaction as its own
+-- writes (join group, register for session, rate session) - see
+-- Extended_Phase3_Application/aggregates.py. Sessions are created, moved and
+-- deleted outside the app, so their counts are maintained by the trigger below.
+-- Re-run the BACKFILL section at any time to resync from the base tables.
+-- The per-user mood statistics (MoodRollup) are created by migration
+-- migrations/V004__mood_rollup.sql.
+
+DROP TABLE GroupActivity CASCADE CONSTRAINTS;
+DROP TABLE CounselorActivity CASCADE CONSTRAINTS;
+
+-- =============================================
+-- SUMMARY TABLES
+-- =============================================
+
+-- Per support group: members and sessions
+CREATE TABLE GroupActivity (
+    groupID NUMBER(10) PRIMARY KEY,
+    memberCount NUMBER(10) DEFAULT 0 NOT NULL,
+    sessionCount NUMBER(10) DEFAULT 0 NOT NULL,
+    CONSTRAINT fk_groupactivity_group FOREIGN KEY (groupID)
+        REFERENCES SupportGroup(groupID) ON DELETE CASCADE
+);
+
+-- Per counselor: sessions run, registrations and rating totals
+-- (average rating = ratingSum / ratingCount)
+CREATE TABLE CounselorActivity (
+    counselorID NUMBER(10) PRIMARY KEY,
+    sessionCount NUMBER(10) DEFAULT 0 NOT NULL,
+    attendeeCount NUMBER(10) DEFAULT 0 NOT NULL,
+    ratingSum NUMBER(12) DEFAULT 0 NOT NULL,
+    ratingCount NUMBER(10) DEFAULT 0 NOT NULL,
+    CONSTRAINT fk_counseloractivity_counselor FOREIGN KEY (counselorID)
+        REFERENCES Counselor(userID) ON DELETE CASCADE
+);
+
+-- =============================================
+-- SESSION COUNT TRIGGER
+-- =============================================
+
+-- Moving a session to another group or counselor moves its registrations
+-- and ratings with it, and deleting one also deletes its UserSession rows
+-- (ON DELETE CASCADE). Row triggers cannot read UserSession while that
+-- cascade runs (ORA-04091), so the rows only collect the groups and
+-- counselors they touch and the AFTER STATEMENT section resyncs exactly
+-- those summary rows from the base tables, as the BACKFILL below does.
+CREATE OR REPLACE TRIGGER trg_session_activity
+FOR INSERT OR DELETE OR UPDATE OF groupID, counselorID ON CounselingSession
+COMPOUND TRIGGER
+    TYPE id_set IS TABLE OF NUMBER INDEX BY VARCHAR2(10);
+    v_groups id_set;
+    v_counselors id_set;
+
+    AFTER EACH ROW IS
+    BEGIN
+        IF :OLD.groupID IS NOT NULL THEN
+            v_groups(TO_CHAR(:OLD.groupID)) := :OLD.groupID;
+        END IF;
+        IF :NEW.groupID IS NOT NULL THEN
+            v_groups(TO_CHAR(:NEW.groupID)) := :NEW.groupID;
+        END IF;
+        IF :OLD.counselorID IS NOT NULL THEN
+            v_counselors(TO_CHAR(:OLD.counselorID)) := :OLD.counselorID;
+        END IF;
+        IF :NEW.counselorID IS NOT NULL THEN
+            v_counselors(TO_CHAR(:NEW.counselorID)) := :NEW.counselorID;
+        END IF;
+    END AFTER EACH ROW;
+
+    AFTER STATEMENT IS
+        v_key VARCHAR2(10);
+    BEGIN
+        v_key := v_groups.FIRST;
+        WHILE v_key IS NOT NULL LOOP
+            MERGE INTO GroupActivity g
+            USING (
+                SELECT
+                    sg.groupID,
+                    (SELECT COUNT(*) FROM UserGroup ug WHERE ug.groupID = sg.groupID) AS memberCount,
+                    (SELECT COUNT(*) FROM CounselingSession cs WHERE cs.groupID = sg.groupID) AS sessionCount
+                FROM SupportGroup sg
+                WHERE sg.groupID = v_groups(v_key)
+            ) s
+            ON (g.groupID = s.groupID)
+            WHEN MATCHED THEN UPDATE SET g.sessionCount = s.sessionCount
+            WHEN NOT MATCHED THEN INSERT (groupID, memberCount, sessionCount)
+                VALUES (s.groupID, s.memberCount, s.sessionCount);
+            v_key := v_groups.NEXT(v_key);
+        END LOOP;
+
+        v_key := v_counselors.FIRST;
+        WHILE v_key IS NOT NULL LOOP
+            MERGE INTO CounselorActivity ca
+            USING (
+                SELECT
+                    c.userID AS counselorID,
+                    COUNT(DISTINCT cs.sessionID) AS sessionCount,
+                    COUNT(us.userID) AS attendeeCount,
+                    COALESCE(SUM(us.rating), 0) AS ratingSum,
+                    COUNT(us.rating) AS ratingCount
+                FROM Counselor c
+                LEFT JOIN CounselingSession cs ON c.userID = cs.counselorID
+                LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+                WHERE c.userID = v_counselors(v_key)
+                GROUP BY c.userID
+            ) s
+            ON (ca.counselorID = s.counselorID)
+            WHEN MATCHED THEN UPDATE SET
+                ca.sessionCount = s.sessionCount,
+                ca.attendeeCount = s.attendeeCount,
+                ca.ratingSum = s.ratingSum,
+                ca.ratingCount = s.ratingCount
+            WHEN NOT MATCHED THEN INSERT (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+                VALUES (s.counselorID, s.sessionCount, s.attendeeCount, s.ratingSum, s.ratingCount);
+            v_key := v_counselors.NEXT(v_key);
+        END LOOP;
+    END AFTER STATEMENT;
+END trg_session_activity;
+/
+
+-- =============================================
+-- BACKFILL / RESYNC
+-- =============================================
+
+MERGE INTO GroupActivity g
+USING (
+    SELECT
+        sg.groupID,
+        (SELECT COUNT(*) FROM UserGroup ug WHERE ug.groupID = sg.groupID) AS memberCount,
+        (SELECT COUNT(*) FROM CounselingSession cs WHERE cs.groupID = sg.groupID) AS sessionCount
+    FROM SupportGroup sg
+) s
+ON (g.groupID = s.groupID)
+WHEN MATCHED THEN UPDATE SET g.memberCount = s.memberCount, g.sessionCount = s.sessionCount
+WHEN NOT MATCHED THEN INSERT (groupID, memberCount, sessionCount)
+    VALUES (s.groupID, s.memberCount, s.sessionCount);
+
+MERGE INTO CounselorActivity ca
+USING (
+    SELECT
+        c.userID AS counselorID,
+        COUNT(DISTINCT cs.sessionID) AS sessionCount,
+        COUNT(us.userID) AS attendeeCount,
+        COALESCE(SUM(us.rating), 0) AS ratingSum,
+        COUNT(us.rating) AS ratingCount
+    FROM Counselor c
+    LEFT JOIN CounselingSession cs ON c.userID = cs.counselorID
+    LEFT JOIN UserSession us ON cs.sessionID = us.sessionID
+    GROUP BY c.userID
+) s
+ON (ca.counselorID = s.counselorID)
+WHEN MATCHED THEN UPDATE SET
+    ca.sessionCount = s.sessionCount,
+    ca.attendeeCount = s.attendeeCount,
+    ca.ratingSum = s.ratingSum,
+    ca.ratingCount = s.ratingCount
+WHEN NOT MATCHED THEN INSERT (counselorID, sessionCount, attendeeCount, ratingSum, ratingCount)
+    VALUES (s.counselorID, s.sessionCount, s.attendeeCount, s.ratingSum, s.ratingCount);
+
+COMMIT;
+
+-- =============================================
+-- VERIFICATION QUERIES
+-- =============================================
+
+ SELECT * FROM GroupActivity ORDER BY memberCount DESC;
+ SELECT * FROM CounselorActivity ORDER BY counselorID;
@@ -0,0 +1,7 @@
+-- =============================================
+-- V001: Lookup indexes already shipped in Indexes.sql
+-- =============================================
+
+-- Type-ahead user search (Extended_Phase3_Application/refdata.py):
+-- case-insensitive name prefix.
+CREATE INDEX idx_appuser_name_upper ON AppUser (UPPER(userName));
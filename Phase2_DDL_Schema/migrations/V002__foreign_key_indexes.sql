@@ -0,0 +1,24 @@
+-- =============================================
+-- V002: Indexes on foreign key columns
+-- =============================================
+
+-- The primary keys only cover the leading column of each junction table,
+-- so lookups by the second column (and every FK join from the parent
+-- side) scanned the whole table. Indexed FKs also stop ON DELETE CASCADE
+-- from locking the child table.
+
+-- Members of a group (Support Groups, group statistics, GroupActivity backfill)
+CREATE INDEX idx_usergroup_group ON UserGroup (groupID);
+
+-- Attendees and ratings of a session (Counseling Sessions, counselor stats)
+CREATE INDEX idx_usersession_session ON UserSession (sessionID, rating);
+
+-- Sessions run by a counselor / held for a group
+CREATE INDEX idx_session_counselor ON CounselingSession (counselorID);
+CREATE INDEX idx_session_group ON CounselingSession (groupID);
+
+-- Groups using a resource (Resources page)
+CREATE INDEX idx_groupresource_resource ON GroupResource (resourceID);
+
+-- Matches where the user is the second member (Peer Matching)
+CREATE INDEX idx_usermatch_user2 ON UserMatch (user2ID);
@@ -0,0 +1,8 @@
+-- =============================================
+-- V003: Mood logs by date
+-- =============================================
+
+-- Recent mood logs across all users (needs intervention) and users with
+-- the same mood on the same day (similar moods) filter on logDate first;
+-- the primary key (userID, logDate) cannot serve either.
+CREATE INDEX idx_moodlog_date_mood ON MoodLog (logDate, moodLevel, userID);
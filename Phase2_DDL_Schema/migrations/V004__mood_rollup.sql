@@ -0,0 +1,20 @@
+-- =============================================
+-- V004: Per-user mood rollup
+-- =============================================
+
+-- Mood Analytics and the Home summary read counts, first/last log dates and
+-- streaks from here instead of aggregating the user's whole MoodLog. The app
+-- maintains it with every Log Mood (aggregates.on_log_mood). Fill it once
+-- after this migration with: python aggregates.py --engine oracle
+CREATE TABLE MoodRollup (
+    userID NUMBER(10) NOT NULL,
+    period VARCHAR2(7) NOT NULL,
+    moodLevel VARCHAR2(20) NOT NULL,
+    logCount NUMBER(10) DEFAULT 0 NOT NULL,
+    firstLog DATE NOT NULL,
+    lastLog DATE NOT NULL,
+    streak NUMBER(10) DEFAULT 0 NOT NULL,
+    CONSTRAINT pk_moodrollup PRIMARY KEY (userID, period, moodLevel),
+    CONSTRAINT fk_moodrollup_user FOREIGN KEY (userID)
+        REFERENCES AppUser(userID) ON DELETE CASCADE
+);
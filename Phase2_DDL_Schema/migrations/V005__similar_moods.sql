@@ -0,0 +1,21 @@
+-- =============================================
+-- V005: Similar mood patterns
+-- =============================================
+
+-- Top users who logged the same mood on the same days, per user, written by
+-- Extended_Phase3_Application/similar_moods.py over a sliding window ending
+-- at windowEnd. The app reads one user's list through the primary key.
+CREATE TABLE SimilarMood (
+    userID NUMBER(10) NOT NULL,
+    similarUserID NUMBER(10) NOT NULL,
+    sharedDays NUMBER(6) NOT NULL,
+    windowEnd DATE NOT NULL,
+    CONSTRAINT pk_similarmood PRIMARY KEY (userID, similarUserID),
+    CONSTRAINT fk_similarmood_user FOREIGN KEY (userID)
+        REFERENCES AppUser(userID) ON DELETE CASCADE,
+    CONSTRAINT fk_similarmood_similar FOREIGN KEY (similarUserID)
+        REFERENCES AppUser(userID) ON DELETE CASCADE
+);
+
+-- Deleting a user cascades through similarUserID as well
+CREATE INDEX idx_similarmood_similar ON SimilarMood (similarUserID);
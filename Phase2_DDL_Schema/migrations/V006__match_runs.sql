@@ -0,0 +1,11 @@
+-- =============================================
+-- V006: Match run numbers
+-- =============================================
+
+-- The match_engine.py run that last wrote each pair. The app's match index
+-- (match_index.py) loads only the pairs of runs newer than the ones it has,
+-- instead of the whole table. Pairs written by other tools stay NULL and
+-- are picked up by the index's periodic full rebuild.
+ALTER TABLE UserMatch ADD matchRun NUMBER(10);
+
+CREATE INDEX idx_usermatch_run ON UserMatch (matchRun);
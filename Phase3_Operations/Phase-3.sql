@@ -301,7 +301,7 @@ HAVING AVG(us.rating) >= ALL (
 -- System submits: user1ID, user2ID, compatibilityScore
 -- Result: New match created
 -- Operation: INSERT (maintain user1ID < user2ID convention)
-INSERT INTO UserMatch VALUES (1, 5, 87.5);
+INSERT INTO UserMatch (user1ID, user2ID, compatibilityScore) VALUES (1, 5, 87.5);
 
 
 -- SCENARIO 23: Find best matches for a user (COMPLEX QUERY)